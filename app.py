@@ -1,6 +1,18 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-from db_manager import F1DatabaseManager
+from columnar import (LAP_SCHEMA, TELEMETRY_SCHEMA, binary_response,
+                      negotiate_format, schema_columns)
+from downsample import (FULL_RESOLUTION, LOD_TIERS, downsample_rows, points_for_resolution,
+                        tier_for_points)
+import instrumentation
+from response_cache import add_cache_tags, cached_response, get_cache, session_tag
+from storage import database_stats, get_database
+from telemetry_align import (MAX_LAPS, align_laps, comparison_to_json, fetch_lap_traces,
+                             parse_lap_ids)
+from telemetry_store import TELEMETRY_FIELDS, lap_location, lap_telemetry_query
+from telemetry_stream import DEFAULT_BATCH_SIZE, iter_row_batches, json_array_chunks, ndjson_chunks
+import math
+import numpy as np
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +20,7 @@ load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.init_app(app)
 
 # Database configuration
 db_config = {
@@ -17,83 +30,181 @@ db_config = {
     'password': os.getenv('DB_PASSWORD')
 }
 
+def get_db():
+    """Borrow a pooled connection (PostgreSQL or SQLite per DB_BACKEND); released even if the query raises"""
+    return instrumentation.connection(get_database(db_config))
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """API health check"""
     return jsonify({'status': 'healthy', 'message': 'F1 Telemetry API is running'}), 200
 
+@app.route('/api/health/pool', methods=['GET'])
+def pool_health():
+    """Connection pool size and wait metrics"""
+    return jsonify({'pool': database_stats()}), 200
+
+@app.route('/api/health/cache', methods=['GET'])
+def cache_health():
+    """Response cache size and hit metrics"""
+    return jsonify({'cache': get_cache().stats()}), 200
+
+@app.route('/api/health/degradation', methods=['GET'])
+def degradation_health():
+    """Memoized tire degradation hit ratio and cold/warm latencies"""
+    from degradation_store import metrics
+    return jsonify({'degradation': metrics.stats()}), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request and span latency histograms (Prometheus text format; INSTRUMENTATION=1)"""
+    return Response(instrumentation.metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/sessions', methods=['GET'])
+@cached_response(tags=lambda: ['sessions'])
 def get_sessions():
     """Get all race sessions"""
     try:
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
-        db.cursor.execute("SELECT * FROM sessions ORDER BY date DESC")
-        sessions = db.cursor.fetchall()
-        
-        db.close()
+        with get_db() as db:
+            db.cursor.execute("SELECT * FROM sessions ORDER BY date DESC")
+            sessions = db.cursor.fetchall()
         
         return jsonify({'sessions': [dict(s) for s in sessions]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/drivers', methods=['GET'])
+@cached_response(tags=lambda: ['drivers'])
 def get_drivers():
     """Get all drivers"""
     try:
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
-        db.cursor.execute("SELECT * FROM drivers ORDER BY driver_code")
-        drivers = db.cursor.fetchall()
-        
-        db.close()
+        with get_db() as db:
+            db.cursor.execute("SELECT * FROM drivers ORDER BY driver_code")
+            drivers = db.cursor.fetchall()
         
         return jsonify({'drivers': [dict(d) for d in drivers]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Public lap columns; content hashes and storage keys stay internal
+LAP_FIELDS = [name for name, _ in LAP_SCHEMA] + ['created_at']
+
 @app.route('/api/laps/<session_id>', methods=['GET'])
+@cached_response(tags=lambda session_id: [session_tag(session_id)],
+                 variant=negotiate_format)
 def get_laps(session_id):
-    """Get laps for a session"""
+    """Get laps for a session (JSON, or columnar/Arrow via Accept or ?format=)"""
     driver_code = request.args.get('driver')
+    fmt = negotiate_format()
+    columns = ', '.join(LAP_FIELDS) if fmt == 'json' else schema_columns(LAP_SCHEMA)
     
     try:
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
-        if driver_code:
-            query = "SELECT * FROM laps WHERE session_id = %s AND driver_code = %s ORDER BY lap_number"
-            db.cursor.execute(query, (session_id, driver_code))
-        else:
-            query = "SELECT * FROM laps WHERE session_id = %s ORDER BY lap_number"
-            db.cursor.execute(query, (session_id,))
-        
-        laps = db.cursor.fetchall()
-        db.close()
+        with get_db() as db:
+            if driver_code:
+                query = f"SELECT {columns} FROM laps WHERE session_id = %s AND driver_code = %s ORDER BY lap_number"
+                db.cursor.execute(query, (session_id, driver_code))
+            else:
+                query = f"SELECT {columns} FROM laps WHERE session_id = %s ORDER BY lap_number"
+                db.cursor.execute(query, (session_id,))
+            
+            laps = db.cursor.fetchall()
         
+        if fmt != 'json':
+            return binary_response(laps, LAP_SCHEMA, fmt)
         return jsonify({'laps': [dict(l) for l in laps]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/telemetry/<lap_id>', methods=['GET'])
+@cached_response(variant=negotiate_format)
 def get_telemetry(lap_id):
-    """Get telemetry for a specific lap"""
+    """
+    Get telemetry for a specific lap (JSON, or columnar/Arrow via Accept or ?format=)
+
+    `?points=N` or `?resolution=<metres>` serve the coarsest precomputed LOD
+    tier with at least that many points instead of every raw sample; below
+    the smallest tier that tier is downsampled further on the fly.
+    """
+    fmt = negotiate_format()
+    names = TELEMETRY_FIELDS if fmt == 'json' else [name for name, _ in TELEMETRY_SCHEMA]
+    columns = ', '.join(names)
     try:
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
-        query = "SELECT * FROM telemetry WHERE lap_id = %s ORDER BY distance"
-        db.cursor.execute(query, (lap_id,))
-        telemetry = db.cursor.fetchall()
-        
-        db.close()
-        
-        return jsonify({'telemetry': [dict(t) for t in telemetry]}), 200
+        points = int(request.args['points']) if 'points' in request.args else None
+        resolution = float(request.args['resolution']) if 'resolution' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'points and resolution must be numbers'}), 400
+    if (points is not None and points < 1) or (resolution is not None and resolution <= 0):
+        return jsonify({'error': 'points and resolution must be positive'}), 400
+    
+    try:
+        with get_db() as db:
+            location = lap_location(db.cursor, lap_id)
+            if location is None:
+                return jsonify({'error': 'Lap not found'}), 404
+            key = location[1:]  # (session_key, lap_key)
+            if resolution is not None:
+                db.cursor.execute("SELECT MAX(distance) FROM telemetry "
+                                  "WHERE session_key = %s AND lap_key = %s", key)
+                points = points_for_resolution(db.cursor.fetchone()[0], resolution)
+            tier = tier_for_points(points) if points is not None else FULL_RESOLUTION
+            
+            if tier < FULL_RESOLUTION:
+                db.cursor.execute(lap_telemetry_query(columns, lod=True), (*key, tier))
+            else:
+                db.cursor.execute(lap_telemetry_query(columns), key)
+            telemetry = db.cursor.fetchall()
+            if points is not None and points < LOD_TIERS[0]:
+                telemetry = downsample_rows(telemetry, names, points)
+            
+            # Tag the cached response with its session for ingest invalidation
+            add_cache_tags(session_tag(location[0]))
+        
+        if fmt != 'json':
+            return binary_response(telemetry, TELEMETRY_SCHEMA, fmt)
+        body = {'telemetry': [dict(t) for t in telemetry]}
+        if points is not None:
+            body['lod'] = {'requested_points': points,
+                           'tier_points': LOD_TIERS[tier] if tier < FULL_RESOLUTION else None,
+                           'points': len(telemetry)}
+        return jsonify(body), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/telemetry/<lap_id>/stream', methods=['GET'])
+def stream_telemetry(lap_id):
+    """Stream telemetry for a lap as NDJSON (default) or chunked JSON"""
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        batch_size = min(max(int(request.args.get('batch', DEFAULT_BATCH_SIZE)), 1), 50000)
+    except ValueError:
+        return jsonify({'error': 'batch must be an integer'}), 400
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({'error': "format must be 'ndjson' or 'json'"}), 400
+    
+    try:
+        with get_db() as db:
+            location = lap_location(db.cursor, lap_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if location is None:
+        return jsonify({'error': 'Lap not found'}), 404
+    
+    dumps = app.json.dumps
+    query = lap_telemetry_query(', '.join(TELEMETRY_FIELDS))
+    key = location[1:]
+    
+    def generate():
+        # The pooled connection is held until the last batch is sent
+        with get_db() as db:
+            batches = iter_row_batches(db.conn, query, key, batch_size)
+            if fmt == 'ndjson':
+                yield from ndjson_chunks(batches, dumps)
+            else:
+                yield from json_array_chunks(batches, dumps)
+    
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
 @app.route('/api/compare', methods=['POST'])
 def compare_drivers():
     """Compare two drivers' lap times"""
@@ -103,19 +214,15 @@ def compare_drivers():
     session_id = data.get('session_id')
     
     try:
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
-        # Get driver1 laps
-        query1 = "SELECT lap_number, lap_time_seconds FROM laps WHERE session_id = %s AND driver_code = %s ORDER BY lap_number"
-        db.cursor.execute(query1, (session_id, driver1))
-        driver1_laps = {row[0]: row[1] for row in db.cursor.fetchall()}
-        
-        # Get driver2 laps
-        db.cursor.execute(query1, (session_id, driver2))
-        driver2_laps = {row[0]: row[1] for row in db.cursor.fetchall()}
-        
-        db.close()
+        with get_db() as db:
+            # Get driver1 laps
+            query1 = "SELECT lap_number, lap_time_seconds FROM laps WHERE session_id = %s AND driver_code = %s ORDER BY lap_number"
+            db.cursor.execute(query1, (session_id, driver1))
+            driver1_laps = {row[0]: row[1] for row in db.cursor.fetchall()}
+            
+            # Get driver2 laps
+            db.cursor.execute(query1, (session_id, driver2))
+            driver2_laps = {row[0]: row[1] for row in db.cursor.fetchall()}
         
         # Combine for chart
         comparison = []
@@ -135,54 +242,121 @@ def compare_drivers():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/tire-analysis/<session_id>/<driver_code>', methods=['GET'])
-def analyze_tire(session_id, driver_code):
-    """Analyze tire degradation for a driver in a session"""
+@app.route('/api/compare/telemetry', methods=['GET'])
+@cached_response()
+def compare_telemetry():
+    """
+    Overlay several laps' telemetry on one distance axis
+
+    Query: `laps=<lap_id>,<lap_id>,...` (first is the reference) and
+    optional `step` (grid spacing in metres, default 5).
+    """
     try:
-        from tire_analysis import analyze_tire_degradation, tire_analysis_to_json
+        lap_ids = parse_lap_ids(request.args.get('laps', ''))
+        step = float(request.args.get('step', 5.0))
+    except ValueError:
+        return jsonify({'error': 'laps must be lap UUIDs and step a number'}), 400
+    if not 2 <= len(lap_ids) <= MAX_LAPS:
+        return jsonify({'error': f'laps must list 2 to {MAX_LAPS} lap ids'}), 400
+    if not 0.5 <= step <= 100:
+        return jsonify({'error': 'step must be between 0.5 and 100 metres'}), 400
+    
+    try:
+        with get_db() as db:
+            traces = fetch_lap_traces(db.cursor, lap_ids)
         
-        db = F1DatabaseManager(db_config)
-        db.connect()
+        missing = [l for l in lap_ids if l not in {t.lap_id for t in traces}]
+        if missing:
+            return jsonify({'error': 'No telemetry for laps', 'laps': missing}), 404
         
-        # Get lap times for this driver
-        query = """
-            SELECT lap_number, lap_time_seconds, compound 
-            FROM laps 
-            WHERE session_id = %s AND driver_code = %s 
-            ORDER BY lap_number
-        """
-        db.cursor.execute(query, (session_id, driver_code))
-        laps = db.cursor.fetchall()
-        db.close()
+        add_cache_tags(*{session_tag(t.session_id) for t in traces})
+        return jsonify(comparison_to_json(align_laps(traces, step=step))), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+TIRE_LAPS_QUERY = """
+    SELECT driver_code, lap_number, lap_time_seconds, tire_compound, tire_life
+    FROM laps
+    WHERE session_id = %s {driver_filter}
+    ORDER BY driver_code, lap_number
+"""
+
+def _stint_json(stints, i, stint_number, analysis):
+    from tire_analysis import tire_analysis_to_json
+    return {
+        'stint': stint_number,
+        'start_lap': stints.start_laps[i],
+        'end_lap': stints.end_laps[i],
+        'laps': int(stints.offsets[i + 1] - stints.offsets[i]),
+        **tire_analysis_to_json(analysis)
+    }
+
+@app.route('/api/tire-analysis/<session_id>', methods=['GET'])
+@cached_response(tags=lambda session_id: [session_tag(session_id)])
+def analyze_session_tires(session_id):
+    """
+    Tire degradation for every driver and stint of a session
+
+    One ordered query, vectorized stint segmentation, then the fits run per
+    driver on the worker pool (`?method=batch` uses the vectorized fitter).
+    A stop onto a fresh set of the same compound starts a new stint (see
+    `segment_stints`).
+    """
+    method = request.args.get('method', 'scipy')
+    if method not in ('scipy', 'batch'):
+        return jsonify({'error': "method must be 'scipy' or 'batch'"}), 400
+    
+    try:
+        from degradation_store import analyze_stints_memoized
+        from tire_analysis import segment_stints
+        
+        with get_db() as db:
+            db.cursor.execute(TIRE_LAPS_QUERY.format(driver_filter=''), (session_id,))
+            laps = db.cursor.fetchall()
+            if not laps:
+                return jsonify({'error': 'No lap data found'}), 404
+            
+            with instrumentation.span('compute.stints'):
+                stints = segment_stints(laps)
+            analyses = analyze_stints_memoized(db.cursor, session_id, stints, method=method)
         
-        if not laps:
-            return jsonify({'error': 'No lap data found'}), 404
+        drivers = {}
+        for i, analysis in enumerate(analyses):
+            driver = drivers.setdefault(stints.driver_codes[i], {'stints': []})
+            driver['stints'].append(_stint_json(stints, i, len(driver['stints']), analysis))
+        for driver in drivers.values():
+            driver['total_stints'] = len(driver['stints'])
         
-        # Group by stint (based on compound changes and gaps)
-        stints = []
-        current_stint = {'compound': None, 'laps': []}
+        return jsonify({
+            'session_id': session_id,
+            'method': method,
+            'drivers': drivers,
+            'total_stints': len(analyses)
+        }), 200
         
-        for lap in laps:
-            lap_num, lap_time, compound = lap[0], lap[1], lap[2] or 'UNKNOWN'
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tire-analysis/<session_id>/<driver_code>', methods=['GET'])
+def analyze_tire(session_id, driver_code):
+    """Analyze tire degradation for a driver in a session"""
+    try:
+        from degradation_store import analyze_stints_memoized
+        from tire_analysis import segment_stints, tire_analysis_to_json
+        
+        with get_db() as db:
+            db.cursor.execute(TIRE_LAPS_QUERY.format(driver_filter='AND driver_code = %s'),
+                              (session_id, driver_code))
+            laps = db.cursor.fetchall()
+            if not laps:
+                return jsonify({'error': 'No lap data found'}), 404
             
-            if lap_time is None or lap_time < 60:  # Skip invalid laps
-                continue
-                
-            if current_stint['compound'] != compound:
-                if current_stint['laps']:
-                    stints.append(current_stint)
-                current_stint = {'compound': compound, 'laps': [lap_time]}
-            else:
-                current_stint['laps'].append(lap_time)
-        
-        if current_stint['laps']:
-            stints.append(current_stint)
-        
-        # Analyze each stint
-        analyses = []
-        for stint in stints:
-            analysis = analyze_tire_degradation(stint['laps'], stint['compound'])
-            analyses.append(tire_analysis_to_json(analysis))
+            # Group by stint (compound changes and fresh sets), reusing stored fits
+            with instrumentation.span('compute.stints'):
+                stints = segment_stints(laps)
+            analyses = [tire_analysis_to_json(a) for a in
+                        analyze_stints_memoized(db.cursor, session_id, stints,
+                                                driver_code=driver_code)]
         
         return jsonify({
             'driver': driver_code,
@@ -198,31 +372,28 @@ def analyze_tire(session_id, driver_code):
 def get_pit_strategy(session_id, driver_code):
     """Calculate optimal pit window for a driver"""
     try:
-        from tire_analysis import calculate_optimal_pit_window, analyze_tire_degradation
+        from degradation_store import analyze_whole_race_memoized
+        from tire_analysis import calculate_optimal_pit_window
         
         total_laps = int(request.args.get('total_laps', 57))  # Default Monaco laps
         current_lap = int(request.args.get('current_lap', 1))
         
-        db = F1DatabaseManager(db_config)
-        db.connect()
-        
         query = """
             SELECT lap_number, lap_time_seconds 
             FROM laps 
             WHERE session_id = %s AND driver_code = %s 
             ORDER BY lap_number
         """
-        db.cursor.execute(query, (session_id, driver_code))
-        laps = db.cursor.fetchall()
-        db.close()
-        
-        if not laps:
-            return jsonify({'error': 'No lap data found'}), 404
-        
-        lap_times = [l[1] for l in laps if l[1] and l[1] > 60]
-        current_tire_age = len(lap_times)
-        
-        analysis = analyze_tire_degradation(lap_times)
+        with get_db() as db:
+            db.cursor.execute(query, (session_id, driver_code))
+            laps = db.cursor.fetchall()
+            if not laps:
+                return jsonify({'error': 'No lap data found'}), 404
+            
+            lap_times = [l[1] for l in laps if l[1] and l[1] > 60]
+            current_tire_age = len(lap_times)
+            
+            analysis = analyze_whole_race_memoized(db.cursor, session_id, driver_code, lap_times)
         deg_rate = analysis.degradation_rate
         
         earliest, latest, recommendation = calculate_optimal_pit_window(
@@ -244,6 +415,226 @@ def get_pit_strategy(session_id, driver_code):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+SUMMARY_PARTS = ('fastest_laps', 'stints', 'compounds', 'positions')
+
+def _read_summary(cursor, session_id, part):
+    """One materialized summary (session_summary.py) as JSON-ready data"""
+    from session_summary import (COMPOUND_USAGE_QUERY, FASTEST_LAPS_QUERY, POSITIONS_QUERY,
+                                 STINTS_QUERY, positions_to_json)
+
+    if part == 'fastest_laps':
+        cursor.execute(FASTEST_LAPS_QUERY, (session_id,))
+        laps = [dict(r) for r in cursor.fetchall()]
+        for rank, lap in enumerate(laps, 1):
+            lap['lap_id'] = str(lap['lap_id'])
+            lap['rank'] = rank
+            lap['gap'] = round(lap['lap_time_seconds'] - laps[0]['lap_time_seconds'], 3)
+        return laps
+    if part == 'stints':
+        cursor.execute(STINTS_QUERY.format(driver_filter=''), (session_id,))
+        drivers = {}
+        for row in cursor.fetchall():
+            stint = dict(row)
+            drivers.setdefault(stint.pop('driver_code'), []).append(stint)
+        return drivers
+    if part == 'compounds':
+        cursor.execute(COMPOUND_USAGE_QUERY, (session_id,))
+        return [dict(r) for r in cursor.fetchall()]
+    cursor.execute(POSITIONS_QUERY, (session_id,))
+    return positions_to_json(cursor.fetchall())
+
+@app.route('/api/summary/<session_id>', methods=['GET'])
+@cached_response(tags=lambda session_id: [session_tag(session_id)])
+def get_session_summary(session_id):
+    """
+    Landing page summary of a session from the materialized summary tables
+
+    Fastest laps, stints with average pace, compound usage and per-lap
+    positions (`?include=fastest_laps,stints` picks a subset).
+    """
+    parts = request.args.get('include', ','.join(SUMMARY_PARTS)).split(',')
+    unknown = [p for p in parts if p not in SUMMARY_PARTS]
+    if unknown:
+        return jsonify({'error': f"include must be among {', '.join(SUMMARY_PARTS)}"}), 400
+
+    try:
+        with get_db() as db:
+            summary = {part: _read_summary(db.cursor, session_id, part) for part in parts}
+        if not any(summary.values()):
+            return jsonify({'error': 'No summary found for session'}), 404
+        return jsonify({'session_id': session_id, **summary}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/summary/<session_id>/<part>', methods=['GET'])
+@cached_response(tags=lambda session_id, part: [session_tag(session_id)])
+def get_session_summary_part(session_id, part):
+    """One summary: fastest-laps, stints, compounds or positions"""
+    part = part.replace('-', '_')
+    if part not in SUMMARY_PARTS:
+        return jsonify({'error': 'Unknown summary'}), 404
+
+    try:
+        with get_db() as db:
+            data = _read_summary(db.cursor, session_id, part)
+        if not data:
+            return jsonify({'error': 'No summary found for session'}), 404
+        return jsonify({'session_id': session_id, part: data}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/replay/<session_id>', methods=['GET'])
+def replay_session(session_id):
+    """
+    Replay a session lap by lap as server-sent events
+
+    Query: `speed` (x real time, default 1; 0 = no pacing), `from_lap`
+    (earlier laps only build state), `total_laps`, `pit_time`. Each `lap`
+    event carries position, stint, degradation and the pit window for the
+    driver who just finished the lap.
+    """
+    from replay import ReplayEngine, load_session_laps, sse_events
+
+    try:
+        speed = float(request.args.get('speed', 1.0))
+        from_lap = int(request.args.get('from_lap', 1))
+        total_laps = request.args.get('total_laps', type=int)
+        pit_time = float(request.args.get('pit_time', 22.0))
+    except ValueError:
+        return jsonify({'error': 'speed, from_lap and pit_time must be numbers'}), 400
+    if not (math.isfinite(speed) and math.isfinite(pit_time)):
+        return jsonify({'error': 'speed and pit_time must be finite'}), 400
+    if speed < 0:
+        return jsonify({'error': 'speed must be >= 0'}), 400
+
+    try:
+        with get_db() as db:
+            laps = load_session_laps(db.cursor, session_id)
+        if not laps:
+            return jsonify({'error': 'No lap data found'}), 404
+
+        engine = ReplayEngine(laps, total_laps, pit_loss=pit_time)
+        events = sse_events(engine.play(speed, from_lap, heartbeat=15.0))
+        return Response(stream_with_context(events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/strategy/optimize', methods=['GET'])
+@cached_response()
+def optimize_pit_strategy():
+    """
+    Top-k pit strategies for a race (stop laps, stint lengths, compounds)
+
+    Query: `base_lap_time` (required), `total_laps` (default 57), `pit_time`,
+    `compounds=SOFT,MEDIUM,HARD`, `max_stops`, `min_stint`, `top`, and
+    optional per-compound wear as `degradation=SOFT:0.09,HARD:0.04`
+    (seconds per lap of tire age). Limits (400 beyond): 200 laps, 5 stops,
+    top 20; see strategy_optimizer for the cost at those limits.
+    """
+    from strategy_optimizer import (DEFAULT_MAX_STOPS, DEFAULT_TOP_K, DRY_COMPOUNDS,
+                                    optimize_strategy)
+    
+    args = request.args
+    try:
+        degradation = {}
+        for item in filter(None, args.get('degradation', '').split(',')):
+            compound, rate = item.split(':')
+            degradation[compound.strip().upper()] = float(rate)
+    except ValueError:
+        return jsonify({'error': 'degradation must look like SOFT:0.09,HARD:0.04'}), 400
+    
+    try:
+        total_laps = int(args.get('total_laps', 57))
+        compounds = [c for c in args.get('compounds', ','.join(DRY_COMPOUNDS)).split(',') if c]
+        strategies = optimize_strategy(
+            total_laps=total_laps,
+            base_lap_time=float(args['base_lap_time']),
+            compounds=compounds,
+            pit_time=float(args.get('pit_time', 22.0)),
+            top_k=int(args.get('top', DEFAULT_TOP_K)),
+            max_stops=int(args.get('max_stops', DEFAULT_MAX_STOPS)),
+            min_stint_laps=int(args.get('min_stint', 1)),
+            degradation=degradation or None,
+        )
+    except KeyError:
+        return jsonify({'error': 'base_lap_time is required'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify({
+            'total_laps': total_laps,
+            'strategies': [s.to_dict() for s in strategies],
+            'recommended': strategies[0].to_dict() if strategies else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """Trained lap time models (every version) and registry stats"""
+    try:
+        from model_registry import get_registry
+        registry = get_registry()
+        return jsonify({
+            'models': [info.to_dict() for info in registry.list_models()],
+            'registry': registry.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/predict/lap-time/<int:season>/<circuit>', methods=['GET', 'POST'])
+def predict_lap_time_ml(season, circuit):
+    """
+    Lap time prediction from the circuit/season's trained model
+
+    GET predicts one lap from query args (tire_age, fuel_load,
+    track_position, compound, lap_number); POST takes a JSON object of
+    equal-length columns with the same names and predicts them all.
+    `?version=N` pins a model version (default: latest).
+    """
+    from lap_predictor import PREDICT_INPUTS, prediction_to_json
+    from model_registry import ModelNotFoundError, get_registry
+    
+    try:
+        version = int(request.args['version']) if 'version' in request.args else None
+        predictor, info = get_registry().load(circuit, season, version)
+    except ModelNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    model = {'circuit': info.circuit, 'season': info.season, 'version': info.version}
+    
+    try:
+        if request.method == 'POST':
+            columns = request.get_json(silent=True)
+            if not isinstance(columns, dict):
+                return jsonify({'error': 'Body must be a JSON object of columns'}), 400
+            result = predictor.predict_batch(columns)
+            return jsonify({
+                'model': model,
+                'predicted_time': result.predicted_time.tolist(),
+                'confidence': result.confidence,
+                'factors': {k: np.asarray(v).tolist() for k, v in result.factors.items()},
+                'model_used': result.model_used
+            }), 200
+        
+        kwargs = {}
+        for name, default in PREDICT_INPUTS.items():
+            if name == 'compound':
+                kwargs[name] = request.args.get(name, default).upper()
+            elif name in request.args:
+                kwargs[name] = float(request.args[name])
+            elif default is None:
+                return jsonify({'error': f'{name} is required'}), 400
+        prediction = predictor.predict(**kwargs)
+        return jsonify({'model': model, **prediction_to_json(prediction)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     print("🏎️  Starting F1 Telemetry API...")
     app.run(debug=True, port=5000)
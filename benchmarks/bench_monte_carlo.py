@@ -0,0 +1,68 @@
+"""
+Benchmark: Monte Carlo strategy rollouts per second
+Runs `simulate_race_strategies` for three Monaco-like strategies at
+increasing rollout counts, in-process and on the worker pool, and checks
+that both give identical results for the same seed.
+
+Usage:
+    python benchmarks/bench_monte_carlo.py --rollouts 10000 100000 1000000 --workers 4
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import monte_carlo  # noqa: E402
+from monte_carlo import RaceConditions, simulate_race_strategies  # noqa: E402
+
+STRATEGIES = [
+    ([18, 20, 19], ['SOFT', 'MEDIUM', 'SOFT']),
+    ([25, 32], ['MEDIUM', 'HARD']),
+    ([12, 15, 15, 15], ['SOFT', 'SOFT', 'SOFT', 'MEDIUM']),
+]
+
+
+def run(n_rollouts: int, workers: int, seed: int):
+    os.environ['MONTE_CARLO_WORKERS'] = str(workers)
+    monte_carlo._reset_executor()
+    conditions = RaceConditions(total_laps=57, base_lap_time=80.0)
+    stints, compounds = zip(*STRATEGIES)
+    if workers > 1:
+        # Warm-up: spawn the workers (and their imports) outside the timing
+        simulate_race_strategies(list(stints), list(compounds), conditions,
+                                 n_rollouts=2 * monte_carlo.SHARD_ROLLOUTS, seed=seed)
+    return simulate_race_strategies(list(stints), list(compounds), conditions,
+                                    n_rollouts=n_rollouts, seed=seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rollouts', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"🎲 Monte Carlo rollouts: {len(STRATEGIES)} strategies x 57 laps")
+    print("=" * 50)
+    for n in args.rollouts:
+        serial = run(n, 1, args.seed)
+        line = f"{n:>9,} rollouts  1 worker: {serial.rollouts_per_second:>11,.0f}/s"
+        if args.workers > 1:
+            pooled = run(n, args.workers, args.seed)
+            same = pooled.to_dict()['strategies'] == serial.to_dict()['strategies']
+            line += (f"  {args.workers} workers: {pooled.rollouts_per_second:>11,.0f}/s"
+                     f"  {'identical' if same else 'DIFFERENT'}")
+        print(line)
+
+    print("\nWin probability (last run):")
+    for strategy in serial.strategies:
+        print(f"  {'-'.join(strategy.compounds):<26} {strategy.win_probability:6.1%}  "
+              f"p50 {strategy.percentiles['p50']:.1f}s  p95 {strategy.percentiles['p95']:.1f}s")
+    monte_carlo._reset_executor()
+
+
+if __name__ == '__main__':
+    main()
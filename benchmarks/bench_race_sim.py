@@ -0,0 +1,79 @@
+"""
+Benchmark: scalar vs vectorized race-time simulation
+Times `_calculate_race_time` (one analytical prediction per lap) against
+`race_sim.race_times` on random strategies for one race and checks that
+every total is identical.
+
+Usage:
+    python benchmarks/bench_race_sim.py --strategies 5000 --laps 57 --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lap_predictor import _calculate_race_time  # noqa: E402
+from race_sim import encode_strategies, race_times  # noqa: E402
+
+
+def random_strategies(n_strategies: int, total_laps: int,
+                      seed: int = 0) -> Tuple[List[List[int]], List[List[str]]]:
+    """1-4 stint strategies with random pit laps and compounds"""
+    rng = np.random.default_rng(seed)
+    stints, compounds = [], []
+    for _ in range(n_strategies):
+        n_stints = int(rng.integers(1, 5))
+        pits = np.sort(rng.integers(1, total_laps, n_stints - 1))
+        stints.append(np.diff(np.r_[0, pits, total_laps]).tolist())
+        compounds.append([str(c) for c in rng.choice(['SOFT', 'MEDIUM', 'HARD'], n_stints)])
+    return stints, compounds
+
+
+def best_of(fn, repeat: int) -> Tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--strategies', type=int, default=5000)
+    parser.add_argument('--laps', type=int, default=57)
+    parser.add_argument('--base-time', type=float, default=82.3)
+    parser.add_argument('--pit-time', type=float, default=22.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stints, compounds = random_strategies(args.strategies, args.laps, args.seed)
+
+    scalar_s, scalar = best_of(
+        lambda: [_calculate_race_time(s, c, args.base_time, args.pit_time)
+                 for s, c in zip(stints, compounds)], args.repeat)
+
+    def vectorized():
+        lengths, modifiers, counts = encode_strategies(stints, compounds)
+        return race_times(lengths, modifiers, args.base_time, args.pit_time, counts)
+
+    vector_s, vector = best_of(vectorized, args.repeat)
+    mismatches = int((np.asarray(scalar) != vector).sum())
+
+    print(f"🏁 Race simulation: {len(stints)} strategies x {args.laps} laps")
+    print("=" * 50)
+    print(f"Scalar (_calculate_race_time): {scalar_s * 1000:9.1f} ms")
+    print(f"Vectorized (race_sim):         {vector_s * 1000:9.1f} ms  ({scalar_s / vector_s:.1f}x)")
+    print(f"Races per second (vectorized): {len(stints) / vector_s:,.0f}")
+    print(f"Totals differing: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: incremental replay vs per-lap re-analysis
+Plays synthetic races through `ReplayEngine` without pacing and compares
+with re-running `analyze_tire_degradation` on the stint so far after every
+lap (what polling `/api/pit-strategy` each lap amounts to). Reports the
+real-time factor one core sustains for all drivers.
+
+Usage:
+    python benchmarks/bench_replay.py --drivers 20 --laps 78 --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from replay import ReplayEngine, ReplayLap  # noqa: E402
+from tire_analysis import analyze_tire_degradation  # noqa: E402
+
+
+def synthetic_race(n_drivers: int, n_laps: int, seed: int = 0) -> List[ReplayLap]:
+    """Two-stint races with linear wear, noise and a slow pit lap"""
+    rng = np.random.default_rng(seed)
+    laps = []
+    for d in range(n_drivers):
+        pit = int(rng.integers(n_laps // 3, 2 * n_laps // 3))
+        pace = 78 + rng.uniform(0, 2)
+        elapsed = 0.0
+        for lap in range(1, n_laps + 1):
+            first_stint = lap <= pit
+            age = lap - 1 if first_stint else lap - pit - 1
+            lap_time = pace + rng.uniform(0.03, 0.1) * age + rng.normal(0, 0.2)
+            if lap == pit:
+                lap_time += 20
+            elapsed += lap_time
+            laps.append(ReplayLap(f"D{d:02d}", lap, lap_time, 'MEDIUM' if first_stint else 'HARD',
+                                  age + 1, elapsed))
+    return laps
+
+
+def best_of(fn, repeat: int) -> Tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def reanalyze(laps: List[ReplayLap]) -> List[float]:
+    """Degradation after every lap by refitting the driver's current stint"""
+    stints, rates = {}, []
+    for lap in sorted(laps, key=lambda lap: lap.session_time):
+        key = (lap.driver_code, lap.compound)
+        stints.setdefault(key, []).append(lap.lap_time)
+        rates.append(analyze_tire_degradation(stints[key], lap.compound).degradation_rate)
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--drivers', type=int, default=20)
+    parser.add_argument('--laps', type=int, default=78)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--reanalyze-drivers', type=int, default=4,
+                        help="Drivers timed for the re-analysis baseline (it is slow)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    laps = synthetic_race(args.drivers, args.laps, args.seed)
+    race_seconds = max(lap.session_time for lap in laps)
+
+    replay_s, updates = best_of(lambda: list(ReplayEngine(laps).play(None)), args.repeat)
+    subset = [lap for lap in laps if int(lap.driver_code[1:]) < args.reanalyze_drivers]
+    batch_s, _ = best_of(lambda: reanalyze(subset), 1)
+    per_lap_replay = replay_s / len(updates)
+    per_lap_batch = batch_s / len(subset)
+
+    print(f"🏁 Replay: {args.drivers} drivers x {args.laps} laps ({len(updates)} updates)")
+    print("=" * 50)
+    print(f"Incremental (ReplayEngine):  {per_lap_replay * 1e6:9.1f} µs/lap")
+    print(f"Re-analysis per lap:         {per_lap_batch * 1e6:9.1f} µs/lap  "
+          f"({per_lap_batch / per_lap_replay:.0f}x slower)")
+    print(f"Whole race replayed in:      {replay_s * 1000:9.1f} ms")
+    print(f"Real-time factor (1 core):   {race_seconds / replay_s:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: API read queries on PostgreSQL vs embedded SQLite
+Snapshots the configured PostgreSQL database into a temporary SQLite file
+(storage.copy_from_postgres) and times the queries behind the hot read
+endpoints on both backends, through the same `connection()` interface the
+API uses. Reports p50/p95 per query.
+
+Usage:
+    DB_HOST=localhost DB_NAME=f1_telemetry python benchmarks/bench_storage.py --iterations 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from db_pool import get_pool  # noqa: E402
+from session_summary import POSITIONS_QUERY, STINTS_QUERY  # noqa: E402
+from telemetry_store import TELEMETRY_FIELDS, lap_telemetry_query  # noqa: E402
+
+# A racing lap (lap 1 can be a formation or red-flagged lap with many more samples)
+SAMPLE_LAP = 10
+
+QUERIES = {
+    'sessions': ("SELECT * FROM sessions ORDER BY date DESC", lambda s: ()),
+    'laps_session': ("SELECT * FROM laps WHERE session_id = %s ORDER BY lap_number",
+                     lambda s: (s['session_id'],)),
+    'laps_driver': ("SELECT * FROM laps WHERE session_id = %s AND driver_code = %s "
+                    "ORDER BY lap_number", lambda s: (s['session_id'], s['driver_code'])),
+    'telemetry_lap': (lap_telemetry_query(', '.join(TELEMETRY_FIELDS)),
+                      lambda s: (s['session_key'], s['lap_key'])),
+    'telemetry_lod': (lap_telemetry_query(', '.join(TELEMETRY_FIELDS), lod=True),
+                      lambda s: (s['session_key'], s['lap_key'], 1)),
+    'tire_laps': ("SELECT driver_code, lap_number, lap_time_seconds, tire_compound FROM laps "
+                  "WHERE session_id = %s ORDER BY driver_code, lap_number",
+                  lambda s: (s['session_id'],)),
+    'summary_stints': (STINTS_QUERY.format(driver_filter=''), lambda s: (s['session_id'],)),
+    'summary_positions': (POSITIONS_QUERY, lambda s: (s['session_id'],)),
+    'compare_laps': ("SELECT lap_id, lap_number FROM laps WHERE lap_id = ANY(%s::uuid[])",
+                     lambda s: (s['lap_ids'],)),
+}
+
+
+def sample_keys(database) -> List[Dict]:
+    """Session, driver and lap ids to query (lap SAMPLE_LAP of each driver, latest session)"""
+    with database.connection() as db:
+        db.cursor.execute("SELECT session_id, session_key FROM sessions ORDER BY date DESC LIMIT 1")
+        session_id, session_key = db.cursor.fetchone()
+        db.cursor.execute(
+            "SELECT driver_code, lap_key FROM laps WHERE session_id = %s AND lap_number = %s "
+            "ORDER BY driver_code", (str(session_id), SAMPLE_LAP))
+        keys = dict(db.cursor.fetchall())
+        db.cursor.execute("SELECT lap_key, lap_id FROM laps WHERE lap_key = ANY(%s)",
+                          (list(keys.values()),))
+        lap_ids = {r[0]: str(r[1]) for r in db.cursor.fetchall()}
+    compare = [lap_ids[k] for k in list(keys.values())[:4]]
+    return [{'session_id': str(session_id), 'session_key': session_key, 'driver_code': driver,
+             'lap_key': lap_key, 'lap_ids': compare}
+            for driver, lap_key in keys.items()]
+
+
+def time_query(database, sql: str, params: Callable, keys: List[Dict],
+               iterations: int) -> np.ndarray:
+    """Per-call latency (ms) of borrow + execute + fetchall, cycling through `keys`"""
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        key = keys[i % len(keys)]
+        start = time.perf_counter()
+        with database.connection() as db:
+            db.cursor.execute(sql, params(key))
+            db.cursor.fetchall()
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sqlite-path', help="Reuse this SQLite snapshot instead of copying")
+    args = parser.parse_args(argv)
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    postgres = get_pool(db_config)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.sqlite_path
+        if path is None:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            conn = storage.SQLiteConnection(path)
+            storage.create_schema(conn)
+            start = time.perf_counter()
+            with postgres.connection() as db:
+                counts = storage.copy_from_postgres(db.conn, conn)
+            conn.close()
+            print(f"Copied {counts['telemetry']:,} telemetry rows into SQLite in "
+                  f"{time.perf_counter() - start:.1f}s")
+        sqlite = storage.SQLiteDatabase(path)
+
+        keys = sample_keys(postgres)
+        if not keys:
+            print("❌ No laps in the database")
+            return
+        print(f"{'query':<17} {'postgres p50':>13} {'p95':>8} {'sqlite p50':>11} {'p95':>8} {'ratio':>6}")
+        for name, (sql, params) in QUERIES.items():
+            results = {}
+            for label, database in (('postgres', postgres), ('sqlite', sqlite)):
+                time_query(database, sql, params, keys, min(10, args.iterations))  # Warm up
+                results[label] = np.percentile(time_query(database, sql, params, keys,
+                                                          args.iterations), [50, 95])
+            pg, sq = results['postgres'], results['sqlite']
+            print(f"{name:<17} {pg[0]:>10.2f} ms {pg[1]:>5.2f} ms {sq[0]:>8.2f} ms "
+                  f"{sq[1]:>5.2f} ms {sq[0] / pg[0]:>5.2f}x")
+        print(f"SQLite file: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
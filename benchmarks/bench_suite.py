@@ -0,0 +1,568 @@
+"""
+Benchmark suite: analytics and API hot paths, with JSON results per commit
+Seeds a temporary SQLite database from the bundled Monaco 2024 cache plus
+synthetic seasons (20 drivers x 24 races each) through the real ingest
+path, then times tire degradation fits by stint length,
+`predict_race_strategy`, Monte Carlo rollouts, `LapTimePredictor`
+fit/predict and API endpoint latency. `compare` reports regressions between two result files.
+
+Usage:
+    python benchmarks/bench_suite.py run --seasons 3
+    python benchmarks/bench_suite.py run --only tire api --output /tmp/head.json
+    python benchmarks/bench_suite.py compare benchmarks/results/<base>.json /tmp/head.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+GROUPS = ('tire', 'strategy', 'monte_carlo', 'predictor', 'api')
+
+STINT_LENGTHS = (5, 10, 20, 40, 80)
+RACE_LENGTHS = (44, 57, 78)
+MONTE_CARLO_ROLLOUTS = (10_000, 100_000)
+COMPOUND_PACE = {'SOFT': -0.6, 'MEDIUM': 0.0, 'HARD': 0.4}   # s/lap vs MEDIUM
+COMPOUND_WEAR = {'SOFT': 0.09, 'MEDIUM': 0.05, 'HARD': 0.03}  # s/lap per lap of tyre life
+
+# Grid for synthetic sessions when the Monaco cache cannot be parsed
+FALLBACK_DRIVERS = ['VER', 'PER', 'LEC', 'SAI', 'HAM', 'RUS', 'NOR', 'PIA', 'ALO', 'STR',
+                    'GAS', 'OCO', 'ALB', 'SAR', 'TSU', 'RIC', 'BOT', 'ZHO', 'MAG', 'HUL']
+
+# (name, path template); placeholders are filled from `api_keys`
+API_ENDPOINTS = [
+    ('sessions', '/api/sessions'),
+    ('laps_session', '/api/laps/{session_id}'),
+    ('laps_driver', '/api/laps/{session_id}?driver={driver}'),
+    ('laps_columnar', '/api/laps/{session_id}?format=columnar'),
+    ('telemetry', '/api/telemetry/{lap_id}'),
+    ('telemetry_lod', '/api/telemetry/{lap_id}?points=100'),
+    ('compare_telemetry', '/api/compare/telemetry?laps={lap_id},{other_lap_id}'),
+    ('tire_analysis_driver', '/api/tire-analysis/{session_id}/{driver}'),
+    ('tire_analysis_session', '/api/tire-analysis/{session_id}?method=batch'),
+    ('pit_strategy', '/api/pit-strategy/{session_id}/{driver}'),
+    ('summary', '/api/summary/{session_id}'),
+    ('strategy_optimize', '/api/strategy/optimize?base_lap_time=74&total_laps=78'),
+    ('predict_lap_time', '/api/predict/lap-time/{season}/{circuit}?tire_age=10&lap_number=20'),
+]
+
+
+def configure_environment(work_dir: str, db_path: str):
+    """
+    Point the app at the benchmark database before any repo module reads its env
+
+    The response cache is disabled so API timings measure the real work,
+    and worker pools are single-process so runs on different machines
+    are comparable.
+    """
+    os.environ.update({
+        'DB_BACKEND': 'sqlite',
+        'SQLITE_PATH': db_path,
+        'RESPONSE_CACHE_MAX_ENTRIES': '0',
+        'RESPONSE_CACHE_SHARED_PATH': '',
+        'TIRE_ANALYSIS_WORKERS': '1',
+        'MONTE_CARLO_WORKERS': '1',
+        'INSTRUMENTATION': '0',
+        'PROFILING': '0',
+        'MODEL_REGISTRY_DIR': os.path.join(work_dir, 'models'),
+        'FEATURE_CACHE_DIR': os.path.join(work_dir, 'features'),
+    })
+
+
+# Synthetic data
+
+def _lap_id(rng: np.random.Generator) -> str:
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+def synthetic_race(rng: np.random.Generator, drivers: Sequence[str], total_laps: int,
+                   base_lap_time: float) -> pd.DataFrame:
+    """
+    Laps of one race (`bulk_loader.LAP_COLUMNS` without hashes)
+
+    1-3 stops per driver with compound pace and linear wear, fuel burn,
+    lap 1 / pit in / pit out penalties, safety car laps and the odd
+    retirement.
+    """
+    safety_car = set(rng.choice(np.arange(5, total_laps), size=int(rng.integers(0, 4)),
+                                replace=False).tolist())
+    rows = []
+    for driver in drivers:
+        pace = rng.normal(0, 0.5)
+        finish = total_laps if rng.random() > 0.05 else int(rng.integers(1, total_laps))
+        stops = int(rng.integers(1, 4))
+        pits = sorted(rng.choice(np.arange(8, total_laps - 5), stops, replace=False).tolist())
+        bounds = [0, *pits, total_laps]
+        compounds = rng.choice(list(COMPOUND_WEAR), stops + 1).tolist()
+        for start, end, compound in zip(bounds[:-1], bounds[1:], compounds):
+            for lap in range(start + 1, min(end, finish) + 1):
+                life = lap - start
+                lap_time = (base_lap_time + pace + COMPOUND_PACE[compound]
+                            + COMPOUND_WEAR[compound] * life + 0.03 * (total_laps - lap)
+                            + rng.normal(0, 0.25))
+                if lap == 1:
+                    lap_time += 5.0
+                if lap == end and end < total_laps:
+                    lap_time += 18.0  # Pit in
+                if life == 1 and start > 0:
+                    lap_time += 4.0   # Pit out
+                if lap in safety_car:
+                    lap_time *= 1.35
+                rows.append((_lap_id(rng), None, driver, lap, round(lap_time, 3), compound,
+                             life, False, round(lap_time * 0.31, 3), round(lap_time * 0.42, 3),
+                             round(lap_time * 0.27, 3)))
+    laps = pd.DataFrame(rows, columns=['lap_id', 'session_id', 'driver_code', 'lap_number',
+                                       'lap_time_seconds', 'tire_compound', 'tire_life',
+                                       'is_personal_best', 'sector1_time', 'sector2_time',
+                                       'sector3_time'])
+    best = laps.groupby('driver_code')['lap_time_seconds'].cummin()
+    laps['is_personal_best'] = laps['lap_time_seconds'] == best
+    return laps
+
+
+def synthetic_telemetry(rng: np.random.Generator, laps: pd.DataFrame, samples: int,
+                        track_length: float = 3337.0) -> pd.DataFrame:
+    """`samples` points per lap on a looped speed trace, with LOD tiers"""
+    from downsample import assign_lod_tiers
+
+    distance = np.linspace(0, track_length, samples)
+    phase = 2 * np.pi * distance / track_length
+    n = len(laps)
+    speed = (180 + 90 * np.sin(5 * phase))[None, :] + rng.normal(0, 4, (n, samples))
+    throttle = np.clip((speed - 120) * 1.2, 0, 100)
+    telemetry = pd.DataFrame({
+        'lap_id': np.repeat(laps['lap_id'].to_numpy(), samples),
+        'distance': np.tile(distance, n),
+        'speed': speed.ravel().round().astype(np.int64),
+        'throttle': throttle.ravel().round().astype(np.int64),
+        'brake': (throttle.ravel() < 5),
+        'drs': np.zeros(n * samples, dtype=np.int64),
+        'gear': np.clip(speed.ravel() // 40, 1, 8).astype(np.int64),
+        'rpm': (7000 + speed.ravel() * 20).round().astype(np.int64),
+        'position_x': np.tile(np.cos(phase) * 500, n),
+        'position_y': np.tile(np.sin(phase) * 300, n),
+    })
+    telemetry['lod_tier'] = assign_lod_tiers(telemetry)
+    return telemetry
+
+
+def session_frames(year: int, event_name: str, session_date: date, drivers: List[tuple],
+                   laps: pd.DataFrame, telemetry: Optional[pd.DataFrame] = None):
+    """SessionFrames for generated laps, fingerprinted like `extract_session` output"""
+    from bulk_loader import TELEMETRY_COLUMNS, SessionFrames
+    from fingerprint import driver_content_hashes, lap_content_hashes
+
+    if telemetry is None:
+        telemetry = pd.DataFrame(columns=TELEMETRY_COLUMNS)
+    laps = laps.copy()
+    laps['content_hash'] = lap_content_hashes(laps, telemetry)
+    return SessionFrames(year=year, event_name=event_name, session_type='R',
+                         session_date=session_date, drivers=drivers, laps=laps,
+                         telemetry=telemetry, driver_hashes=driver_content_hashes(laps))
+
+
+def monaco_frames(cache_dir: Path, rng: np.random.Generator, telemetry_samples: int):
+    """
+    The bundled Monaco race, parsed offline like `ingest.py --offline`
+
+    The cache holds laps only, so synthetic telemetry is attached to make
+    the telemetry endpoints measurable. Returns None if FastF1 or the cache
+    is unavailable.
+    """
+    try:
+        from ingest import _init_worker, discover_cached_sessions, load_spec
+        specs = [s for s in discover_cached_sessions(cache_dir, 2024) if s.session_type == 'R']
+        if not specs:
+            raise FileNotFoundError(f"no cached 2024 race under {cache_dir}")
+        _init_worker(str(cache_dir), True)
+        _, frames, _ = load_spec(specs[0], offline=True, include_telemetry=False,
+                                 cache_dir=str(cache_dir))
+    except Exception as e:
+        print(f"⚠️  Monaco cache unavailable ({e}); seeding synthetic sessions only")
+        return None
+    laps = frames.laps.drop(columns=['content_hash'])
+    return session_frames(frames.year, frames.event_name, frames.session_date, frames.drivers,
+                          laps, synthetic_telemetry(rng, laps, telemetry_samples))
+
+
+def synthetic_seasons(rng: np.random.Generator, drivers: List[tuple], seasons: int,
+                      races: int, first_season: int = 2030) -> List:
+    """SessionFrames for `seasons` x `races` races on varied circuits"""
+    codes = [d[0] for d in drivers]
+    frames = []
+    for year in range(first_season, first_season + seasons):
+        for race in range(1, races + 1):
+            laps = synthetic_race(rng, codes, int(rng.integers(44, 79)),
+                                  float(rng.uniform(68, 98)))
+            frames.append(session_frames(year, f"Synthetic Round {race:02d}",
+                                         date(year, 3, 1) + timedelta(weeks=race - 1),
+                                         drivers, laps))
+    return frames
+
+
+def seed_database(db_path: str, frames: List) -> Dict:
+    """Write every session through `bulk_loader.write_session`; per-session seconds"""
+    from bulk_loader import write_session
+    from storage import SQLiteConnection, create_schema
+
+    conn = SQLiteConnection(db_path)
+    create_schema(conn)
+    timings = []
+    try:
+        for session in frames:
+            start = time.perf_counter()
+            write_session(conn.cursor(), session)
+            conn.commit()
+            timings.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+    return {'seconds': np.array(timings),
+            'laps': int(sum(len(f.laps) for f in frames)),
+            'telemetry': int(sum(len(f.telemetry) for f in frames))}
+
+
+# Timing
+
+def sample(fn: Callable, iterations: int, warmup: int = 1) -> np.ndarray:
+    """Seconds per call over `iterations` calls, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def summarize(seconds: np.ndarray, unit: str = 'ms', **extra) -> Dict:
+    """Distribution of timings in `unit` (s, ms or us)"""
+    values = np.asarray(seconds) * {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+    return {'unit': unit, 'n': int(len(values)),
+            'min': round(float(values.min()), 4),
+            'p50': round(float(np.percentile(values, 50)), 4),
+            'p95': round(float(np.percentile(values, 95)), 4),
+            'mean': round(float(values.mean()), 4), **extra}
+
+
+# Benchmarks
+
+def bench_tire(rng: np.random.Generator, season_laps: pd.DataFrame, iterations: int) -> Dict:
+    """Per-stint SciPy fits by stint length, and the batch fitter over a whole season"""
+    from tire_analysis import analyze_tire_degradation, analyze_tire_degradation_batch, segment_stints
+
+    results = {}
+    for n in STINT_LENGTHS:
+        laps = np.arange(n)
+        stints = [(80 + rng.uniform(0, 0.12) * laps + rng.normal(0, 0.15, n)
+                   + (rng.random() < 0.4) * 0.01 * np.maximum(0, laps - n * 0.6) ** 2).tolist()
+                  for _ in range(iterations)]
+        compounds = rng.choice(list(COMPOUND_WEAR), iterations).tolist()
+        timings = np.empty(iterations)
+        analyze_tire_degradation(stints[0], compounds[0])
+        for i, (times, compound) in enumerate(zip(stints, compounds)):
+            start = time.perf_counter()
+            analyze_tire_degradation(times, compound)
+            timings[i] = time.perf_counter() - start
+        results[f'tire_degradation.laps_{n:02d}'] = summarize(timings)
+
+    ordered = season_laps.sort_values(['session_id', 'driver_code', 'lap_number'])
+    rows = list(ordered[['driver_code', 'lap_number', 'lap_time_seconds', 'tire_compound',
+                         'tire_life']].itertuples(index=False))
+    stints = segment_stints(rows)
+    results['tire_degradation.batch_season'] = summarize(
+        sample(lambda: analyze_tire_degradation_batch(stints.lap_times, stints.compounds,
+                                                      stints.offsets),
+               max(3, iterations // 10)),
+        stints=len(stints))
+    return results
+
+
+def bench_strategy(iterations: int) -> Dict:
+    from lap_predictor import predict_race_strategy
+
+    return {f'race_strategy.laps_{n}': summarize(
+                sample(lambda: predict_race_strategy(n, 80.0), iterations), unit='us')
+            for n in RACE_LENGTHS}
+
+
+def bench_monte_carlo(iterations: int) -> Dict:
+    """In-process rollouts of three 57-lap strategies, as in bench_monte_carlo.py"""
+    from monte_carlo import RaceConditions, simulate_race_strategies
+
+    stints = [[18, 20, 19], [25, 32], [12, 15, 15, 15]]
+    compounds = [['SOFT', 'MEDIUM', 'SOFT'], ['MEDIUM', 'HARD'], ['SOFT', 'SOFT', 'SOFT', 'MEDIUM']]
+    conditions = RaceConditions(total_laps=57, base_lap_time=80.0)
+    results = {}
+    for n in MONTE_CARLO_ROLLOUTS:
+        timings = sample(lambda: simulate_race_strategies(stints, compounds, conditions,
+                                                          n_rollouts=n, parallel=False),
+                         max(3, iterations * 1_000 // n))
+        results[f'monte_carlo.rollouts_{n}'] = summarize(
+            timings, rollouts=n,
+            rollouts_per_second=round(n / float(np.percentile(timings, 50))))
+    return results
+
+
+def bench_predictor(sessions: List, iterations: int) -> Dict:
+    """LapTimePredictor on features derived from the synthetic seasons"""
+    from lap_features import MODEL_INPUTS, add_derived_features, training_matrix
+    from lap_predictor import LapTimePredictor
+
+    laps = pd.concat([f.laps.assign(session_id=f'{f.year}-{f.event_name}') for f in sessions],
+                     ignore_index=True)
+    features = add_derived_features(laps)
+    sets = {'race': features[features['session_id'] == features['session_id'].iat[0]],
+            'season': features[features['session_id'].str.startswith(str(sessions[0].year))],
+            'all': features}
+    repeat = max(3, iterations // 10)
+    results = {}
+    for label, subset in sets.items():
+        X, y = training_matrix(subset)
+        results[f'lap_predictor.fit.{label}'] = summarize(
+            sample(lambda: LapTimePredictor().fit(X, y), repeat), rows=int(len(y)))
+    X, y = training_matrix(features)
+    chunks = [(X[i:i + 10_000], y[i:i + 10_000]) for i in range(0, len(y), 10_000)]
+    results['lap_predictor.fit_chunks.all'] = summarize(
+        sample(lambda: LapTimePredictor().fit_chunks(chunks), repeat), rows=int(len(y)))
+
+    predictor = LapTimePredictor()
+    predictor.fit(X, y)
+    results['lap_predictor.predict'] = summarize(
+        sample(lambda: predictor.predict(tire_age=12, fuel_load=60.0, track_position=5,
+                                         compound='SOFT', lap_number=30), iterations * 10),
+        unit='us')
+    inputs = features[features['train']][list(MODEL_INPUTS)]
+    results['lap_predictor.predict_batch.all'] = summarize(
+        sample(lambda: predictor.predict_batch(inputs), repeat), rows=int(len(inputs)))
+    return results
+
+
+def api_keys(cursor) -> Dict:
+    """Placeholders for API_ENDPOINTS: the earliest session (Monaco when seeded from the cache)"""
+    cursor.execute("SELECT session_id, year, event_name FROM sessions ORDER BY date LIMIT 1")
+    session_id, season, circuit = cursor.fetchone()
+    cursor.execute("SELECT driver_code, lap_id FROM laps WHERE session_id = %s AND lap_number = 10 "
+                   "ORDER BY driver_code LIMIT 2", (session_id,))
+    (driver, lap_id), (_, other_lap_id) = cursor.fetchall()
+    return {'session_id': str(session_id), 'season': season, 'circuit': circuit,
+            'driver': driver, 'lap_id': str(lap_id), 'other_lap_id': str(other_lap_id)}
+
+
+def bench_api(iterations: int) -> Dict:
+    """Endpoint latency through the Flask test client (response cache off)"""
+    from model_registry import train_model
+    from storage import connect
+
+    conn = connect({})
+    try:
+        keys = api_keys(conn.cursor())
+        train_model(conn.cursor(), keys['circuit'], keys['season'])
+        conn.commit()
+    finally:
+        conn.close()
+
+    from app import app
+    client = app.test_client()
+    results = {}
+    for name, template in API_ENDPOINTS:
+        path = template.format(**keys)
+        status = client.get(path).status_code
+        if status != 200:
+            print(f"⚠️  {path} returned {status}; skipped")
+            results[f'api.{name}'] = {'status': status}
+            continue
+        results[f'api.{name}'] = summarize(sample(lambda: client.get(path), iterations, warmup=0))
+    return results
+
+
+# Runs and comparisons
+
+def run_metadata(args) -> Dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(['git', *cmd], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+    return {
+        'commit': git('rev-parse', 'HEAD') or 'unknown',
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'scale': {'seasons': args.seasons, 'races': args.races, 'drivers': args.drivers,
+                  'telemetry_samples': args.telemetry_samples, 'iterations': args.iterations,
+                  'seed': args.seed},
+    }
+
+
+def run(args) -> Dict:
+    work_dir = tempfile.mkdtemp(prefix='f1_bench_')
+    try:
+        return run_in(work_dir, args)
+    finally:
+        if args.keep:
+            print(f"Kept {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_in(work_dir: str, args) -> Dict:
+    """Seed `work_dir` (database, model registry, feature cache) and run the groups"""
+    groups = args.only or list(GROUPS)
+    db_path = os.path.join(work_dir, 'bench.sqlite3')
+    configure_environment(work_dir, db_path)
+    rng = np.random.default_rng(args.seed)
+    meta = run_metadata(args)
+    results: Dict[str, Dict] = {}
+
+    start = time.perf_counter()
+    base = monaco_frames(args.cache_dir, rng, args.telemetry_samples)
+    drivers = (base.drivers if base is not None else
+               [(code, code, 'Synthetic', i + 1) for i, code in enumerate(FALLBACK_DRIVERS)])
+    drivers = drivers[:args.drivers]
+    synthetic = synthetic_seasons(rng, drivers, args.seasons, args.races)
+    meta['base_session'] = 'monaco-cache' if base is not None else 'synthetic'
+    if base is None:
+        # Give the API benchmarks a session with telemetry all the same
+        first = synthetic[0]
+        base = session_frames(first.year, first.event_name, first.session_date, drivers,
+                              first.laps.drop(columns=['content_hash']),
+                              synthetic_telemetry(rng, first.laps, args.telemetry_samples))
+        synthetic = synthetic[1:]
+    print(f"Generated {len(synthetic)} synthetic races "
+          f"({sum(len(f.laps) for f in synthetic):,} laps) in {time.perf_counter() - start:.1f}s")
+
+    if 'api' in groups:
+        seeded = seed_database(db_path, [base] + synthetic)
+        results['ingest.write_session'] = summarize(seeded['seconds'][1:], laps=seeded['laps'])
+        print(f"Seeded {db_path}: {seeded['laps']:,} laps, {seeded['telemetry']:,} telemetry "
+              f"samples in {seeded['seconds'].sum():.1f}s")
+
+    season_laps = pd.concat([f.laps.assign(session_id=f'{f.year}-{f.event_name}')
+                             for f in synthetic[:args.races]], ignore_index=True)
+    benches = {
+        'tire': lambda: bench_tire(rng, season_laps, args.iterations),
+        'strategy': lambda: bench_strategy(args.iterations),
+        'monte_carlo': lambda: bench_monte_carlo(args.iterations),
+        'predictor': lambda: bench_predictor(synthetic, args.iterations),
+        'api': lambda: bench_api(args.iterations),
+    }
+    for group in groups:
+        start = time.perf_counter()
+        results.update(benches[group]())
+        print(f"✅ {group} in {time.perf_counter() - start:.1f}s")
+    return {'meta': meta, 'results': results}
+
+
+def print_results(results: Dict):
+    print(f"{'benchmark':<40} {'p50':>11} {'p95':>11} {'min':>11}")
+    for name, r in results.items():
+        if 'p50' not in r:
+            print(f"{name:<40} {'status ' + str(r.get('status')):>11}")
+            continue
+        unit = r['unit']
+        print(f"{name:<40} {r['p50']:>8.3f} {unit:<2} {r['p95']:>8.3f} {unit:<2} "
+              f"{r['min']:>8.3f} {unit:<2}")
+        if 'rollouts_per_second' in r:
+            print(f"{'  rollouts/s (p50)':<40} {r['rollouts_per_second']:>11,}")
+
+
+def compare(base: Dict, head: Dict, metric: str = 'p50', threshold: float = 0.20) -> int:
+    """
+    Print head vs base per benchmark
+
+    Returns:
+        Number of benchmarks more than `threshold` slower
+    """
+    if base['meta'].get('scale') != head['meta'].get('scale'):
+        print(f"⚠️  Different scale: {base['meta'].get('scale')} vs {head['meta'].get('scale')}")
+    for field in ('platform', 'cpus', 'python'):
+        if base['meta'].get(field) != head['meta'].get(field):
+            print(f"⚠️  Different {field}: {base['meta'].get(field)} vs {head['meta'].get(field)}")
+    print(f"base {base['meta']['commit'][:10]}  head {head['meta']['commit'][:10]}  ({metric})")
+    print(f"{'benchmark':<40} {'base':>11} {'head':>11} {'ratio':>7}")
+
+    regressions = 0
+    for name in sorted(set(base['results']) | set(head['results'])):
+        old, new = base['results'].get(name, {}), head['results'].get(name, {})
+        if metric not in old or metric not in new:
+            cells = [f"{r[metric]:>8.3f} {r['unit']:<2}" if metric in r else f"{'—':>11}"
+                     for r in (old, new)]
+            print(f"{name:<40} {cells[0]} {cells[1]}")
+            continue
+        ratio = new[metric] / old[metric] if old[metric] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '⚠️  slower'
+            regressions += 1
+        elif ratio < 1 / (1 + threshold):
+            flag = '✅ faster'
+        print(f"{name:<40} {old[metric]:>8.3f} {old['unit']:<2} {new[metric]:>8.3f} "
+              f"{new['unit']:<2} {ratio:>6.2f}x {flag}")
+        if 'rollouts_per_second' in old and 'rollouts_per_second' in new:
+            print(f"{'  rollouts/s (p50)':<40} {old['rollouts_per_second']:>11,} "
+                  f"{new['rollouts_per_second']:>11,}")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('run', help="Seed a database, run the benchmarks, write JSON")
+    bench.add_argument('--seasons', type=int, default=1, help="Synthetic seasons to generate")
+    bench.add_argument('--races', type=int, default=24, help="Races per synthetic season")
+    bench.add_argument('--drivers', type=int, default=20)
+    bench.add_argument('--telemetry-samples', type=int, default=300,
+                       help="Synthetic telemetry samples per Monaco lap")
+    bench.add_argument('--iterations', type=int, default=50)
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--only', nargs='+', choices=GROUPS)
+    bench.add_argument('--cache-dir', type=Path, default=ROOT / 'cache')
+    bench.add_argument('--keep', action='store_true',
+                       help="Keep the seeded database and model directories for debugging")
+    bench.add_argument('--output', type=Path,
+                       help="Result file (default: benchmarks/results/<commit>.json)")
+    diff = sub.add_parser('compare', help="Compare two result files")
+    diff.add_argument('base', type=Path)
+    diff.add_argument('head', type=Path)
+    diff.add_argument('--metric', choices=['min', 'p50', 'p95', 'mean'], default='p50')
+    diff.add_argument('--threshold', type=float, default=0.20,
+                      help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        base, head = (json.loads(p.read_text()) for p in (args.base, args.head))
+        sys.exit(1 if compare(base, head, args.metric, args.threshold) else 0)
+
+    report = run(args)
+    print_results(report['results'])
+    meta = report['meta']
+    output = args.output or RESULTS_DIR / f"{meta['commit'][:10]}{'-dirty' if meta['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    print(f"Results: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: per-stint vs batch tire degradation fitting
+Times `analyze_tire_degradation` (SciPy curve_fit per stint) against
+`analyze_tire_degradation_batch` on synthetic stints and reports how
+closely the results agree (cliff laps within the tolerance documented on
+`analyze_tire_degradation_batch`). For live use it also times re-analysing
+every stint after each lap against feeding the laps to
+`IncrementalDegradation`.
+
+Usage:
+    python benchmarks/bench_tire_degradation.py --stints 400 --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tire_analysis import (IncrementalDegradation, analyze_tire_degradation,  # noqa: E402
+                           analyze_tire_degradation_batch)
+
+
+def synthetic_stints(n_stints: int, seed: int = 0) -> Tuple[List[List[float]], List[str]]:
+    """Race-like stints: linear wear, optional cliff, noise and the odd pit/SC lap"""
+    rng = np.random.default_rng(seed)
+    stints, compounds = [], []
+    for _ in range(n_stints):
+        n = int(rng.integers(3, 40))
+        laps = np.arange(n)
+        times = 80 + rng.uniform(0, 0.12) * laps + rng.normal(0, 0.15, n)
+        if rng.random() < 0.4:
+            start = rng.uniform(8, max(n, 9))
+            times += rng.uniform(0.002, 0.03) * np.maximum(0, laps - start) ** 2
+        if rng.random() < 0.3:
+            times[rng.integers(n)] += 25  # Pit in/out or safety car lap
+        stints.append(times.tolist())
+        compounds.append(str(rng.choice(['SOFT', 'MEDIUM', 'HARD'])))
+    return stints, compounds
+
+
+def best_of(fn, repeat: int) -> Tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--stints', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stints, compounds = synthetic_stints(args.stints, args.seed)
+
+    serial_s, serial = best_of(
+        lambda: [analyze_tire_degradation(t, c) for t, c in zip(stints, compounds)], args.repeat)
+    batch_s, batch = best_of(
+        lambda: analyze_tire_degradation_batch(stints, compounds), args.repeat)
+
+    rate_match = np.mean([abs(a.degradation_rate - b.degradation_rate) <= 1e-4
+                          for a, b in zip(serial, batch)])
+    cliff_exact = np.mean([a.cliff_lap == b.cliff_lap for a, b in zip(serial, batch)])
+    cliff_near = np.mean([(a.cliff_lap is None) == (b.cliff_lap is None) and
+                          (a.cliff_lap is None or abs(a.cliff_lap - b.cliff_lap) <= 2)
+                          for a, b in zip(serial, batch)])
+
+    print(f"🏎️ Tire degradation fitting: {len(stints)} stints")
+    print("=" * 50)
+    print(f"Per-stint (curve_fit): {serial_s * 1000:9.1f} ms")
+    print(f"Batch (vectorized):    {batch_s * 1000:9.1f} ms  ({serial_s / batch_s:.1f}x)")
+    print(f"Degradation rate equal (±1e-4): {rate_match:.0%}")
+    print(f"Cliff lap equal:                {cliff_exact:.0%}")
+    print(f"Cliff lap within 2 laps:        {cliff_near:.0%}")
+
+    # Live: a fresh analysis after every lap vs one incremental update per lap
+    n_laps = sum(len(t) for t in stints)
+
+    def incremental():
+        snapshots = []
+        for times, compound in zip(stints, compounds):
+            estimator = IncrementalDegradation(compound)
+            for lap_time in times:
+                estimator.add(lap_time)
+                snapshots.append(estimator.snapshot())
+        return snapshots
+
+    def reanalysis():
+        return [analyze_tire_degradation_batch([times[:k]], compound)[0]
+                for times, compound in zip(stints, compounds) for k in range(1, len(times) + 1)]
+
+    online_s, online = best_of(incremental, args.repeat)
+    refit_s, refit = best_of(reanalysis, 1)
+    same = np.mean([(a.degradation_rate, a.performance_loss_percent) ==
+                    (b.degradation_rate, b.performance_loss_percent) for a, b in zip(online, refit)])
+    print(f"\nPer-lap updates ({n_laps} laps):")
+    print(f"Re-analysis (batch fitter):  {refit_s / n_laps * 1e6:9.1f} µs/lap")
+    print(f"Incremental (+ snapshot):    {online_s / n_laps * 1e6:9.1f} µs/lap  "
+          f"({refit_s / online_s:.0f}x)")
+    print(f"Rate and loss equal:         {same:.0%}")
+
+
+if __name__ == '__main__':
+    main()
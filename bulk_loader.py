@@ -0,0 +1,520 @@
+"""
+Bulk COPY loader for FastF1 sessions
+Streams laps and telemetry into PostgreSQL with COPY FROM STDIN
+(batched INSERTs on the embedded SQLite backend)
+"""
+
+import io
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from degradation_store import prune_results
+from downsample import assign_lod_tiers
+from fingerprint import driver_content_hashes, lap_content_hashes
+from session_summary import refresh_session_summary
+from storage import execute_values, insert_frame, is_sqlite
+from telemetry_store import (STAGE_DDL, STORED_COLUMNS, STORED_FIELDS, delete_lap_telemetry,
+                             ensure_partition, get_session_key, keyed_frame, lap_keys,
+                             summarize_partition, with_samples)
+
+
+LAP_COLUMNS = [
+    'lap_id', 'session_id', 'driver_code', 'lap_number', 'lap_time_seconds',
+    'tire_compound', 'tire_life', 'is_personal_best',
+    'sector1_time', 'sector2_time', 'sector3_time', 'content_hash'
+]
+
+# Extracted frames key samples by lap_id; telemetry_store re-keys them for storage
+TELEMETRY_COLUMNS = ['lap_id'] + STORED_FIELDS
+
+
+def _seconds(series: pd.Series) -> pd.Series:
+    """Timedelta column -> float seconds (NaT -> NaN)"""
+    return series.dt.total_seconds()
+
+
+def _int_column(frame: pd.DataFrame, column: str, default: Optional[int] = None) -> pd.Series:
+    """Nullable integer column, rounded from FastF1 floats"""
+    if column not in frame:
+        return pd.Series(default, index=frame.index, dtype='Int64')
+    values = pd.to_numeric(frame[column], errors='coerce').round().astype('Int64')
+    return values.fillna(default) if default is not None else values
+
+
+def laps_to_frame(laps: pd.DataFrame, session_id: Optional[str]) -> pd.DataFrame:
+    """
+    Convert FastF1 `session.laps` to rows of the `laps` table
+
+    All conversions are column-wise; lap ids are generated client side so
+    telemetry can reference them without a round-trip.
+
+    Args:
+        laps: FastF1 Laps DataFrame
+        session_id: UUID of the parent session row (None to fill in later)
+
+    Returns:
+        DataFrame with LAP_COLUMNS plus the FastF1 columns needed to slice
+        telemetry (DriverNumber, LapStartTime, Time)
+    """
+    laps = laps[laps['LapNumber'].notna()]
+
+    frame = pd.DataFrame({
+        'lap_id': [str(uuid.uuid4()) for _ in range(len(laps))],
+        'session_id': session_id,
+        'driver_code': laps['Driver'].astype(str).values,
+        'lap_number': laps['LapNumber'].astype(int).values,
+        'lap_time_seconds': _seconds(laps['LapTime']).values,
+        'tire_compound': (laps['Compound'].values if 'Compound' in laps
+                          else None),
+        'tire_life': _int_column(laps, 'TyreLife', default=0).values,
+        'is_personal_best': (laps['IsPersonalBest'].fillna(False).astype(bool).values
+                             if 'IsPersonalBest' in laps else False),
+        'sector1_time': _seconds(laps['Sector1Time']).values,
+        'sector2_time': _seconds(laps['Sector2Time']).values,
+        'sector3_time': _seconds(laps['Sector3Time']).values,
+    })
+
+    frame['DriverNumber'] = laps['DriverNumber'].astype(str).values
+    frame['LapStartTime'] = laps['LapStartTime'].values
+    frame['Time'] = laps['Time'].values
+    return frame
+
+
+def assign_samples_to_laps(samples: pd.DataFrame, driver_laps: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tag each telemetry sample with the lap it belongs to
+
+    Args:
+        samples: Car/position samples for one driver with a `SessionTime` column
+        driver_laps: Rows from `laps_to_frame` for the same driver
+
+    Returns:
+        Samples inside a lap, with `lap_id` and per-lap `distance` (meters)
+    """
+    driver_laps = driver_laps.dropna(subset=['LapStartTime']).sort_values('LapStartTime')
+    if driver_laps.empty or samples.empty:
+        return samples.iloc[0:0].assign(lap_id=pd.Series(dtype=object), distance=pd.Series(dtype=float))
+
+    samples = samples.sort_values('SessionTime')
+    t = samples['SessionTime'].values
+    starts = driver_laps['LapStartTime'].values
+    ends = driver_laps['Time'].fillna(pd.Timedelta.max).values
+
+    idx = np.searchsorted(starts, t, side='right') - 1
+    inside = idx >= 0
+    inside[inside] &= t[inside] <= ends[idx[inside]]
+
+    samples = samples[inside]
+    lap_idx = idx[inside]
+
+    # Integrate speed over time per lap: distance restarts at 0 on every lap
+    dt = np.diff(samples['SessionTime'].values, prepend=samples['SessionTime'].values[:1])
+    dt = dt.astype('timedelta64[ns]').astype(np.float64) / 1e9
+    step = samples['Speed'].to_numpy(dtype=np.float64) / 3.6 * dt
+    step[np.r_[True, lap_idx[1:] != lap_idx[:-1]]] = 0.0
+    distance = pd.Series(step).groupby(lap_idx).cumsum().values
+
+    return samples.assign(
+        lap_id=driver_laps['lap_id'].values[lap_idx],
+        distance=distance,
+    )
+
+
+def telemetry_to_frame(session, laps_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build `telemetry` table rows for every lap of a loaded session
+
+    Car data and position data are joined on session time with
+    `merge_asof`, then sliced into laps by `assign_samples_to_laps`.
+
+    Returns:
+        DataFrame with TELEMETRY_COLUMNS (empty if telemetry was not loaded),
+        including each sample's precomputed `lod_tier`
+    """
+    try:
+        car_data = session.car_data
+        pos_data = session.pos_data
+    except Exception:
+        return pd.DataFrame(columns=TELEMETRY_COLUMNS)
+
+    frames = []
+    for driver_number, driver_laps in laps_frame.groupby('DriverNumber'):
+        if driver_number not in car_data:
+            continue
+        car = pd.DataFrame(car_data[driver_number]).sort_values('SessionTime')
+        if driver_number in pos_data:
+            pos = pd.DataFrame(pos_data[driver_number])[['SessionTime', 'X', 'Y']]
+            car = pd.merge_asof(car, pos.sort_values('SessionTime'),
+                                on='SessionTime', direction='nearest')
+        else:
+            car['X'] = np.nan
+            car['Y'] = np.nan
+
+        frames.append(assign_samples_to_laps(car, driver_laps))
+
+    if not frames:
+        return pd.DataFrame(columns=TELEMETRY_COLUMNS)
+
+    samples = pd.concat(frames, ignore_index=True)
+    telemetry = pd.DataFrame({
+        'lap_id': samples['lap_id'].values,
+        'distance': samples['distance'].values,
+        'speed': _int_column(samples, 'Speed').values,
+        'throttle': _int_column(samples, 'Throttle').values,
+        'brake': samples['Brake'].astype(bool).values,
+        'drs': _int_column(samples, 'DRS').values,
+        'gear': _int_column(samples, 'nGear').values,
+        'rpm': _int_column(samples, 'RPM').values,
+        'position_x': samples['X'].values,
+        'position_y': samples['Y'].values,
+    })
+    telemetry['lod_tier'] = assign_lod_tiers(telemetry)
+    return telemetry
+
+
+def copy_frame(cursor, table: str, frame: pd.DataFrame, columns: List[str],
+               chunk_rows: int = 250_000) -> int:
+    """
+    Stream a DataFrame into a table with COPY FROM STDIN (CSV)
+
+    Rows are serialized in chunks so memory stays bounded for
+    million-row telemetry loads. Floats keep millimetre/millisecond precision.
+
+    Returns:
+        Number of rows copied
+    """
+    if is_sqlite(cursor):
+        return insert_frame(cursor, table, frame, columns, chunk_rows)
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '')"
+    for start in range(0, len(frame), chunk_rows):
+        buf = io.StringIO()
+        frame[columns].iloc[start:start + chunk_rows].to_csv(
+            buf, header=False, index=False, na_rep='', float_format='%.3f'
+        )
+        buf.seek(0)
+        cursor.copy_expert(sql, buf)
+    return len(frame)
+
+
+def upsert_session(cursor, year: int, event_name: str, session_type: str,
+                   session_date: date) -> Tuple[str, Optional[str]]:
+    """
+    Get or create the session row for (year, event_name, session_type)
+
+    Returns:
+        (session_id, stored content_hash or None)
+    """
+    cursor.execute(
+        """
+        INSERT INTO sessions (year, event_name, session_type, date)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (year, event_name, session_type) DO NOTHING
+        RETURNING session_id, content_hash
+        """,
+        (year, event_name, session_type, session_date)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(
+            """
+            SELECT session_id, content_hash FROM sessions
+            WHERE year = %s AND event_name = %s AND session_type = %s
+            """,
+            (year, event_name, session_type)
+        )
+        row = cursor.fetchone()
+    return str(row[0]), row[1]
+
+
+def known_session_hashes(cursor) -> Dict[Tuple[int, str, str], str]:
+    """(year, event_name, session_type) -> content_hash for every ingested session"""
+    cursor.execute(
+        "SELECT year, event_name, session_type, content_hash FROM sessions "
+        "WHERE content_hash IS NOT NULL"
+    )
+    return {(r[0], r[1], r[2]): r[3] for r in cursor.fetchall()}
+
+
+def driver_rows(session) -> List[Tuple]:
+    """(driver_code, full_name, team, number) for every driver of a loaded session"""
+    results = session.results
+    return [
+        (str(code), str(name or code), str(team or 'Unknown'), int(number))
+        for code, name, team, number in zip(results['Abbreviation'], results['FullName'],
+                                            results['TeamName'], results['DriverNumber'])
+        if code
+    ]
+
+
+def upsert_drivers(cursor, rows: List[Tuple]) -> int:
+    """
+    Insert or refresh drivers in one statement
+
+    Returns:
+        Rows actually written (unchanged drivers are not rewritten)
+    """
+    if not rows:
+        return 0
+    execute_values(
+        cursor,
+        """
+        INSERT INTO drivers (driver_code, full_name, team, number) VALUES %s
+        ON CONFLICT (driver_code) DO UPDATE
+        SET full_name = EXCLUDED.full_name, team = EXCLUDED.team, number = EXCLUDED.number
+        WHERE (drivers.full_name, drivers.team, drivers.number)
+              IS DISTINCT FROM (EXCLUDED.full_name, EXCLUDED.team, EXCLUDED.number)
+        """,
+        rows,
+        page_size=len(rows)
+    )
+    return cursor.rowcount
+
+
+@dataclass
+class SessionFrames:
+    """Everything needed to write one session, ready for COPY (picklable)"""
+    year: int
+    event_name: str
+    session_type: str
+    session_date: date
+    drivers: List[Tuple]
+    laps: pd.DataFrame
+    telemetry: pd.DataFrame
+    driver_hashes: Dict[str, str] = field(default_factory=dict)
+    source_hash: str = ''
+
+
+def extract_session(session, year: int, event_name: str, session_type: str,
+                    session_date: date, include_telemetry: bool = True,
+                    source_hash: str = '') -> SessionFrames:
+    """
+    Convert a loaded FastF1 session into table-shaped frames
+
+    This is the CPU-bound half of ingestion and needs no database, so it
+    can run in a worker process. Every lap gets a `content_hash` covering
+    the lap and its telemetry; drivers get a hash over their laps.
+
+    Args:
+        source_hash: Fingerprint of the session's cache artifacts
+    """
+    laps_frame = laps_to_frame(session.laps, session_id=None)
+    telemetry_frame = (telemetry_to_frame(session, laps_frame) if include_telemetry
+                       else pd.DataFrame(columns=TELEMETRY_COLUMNS))
+    laps_frame['content_hash'] = lap_content_hashes(laps_frame, telemetry_frame)
+    return SessionFrames(
+        year=year,
+        event_name=event_name,
+        session_type=session_type,
+        session_date=session_date,
+        drivers=driver_rows(session),
+        laps=laps_frame,
+        telemetry=telemetry_frame,
+        driver_hashes=driver_content_hashes(laps_frame),
+        source_hash=source_hash,
+    )
+
+
+def _stored_driver_hashes(cursor, session_id: str) -> Dict[str, str]:
+    cursor.execute(
+        "SELECT driver_code, content_hash FROM driver_fingerprints WHERE session_id = %s",
+        (session_id,)
+    )
+    return {r[0]: r[1] for r in cursor.fetchall()}
+
+
+def _upsert_changed_laps(cursor, session_id: str, session_key: int, laps: pd.DataFrame,
+                         telemetry: pd.DataFrame) -> Tuple[int, int]:
+    """
+    Upsert laps whose content_hash changed and replace only their telemetry
+
+    Rows are COPYed into temp staging tables; the merge into `laps` and
+    `telemetry` happens server side so existing lap_ids and lap_keys are
+    preserved.
+
+    Returns:
+        (laps written, telemetry rows written)
+    """
+    cursor.execute(f"CREATE TEMP TABLE laps_stage ON COMMIT DROP AS "
+                   f"SELECT {', '.join(LAP_COLUMNS)} FROM laps WITH NO DATA")
+    cursor.execute(
+        "CREATE TEMP TABLE changed_laps (lap_id UUID, lap_key INTEGER, driver_code VARCHAR(3), "
+        "lap_number INTEGER) ON COMMIT DROP"
+    )
+    copy_frame(cursor, 'laps_stage', laps, LAP_COLUMNS)
+
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in LAP_COLUMNS[4:])
+    cursor.execute(f"""
+        WITH upserted AS (
+            INSERT INTO laps ({', '.join(LAP_COLUMNS)})
+            SELECT {', '.join(LAP_COLUMNS)} FROM laps_stage
+            ON CONFLICT (session_id, driver_code, lap_number) DO UPDATE SET {updates}
+            WHERE laps.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            RETURNING lap_id, lap_key, driver_code, lap_number
+        )
+        INSERT INTO changed_laps SELECT * FROM upserted
+    """)
+    laps_written = cursor.rowcount
+
+    # Laps that disappeared from the source for the drivers being rewritten
+    cursor.execute("""
+        CREATE TEMP TABLE removed_laps ON COMMIT DROP AS
+        SELECT l.lap_id, l.lap_key FROM laps l
+        WHERE l.session_id = %s
+          AND l.driver_code IN (SELECT DISTINCT driver_code FROM laps_stage)
+          AND NOT EXISTS (SELECT 1 FROM laps_stage s
+                          WHERE s.driver_code = l.driver_code AND s.lap_number = l.lap_number)
+    """, (session_id,))
+    cursor.execute("""
+        DELETE FROM telemetry WHERE session_key = %s
+          AND lap_key IN (SELECT lap_key FROM removed_laps UNION ALL SELECT lap_key FROM changed_laps)
+    """, (session_key,))
+    cursor.execute("DELETE FROM laps WHERE lap_id IN (SELECT lap_id FROM removed_laps)")
+
+    if laps_written == 0 or not len(telemetry):
+        return laps_written, 0
+
+    cursor.execute(STAGE_DDL)
+    copy_frame(cursor, 'telemetry_stage', with_samples(telemetry), ['lap_id', 'sample'] + STORED_FIELDS)
+    # Re-key staged samples onto the lap_keys that actually live in `laps`
+    cursor.execute(f"""
+        INSERT INTO {ensure_partition(cursor, session_key)} ({', '.join(STORED_COLUMNS)})
+        SELECT %s, c.lap_key, t.sample, {', '.join('t.' + c for c in STORED_FIELDS)}
+        FROM telemetry_stage t
+        JOIN laps_stage s ON s.lap_id = t.lap_id
+        JOIN changed_laps c ON c.driver_code = s.driver_code AND c.lap_number = s.lap_number
+        ORDER BY c.lap_key, t.sample
+    """, (session_key,))
+    return laps_written, cursor.rowcount
+
+
+def _upsert_changed_laps_sqlite(cursor, session_id: str, session_key: int, laps: pd.DataFrame,
+                                telemetry: pd.DataFrame) -> Tuple[int, int]:
+    """
+    `_upsert_changed_laps` for the embedded backend (no COPY or temp tables)
+
+    The merge runs in pandas against the stored lap hashes of the drivers
+    being rewritten; changed laps are replaced under their stored lap_id
+    and lap_key.
+    """
+    drivers = laps['driver_code'].unique().tolist()
+    cursor.execute(
+        "SELECT lap_id, lap_key, driver_code, lap_number, content_hash FROM laps "
+        "WHERE session_id = %s AND driver_code = ANY(%s)",
+        (session_id, drivers)
+    )
+    stored = pd.DataFrame(cursor.fetchall(), columns=['stored_lap_id', 'lap_key', 'driver_code',
+                                                      'lap_number', 'stored_hash'])
+    merged = laps.merge(stored, on=['driver_code', 'lap_number'], how='outer', indicator=True)
+    removed = merged[merged['_merge'] == 'right_only']
+    changed = merged[(merged['_merge'] != 'right_only')
+                     & (merged['stored_hash'] != merged['content_hash'])]
+
+    stale = pd.concat([removed['lap_key'], changed['lap_key'].dropna()]).astype(np.int64).tolist()
+    delete_lap_telemetry(cursor, session_key, stale)
+    cursor.execute("DELETE FROM laps WHERE lap_key = ANY(%s)", (stale,))
+    if not len(changed):
+        return 0, 0
+
+    # Keep stored lap_ids and lap_keys so links to existing laps stay valid
+    lap_ids = changed['stored_lap_id'].fillna(changed['lap_id'])
+    new_laps = changed[LAP_COLUMNS + ['lap_key']].assign(lap_id=lap_ids.to_numpy())
+    insert_frame(cursor, 'laps', new_laps, LAP_COLUMNS + ['lap_key'])
+
+    keys = lap_keys(cursor, session_id, drivers)
+    frame_keys = {lap_id: keys[stored_id] for lap_id, stored_id in zip(changed['lap_id'], lap_ids)}
+    written = insert_frame(cursor, 'telemetry', keyed_frame(telemetry, session_key, frame_keys),
+                           STORED_COLUMNS)
+    return len(new_laps), written
+
+
+def write_session(cursor, frames: SessionFrames) -> Dict:
+    """
+    Idempotently write extracted session frames to the database
+
+    - Session unchanged (same cache fingerprint): nothing is written
+    - Driver unchanged (same driver fingerprint): their laps are skipped
+    - Otherwise only laps whose content hash changed are upserted, and
+      only those laps get their telemetry replaced
+    - Session summaries are refreshed and memoized degradation results
+      dropped for the changed drivers
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction
+        frames: Output of `extract_session`
+
+    Returns:
+        session_id and rows written per table
+    """
+    session_id, stored_hash = upsert_session(cursor, frames.year, frames.event_name,
+                                             frames.session_type, frames.session_date)
+    result = {'session_id': session_id, 'drivers': 0, 'laps': 0, 'telemetry': 0,
+              'unchanged': False}
+    if frames.source_hash and frames.source_hash == stored_hash:
+        result['unchanged'] = True
+        return result
+
+    result['drivers'] = upsert_drivers(cursor, frames.drivers)
+
+    stored = _stored_driver_hashes(cursor, session_id)
+    changed = [d for d, h in frames.driver_hashes.items() if stored.get(d) != h]
+
+    if changed:
+        laps = frames.laps[frames.laps['driver_code'].isin(changed)].copy()
+        laps['session_id'] = session_id
+        telemetry = frames.telemetry[frames.telemetry['lap_id'].isin(laps['lap_id'])]
+
+        session_key = get_session_key(cursor, session_id)
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM laps WHERE session_id = %s)", (session_id,))
+        if cursor.fetchone()[0]:
+            upsert = _upsert_changed_laps_sqlite if is_sqlite(cursor) else _upsert_changed_laps
+            result['laps'], result['telemetry'] = upsert(cursor, session_id, session_key,
+                                                         laps, telemetry)
+        else:
+            # First load of this session: nothing to merge, COPY straight in
+            result['laps'] = copy_frame(cursor, 'laps', laps, LAP_COLUMNS)
+            if len(telemetry):
+                rows = keyed_frame(telemetry, session_key, lap_keys(cursor, session_id))
+                result['telemetry'] = copy_frame(cursor, ensure_partition(cursor, session_key),
+                                                 rows, STORED_COLUMNS)
+        if result['telemetry']:
+            summarize_partition(cursor, session_key)
+        refresh_session_summary(cursor, session_id, changed)
+        prune_results(cursor, session_id, changed)
+        execute_values(
+            cursor,
+            """
+            INSERT INTO driver_fingerprints (session_id, driver_code, content_hash) VALUES %s
+            ON CONFLICT (session_id, driver_code) DO UPDATE
+            SET content_hash = EXCLUDED.content_hash, updated_at = CURRENT_TIMESTAMP
+            """,
+            [(session_id, d, frames.driver_hashes[d]) for d in changed]
+        )
+
+    if frames.source_hash and frames.source_hash != stored_hash:
+        cursor.execute("UPDATE sessions SET content_hash = %s WHERE session_id = %s",
+                       (frames.source_hash, session_id))
+
+    result['unchanged'] = not changed and result['drivers'] == 0
+    return result
+
+
+def load_session(cursor, session, year: int, event_name: str, session_type: str,
+                 session_date: date, include_telemetry: bool = True) -> Dict:
+    """
+    Load one FastF1 session (laps + telemetry) into the database
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction
+        session: Loaded FastF1 session
+
+    Returns:
+        session_id and rows written per table
+    """
+    frames = extract_session(session, year, event_name, session_type,
+                             session_date, include_telemetry)
+    return write_session(cursor, frames)
@@ -0,0 +1,221 @@
+"""
+Columnar binary encoding for telemetry and lap payloads
+Packs each column into a little-endian typed array so the dashboard can
+map it straight into Float32Array/Int16Array/... without parsing JSON.
+
+Wire format (application/vnd.f1.columnar, version 1):
+
+    bytes 0-3   magic b'F1C1'
+    bytes 4-7   uint32 LE length of the JSON header
+    header      UTF-8 JSON: {"rows": n, "columns": [
+                    {"name", "type", "offset", "byteLength",
+                     "validityOffset"?,          # uint8 per row, 0 = null
+                     "dictionary"?, "indexType"? # for type "dict"
+                    }, ...]}
+    padding     to an 8-byte boundary
+    buffers     one per column (plus validity), each 8-byte aligned;
+                offsets are from the start of the payload
+
+Types: f64 f32 i32 i16 u16 u8 bool(u8) uuid(16 bytes/row) dict(string
+dictionary + u16/u32 indices). Float nulls are NaN, others use validity.
+Arrow IPC (application/vnd.apache.arrow.stream) is offered too when the
+optional `pyarrow` package is installed.
+"""
+
+import json
+import struct
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import Response, request
+
+from instrumentation import span
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional dependency: Arrow IPC is only offered when installed
+    pa = None
+
+
+JSON_MIMETYPE = 'application/json'
+COLUMNAR_MIMETYPE = 'application/vnd.f1.columnar'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+MAGIC = b'F1C1'
+
+# (column, type) in payload order. Storage keys and lod_tier are
+# bookkeeping the charts never use, so the binary payloads leave them out.
+TELEMETRY_SCHEMA: List[Tuple[str, str]] = [
+    ('distance', 'f32'),
+    ('speed', 'i16'),
+    ('throttle', 'i16'),
+    ('brake', 'bool'),
+    ('drs', 'u8'),
+    ('gear', 'u8'),
+    ('rpm', 'u16'),
+    ('position_x', 'f32'),
+    ('position_y', 'f32'),
+]
+
+LAP_SCHEMA: List[Tuple[str, str]] = [
+    ('lap_id', 'uuid'),
+    ('session_id', 'uuid'),
+    ('driver_code', 'dict'),
+    ('lap_number', 'i16'),
+    ('lap_time_seconds', 'f64'),
+    ('tire_compound', 'dict'),
+    ('tire_life', 'i16'),
+    ('is_personal_best', 'bool'),
+    ('sector1_time', 'f64'),
+    ('sector2_time', 'f64'),
+    ('sector3_time', 'f64'),
+]
+
+_NUMPY_TYPES = {
+    'f64': '<f8', 'f32': '<f4', 'i32': '<i4', 'i16': '<i2',
+    'u16': '<u2', 'u8': 'u1', 'bool': 'u1',
+}
+
+_ARROW_TYPES = {
+    'f64': 'float64', 'f32': 'float32', 'i32': 'int32', 'i16': 'int16',
+    'u16': 'uint16', 'u8': 'uint8', 'bool': 'bool_',
+}
+
+
+def schema_columns(schema: Sequence[Tuple[str, str]]) -> str:
+    """Comma-separated column list for a SELECT matching `schema`"""
+    return ', '.join(name for name, _ in schema)
+
+
+def negotiate_format() -> str:
+    """
+    Pick 'json', 'columnar' or 'arrow' from ?format= or the Accept header
+
+    JSON stays the default so existing clients are unaffected.
+    """
+    fmt = request.args.get('format')
+    if fmt in ('json', 'columnar', 'arrow'):
+        return fmt
+    offered = [JSON_MIMETYPE, COLUMNAR_MIMETYPE] + ([ARROW_MIMETYPE] if pa else [])
+    best = request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    return {COLUMNAR_MIMETYPE: 'columnar', ARROW_MIMETYPE: 'arrow'}.get(best, 'json')
+
+
+def _column_values(values: list, col_type: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Python values -> (typed array, validity mask or None)"""
+    if col_type == 'uuid':
+        valid = np.array([v is not None for v in values], dtype=bool)
+        data = b''.join((v if isinstance(v, uuid.UUID) else uuid.UUID(str(v))).bytes
+                        if v is not None else bytes(16) for v in values)
+        return np.frombuffer(data, dtype=np.uint8), (None if valid.all() else valid)
+
+    # float() of None is NaN, which doubles as the null marker
+    floats = np.array(values, dtype=np.float64)
+    if col_type in ('f64', 'f32'):
+        return floats.astype(_NUMPY_TYPES[col_type]), None
+    valid = ~np.isnan(floats)
+    data = np.where(valid, floats, 0).astype(_NUMPY_TYPES[col_type])
+    return data, (None if valid.all() else valid)
+
+
+def _dictionary_encode(values: list) -> Tuple[np.ndarray, List[Optional[str]], str]:
+    dictionary: Dict[Optional[str], int] = {}
+    indices = [dictionary.setdefault(v, len(dictionary)) for v in values]
+    index_type = 'u16' if len(dictionary) < 2 ** 16 else 'u32'
+    return (np.array(indices, dtype='<u2' if index_type == 'u16' else '<u4'),
+            list(dictionary), index_type)
+
+
+def encode_columnar(rows: Sequence, schema: Sequence[Tuple[str, str]]) -> bytes:
+    """
+    Encode DB rows (mapping or sequence in `schema` order) into the
+    F1C1 binary format described in the module docstring
+    """
+    named = bool(rows) and hasattr(rows[0], 'keys')
+    header_columns = []
+    buffers: List[bytes] = []
+    offset = 0  # relative to the start of the buffer region for now
+
+    def add_buffer(data: bytes) -> int:
+        nonlocal offset
+        start = offset
+        pad = (-len(data)) % 8
+        buffers.append(data + b'\0' * pad)
+        offset += len(data) + pad
+        return start
+
+    for i, (name, col_type) in enumerate(schema):
+        values = [r[name] if named else r[i] for r in rows]
+        meta = {'name': name, 'type': col_type}
+        if col_type == 'dict':
+            data, dictionary, index_type = _dictionary_encode(values)
+            meta.update(dictionary=dictionary, indexType=index_type)
+            valid = None
+        else:
+            data, valid = _column_values(values, col_type)
+        raw = data.tobytes()
+        meta['offset'] = add_buffer(raw)
+        meta['byteLength'] = len(raw)
+        if valid is not None:
+            meta['validityOffset'] = add_buffer(valid.astype(np.uint8).tobytes())
+        header_columns.append(meta)
+
+    def render_header(base: int) -> bytes:
+        cols = [dict(c, offset=c['offset'] + base,
+                     **({'validityOffset': c['validityOffset'] + base}
+                        if 'validityOffset' in c else {}))
+                for c in header_columns]
+        return json.dumps({'version': 1, 'rows': len(rows), 'columns': cols},
+                          separators=(',', ':')).encode()
+
+    # Buffer offsets depend on the header length, which depends on the offsets'
+    # digits; iterate until the padded header size is stable (1-2 passes)
+    base = 0
+    while True:
+        header = render_header(base)
+        new_base = 8 + len(header) + (-(8 + len(header)) % 8)
+        if new_base == base:
+            break
+        base = new_base
+
+    prefix = MAGIC + struct.pack('<I', len(header)) + header
+    return prefix + b'\0' * (base - len(prefix)) + b''.join(buffers)
+
+
+def encode_arrow(rows: Sequence, schema: Sequence[Tuple[str, str]]) -> bytes:
+    """Encode rows as an Arrow IPC stream (requires pyarrow)"""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    named = bool(rows) and hasattr(rows[0], 'keys')
+    arrays, names = [], []
+    for i, (name, col_type) in enumerate(schema):
+        values = [r[name] if named else r[i] for r in rows]
+        if col_type == 'uuid':
+            arrays.append(pa.array([str(v) if v is not None else None for v in values],
+                                   type=pa.string()))
+        elif col_type == 'dict':
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=getattr(pa, _ARROW_TYPES[col_type])()))
+        names.append(name)
+
+    table = pa.Table.from_arrays(arrays, names=names)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def binary_response(rows: Sequence, schema: Sequence[Tuple[str, str]], fmt: str) -> Response:
+    """Build a columnar or Arrow response for a negotiated `fmt`"""
+    if fmt == 'arrow':
+        if pa is None:
+            return Response(json.dumps({'error': 'Arrow output requires pyarrow'}),
+                            status=406, mimetype=JSON_MIMETYPE)
+        with span('serialize'):
+            body = encode_arrow(rows, schema)
+        return Response(body, mimetype=ARROW_MIMETYPE, headers={'Vary': 'Accept'})
+    with span('serialize'):
+        body = encode_columnar(rows, schema)
+    return Response(body, mimetype=COLUMNAR_MIMETYPE, headers={'Vary': 'Accept'})
@@ -0,0 +1,316 @@
+"""
+Shared PostgreSQL connection pool
+Process-wide pooled connections for the Flask API and ingest scripts
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, Optional
+
+import psycopg2
+from psycopg2.extras import DictCursor
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+@dataclass
+class PooledDatabase:
+    """Connection borrowed from the pool, exposing the same `cursor` attribute
+    the routes used with F1DatabaseManager"""
+    conn: 'psycopg2.extensions.connection'
+    cursor: DictCursor
+
+
+class F1ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool
+
+    - Keeps between `min_size` and `max_size` open connections
+    - Health-checks connections that sat idle longer than `health_check_after`
+    - Reaps idle connections above `min_size` after `idle_timeout` seconds
+    - Tracks how long callers waited for a connection
+    """
+
+    def __init__(self,
+                 db_config: Dict,
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 idle_timeout: float = 300.0,
+                 health_check_after: float = 30.0,
+                 acquire_timeout: float = 10.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool sizes: min={min_size}, max={max_size}")
+
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Deque = deque()  # (conn, last_used) pairs, most recent on the right
+        self._size = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+        self._metrics = {
+            'acquired': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'closed': 0,
+            'reaped': 0,
+            'health_check_failures': 0,
+            'errors_returned': 0,
+            'inherited_dropped': 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        """Open a new connection and count it against the pool size"""
+        conn = psycopg2.connect(**self.db_config)
+        self._size += 1
+        self._metrics['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Close a connection and release its pool slot"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._size -= 1
+        self._metrics['closed'] += 1
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        """Cheap liveness check; only pings connections that sat idle a while"""
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _reap_idle(self):
+        """Close connections idle past `idle_timeout`, keeping `min_size` open"""
+        now = time.monotonic()
+        # Oldest connections sit on the left of the deque
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._discard(conn)
+            self._metrics['reaped'] += 1
+
+    def _check_fork(self):
+        """
+        Drop connections inherited from a parent process (e.g. gunicorn fork)
+
+        They are forgotten, not closed: the socket is shared with the parent,
+        and closing it here would terminate the parent's session.
+        """
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._metrics['inherited_dropped'] += self._size
+            self._idle.clear()
+            self._size = 0
+
+    def acquire(self):
+        """
+        Borrow a connection, waiting up to `acquire_timeout` seconds
+
+        Returns:
+            An open psycopg2 connection
+        """
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+
+        with self._cond:
+            self._check_fork()
+        while True:
+            with self._cond:
+                while True:
+                    self._reap_idle()
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reserve the slot, then connect without holding the lock
+                        self._size += 1
+                        conn = None
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.acquire_timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+            if conn is None:
+                break
+
+            # Health check outside the lock; the popped connection keeps its slot
+            if self._is_healthy(conn, time.monotonic() - last_used):
+                with self._cond:
+                    self._record_acquire(start, waited)
+                return conn
+            with self._cond:
+                self._metrics['health_check_failures'] += 1
+                self._discard(conn)
+                self._cond.notify()
+
+        try:
+            conn = psycopg2.connect(**self.db_config)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._metrics['created'] += 1
+            self._record_acquire(start, waited)
+        return conn
+
+    def _record_acquire(self, start: float, waited: bool):
+        wait = time.monotonic() - start
+        self._metrics['acquired'] += 1
+        self._metrics['wait_seconds_total'] += wait
+        self._metrics['wait_seconds_max'] = max(self._metrics['wait_seconds_max'], wait)
+        if waited:
+            self._metrics['waits'] += 1
+
+    def release(self, conn, broken: bool = False):
+        """
+        Return a connection to the pool
+
+        Args:
+            conn: Connection obtained from `acquire`
+            broken: Close the connection instead of reusing it
+        """
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+            if not broken and not conn.closed:
+                try:
+                    # Never hand out a connection with an open transaction
+                    conn.rollback()
+                except Exception:
+                    broken = True
+
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._reap_idle()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledDatabase]:
+        """
+        Borrow a connection for the duration of a `with` block
+
+        Commits on success, rolls back on error and always returns the
+        connection to the pool, even when the query raises.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            cursor = conn.cursor(cursor_factory=DictCursor)
+            try:
+                yield PooledDatabase(conn=conn, cursor=cursor)
+                conn.commit()
+            finally:
+                cursor.close()
+        except Exception as e:
+            with self._cond:
+                self._metrics['errors_returned'] += 1
+            broken = bool(conn.closed) or isinstance(
+                e, (psycopg2.OperationalError, psycopg2.InterfaceError)
+            )
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def stats(self) -> Dict:
+        """Snapshot of pool size and wait metrics"""
+        with self._cond:
+            acquired = self._metrics['acquired']
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self._metrics,
+                'wait_seconds_avg': (self._metrics['wait_seconds_total'] / acquired
+                                     if acquired else 0.0),
+            }
+
+    def close(self):
+        """Close every idle connection; in-use connections close on release"""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._discard(conn)
+            self.min_size = 0
+
+
+# Process-wide pool shared by every route
+
+_pool: Optional[F1ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(db_config: Dict) -> F1ConnectionPool:
+    """
+    Get (or lazily create) the process-wide connection pool
+
+    Pool sizing comes from DB_POOL_MIN, DB_POOL_MAX, DB_POOL_IDLE_TIMEOUT,
+    DB_POOL_HEALTH_CHECK_AFTER and DB_POOL_ACQUIRE_TIMEOUT.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = F1ConnectionPool(
+                    db_config,
+                    min_size=int(os.getenv('DB_POOL_MIN', 1)),
+                    max_size=int(os.getenv('DB_POOL_MAX', 10)),
+                    idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                    health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30)),
+                    acquire_timeout=float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10)),
+                )
+    return _pool
+
+
+def pool_stats() -> Optional[Dict]:
+    """Metrics for the process-wide pool, or None if it was never created"""
+    return _pool.stats() if _pool is not None else None
+
+
+def close_pool():
+    """Close the process-wide pool (used by scripts and tests)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,213 @@
+"""
+Persisted tire degradation results
+Memoizes `analyze_tire_degradation` per session/driver/stint in the
+`tire_degradation_results` table, keyed by a hash of the fit inputs, so
+repeat requests skip SciPy entirely.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from instrumentation import span
+from storage import execute_values
+from tire_analysis import Stints, TireDegradation, analyze_stints, analyze_tire_degradation
+
+
+# Bump when the fitting code changes so stored results are recomputed
+MODEL_VERSION = 1
+
+# stint_number used for whole-race fits (all of a driver's laps as one stint,
+# as /api/pit-strategy does); real stints are numbered from 1
+WHOLE_RACE_STINT = 0
+
+RESULT_FIELDS = ['compound', 'degradation_rate', 'optimal_stint_length', 'cliff_lap',
+                 'performance_loss_percent', 'strategy_recommendation']
+
+
+def stint_input_hash(lap_times: Sequence[float], compound: str, method: str) -> str:
+    """Fingerprint of everything a stint's degradation result depends on"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{MODEL_VERSION}|{method}|{compound}|".encode())
+    digest.update(np.asarray(lap_times, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class DegradationMetrics:
+    """
+    Hit/miss counts and latencies of memoized lookups
+
+    A lookup is "warm" when every stint came from the table and "cold" when
+    at least one stint had to be fitted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {'stints_hit': 0, 'stints_computed': 0}
+        for kind in ('warm', 'cold'):
+            self._data.update({f'{kind}_lookups': 0, f'{kind}_seconds_total': 0.0,
+                               f'{kind}_seconds_max': 0.0})
+
+    def record(self, hits: int, computed: int, seconds: float):
+        kind = 'cold' if computed else 'warm'
+        with self._lock:
+            self._data['stints_hit'] += hits
+            self._data['stints_computed'] += computed
+            self._data[f'{kind}_lookups'] += 1
+            self._data[f'{kind}_seconds_total'] += seconds
+            self._data[f'{kind}_seconds_max'] = max(self._data[f'{kind}_seconds_max'], seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            data = dict(self._data)
+        for kind in ('warm', 'cold'):
+            lookups = data[f'{kind}_lookups']
+            data[f'{kind}_seconds_avg'] = data[f'{kind}_seconds_total'] / lookups if lookups else 0.0
+        total = data['stints_hit'] + data['stints_computed']
+        data['hit_ratio'] = data['stints_hit'] / total if total else 0.0
+        return data
+
+
+metrics = DegradationMetrics()
+
+
+def _load_results(cursor, session_id: str, method: str,
+                  driver_code: Optional[str] = None) -> Dict[Tuple[str, int], Tuple[str, TireDegradation]]:
+    """(driver_code, stint_number) -> (input_hash, stored result)"""
+    query = f"""
+        SELECT driver_code, stint_number, input_hash, {', '.join(RESULT_FIELDS)}
+        FROM tire_degradation_results
+        WHERE session_id = %s AND method = %s
+    """
+    params = [session_id, method]
+    if driver_code:
+        query += " AND driver_code = %s"
+        params.append(driver_code)
+    cursor.execute(query, params)
+    return {
+        (r[0], r[1]): (r[2], TireDegradation(*r[3:]))
+        for r in cursor.fetchall()
+    }
+
+
+def _save_results(cursor, session_id: str, method: str, rows: List[Tuple]):
+    """Upsert (driver_code, stint_number, start_lap, end_lap, input_hash, TireDegradation) rows"""
+    execute_values(
+        cursor,
+        f"""
+        INSERT INTO tire_degradation_results
+            (session_id, driver_code, stint_number, method, start_lap, end_lap, input_hash,
+             {', '.join(RESULT_FIELDS)})
+        VALUES %s
+        ON CONFLICT (session_id, driver_code, stint_number, method) DO UPDATE SET
+            start_lap = EXCLUDED.start_lap,
+            end_lap = EXCLUDED.end_lap,
+            input_hash = EXCLUDED.input_hash,
+            {', '.join(f'{f} = EXCLUDED.{f}' for f in RESULT_FIELDS)},
+            computed_at = CURRENT_TIMESTAMP
+        """,
+        [
+            (session_id, driver, number, method, start, end, input_hash,
+             result.compound, float(result.degradation_rate), int(result.optimal_stint_length),
+             result.cliff_lap, float(result.performance_loss_percent),
+             result.strategy_recommendation)
+            for driver, number, start, end, input_hash, result in rows
+        ]
+    )
+
+
+def prune_results(cursor, session_id: str, drivers: Optional[Sequence[str]] = None) -> int:
+    """
+    Delete stored results of drivers whose laps changed (all if None)
+
+    Called on ingest: stint numbering can shift after a re-ingest, so stale
+    rows would otherwise linger for stints that no longer exist. Results
+    are refitted on the next request.
+
+    Returns:
+        Rows deleted
+    """
+    if drivers is None:
+        cursor.execute("DELETE FROM tire_degradation_results WHERE session_id = %s", (session_id,))
+    else:
+        cursor.execute("DELETE FROM tire_degradation_results "
+                       "WHERE session_id = %s AND driver_code = ANY(%s)",
+                       (session_id, list(drivers)))
+    return cursor.rowcount
+
+
+def analyze_stints_memoized(cursor, session_id: str, stints: Stints,
+                            method: str = 'scipy',
+                            driver_code: Optional[str] = None) -> List[TireDegradation]:
+    """
+    `analyze_stints` backed by `tire_degradation_results`
+
+    Stored results are reused when their input hash matches the current lap
+    times; only the remaining stints are fitted (through the worker pool)
+    and written back.
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction
+        stints: Output of `segment_stints` for the session (or one driver)
+        driver_code: Restrict the stored-result lookup to one driver
+
+    Returns:
+        One TireDegradation per stint, in `stints` order
+    """
+    started = time.perf_counter()
+    numbers = stints.stint_numbers()
+    hashes = [stint_input_hash(stints.stint_lap_times(i), stints.compounds[i], method)
+              for i in range(len(stints))]
+    stored = _load_results(cursor, session_id, method, driver_code)
+
+    results: List[Optional[TireDegradation]] = [None] * len(stints)
+    missing = []
+    for i, key in enumerate(zip(stints.driver_codes, numbers)):
+        entry = stored.get(key)
+        if entry is not None and entry[0] == hashes[i]:
+            results[i] = entry[1]
+        else:
+            missing.append(i)
+
+    if missing:
+        with span('compute.fit'):
+            fitted = analyze_stints(stints.subset(missing), method=method)
+        for i, result in zip(missing, fitted):
+            results[i] = result
+        _save_results(cursor, session_id, method, [
+            (stints.driver_codes[i], numbers[i], stints.start_laps[i], stints.end_laps[i],
+             hashes[i], results[i])
+            for i in missing
+        ])
+
+    metrics.record(len(stints) - len(missing), len(missing), time.perf_counter() - started)
+    return results
+
+
+def analyze_whole_race_memoized(cursor, session_id: str, driver_code: str,
+                                lap_times: List[float], compound: str = "MEDIUM") -> TireDegradation:
+    """Memoized single fit over all of a driver's laps (stored as WHOLE_RACE_STINT)"""
+    started = time.perf_counter()
+    method = 'scipy'
+    input_hash = stint_input_hash(lap_times, compound, method)
+    cursor.execute(
+        f"""
+        SELECT input_hash, {', '.join(RESULT_FIELDS)} FROM tire_degradation_results
+        WHERE session_id = %s AND driver_code = %s AND stint_number = %s AND method = %s
+        """,
+        (session_id, driver_code, WHOLE_RACE_STINT, method)
+    )
+    row = cursor.fetchone()
+    if row is not None and row[0] == input_hash:
+        metrics.record(1, 0, time.perf_counter() - started)
+        return TireDegradation(*row[1:])
+
+    with span('compute.fit'):
+        result = analyze_tire_degradation(lap_times, compound)
+    _save_results(cursor, session_id, method,
+                  [(driver_code, WHOLE_RACE_STINT, None, None, input_hash, result)])
+    metrics.record(0, 1, time.perf_counter() - started)
+    return result
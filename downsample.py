@@ -0,0 +1,288 @@
+"""
+Level-of-detail downsampling for telemetry traces
+Shape-preserving sample selection (LTTB for continuous channels, change
+points for step channels) and the nested LOD tiers stored at ingest.
+
+Every tier is a subset of the raw samples, and tiers are nested: a sample
+kept at 250 points is also kept at 500, 1000 and 2000. That lets one
+SMALLINT per sample (`telemetry.lod_tier`) encode all tiers, so serving
+a tier is just `WHERE session_key = %s AND lap_key = %s AND lod_tier <= %s`
+(`telemetry_store.lap_telemetry_query(..., lod=True)`).
+"""
+
+import argparse
+import io
+import math
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Target points per tier, coarsest first. Samples in no tier get
+# lod_tier = len(LOD_TIERS) (only served at full resolution).
+LOD_TIERS = (250, 500, 1000, 2000)
+FULL_RESOLUTION = len(LOD_TIERS)
+
+CONTINUOUS_CHANNELS = ('speed', 'throttle', 'rpm')
+STEP_CHANNELS = ('gear', 'brake', 'drs')
+
+# Buckets up to this size are scored in pure Python (see lttb_indices)
+SMALL_BUCKET = 8
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets sample selection
+
+    Keeps the first and last samples and, per bucket, the sample forming
+    the largest triangle with the previously kept sample and the average
+    of the next bucket. Preserves peaks/troughs that plain decimation loses.
+    A 2-D `y` selects for several channels at once by summing their
+    triangle areas (scale the channels to comparable ranges first).
+
+    Args:
+        x: Monotonic x values (distance)
+        y: Channel values, shape (n,) or (n, channels), NaN-free
+        n_out: Number of samples to keep
+
+    Returns:
+        Sorted indices into x/y
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    y = y.reshape(n, -1)
+
+    # Bucket edges over the interior samples 1..n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average point of each bucket, plus the last sample as the final "next bucket"
+    counts = (ends - starts)[:, None]
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], starts - 1) / counts[:, 0], x[-1])
+    avg_y = np.vstack([np.add.reduceat(y[1:n - 1], starts - 1, axis=0) / counts, y[-1]])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    # Plain Python floats for the many 1-2 sample buckets of short laps,
+    # where numpy call overhead would dominate
+    x_list, y_list = x.tolist(), y.tolist()
+    avg_x_list, avg_y_list = avg_x.tolist(), avg_y.tolist()
+    best = 0
+    for b, (lo, hi) in enumerate(zip(starts.tolist(), ends.tolist())):
+        ax, ay = x_list[best], y_list[best]
+        cx, cy = avg_x_list[b + 1], avg_y_list[b + 1]
+        if hi - lo == 1:
+            best = lo
+        elif hi - lo <= SMALL_BUCKET:
+            # Twice the triangle area per channel, summed over channels
+            areas = [sum(abs((ax - cx) * (yp - ay_c) - (ax - x_list[p]) * (cy_c - ay_c))
+                         for yp, ay_c, cy_c in zip(y_list[p], ay, cy))
+                     for p in range(lo, hi)]
+            best = lo + areas.index(max(areas))
+        else:
+            area = np.abs((ax - cx) * (y[lo:hi] - ay)
+                          - (ax - x[lo:hi, None]) * (avg_y[b + 1] - ay)).sum(axis=1)
+            best = lo + int(area.argmax())
+        selected[b + 1] = best
+    return selected
+
+
+def change_point_indices(values: np.ndarray) -> np.ndarray:
+    """
+    Indices on both sides of every value change in a step channel
+
+    Keeping the last sample before and the first sample after each change
+    means a step-rendered chart of the subset matches the raw trace exactly.
+    """
+    changed = np.flatnonzero(values[1:] != values[:-1])
+    return np.unique(np.concatenate([changed, changed + 1]))
+
+
+def downsample_indices(frame: pd.DataFrame, n_out: int) -> np.ndarray:
+    """
+    Shape-preserving subset of one lap's samples
+
+    Gear/brake/DRS change points are always kept; the rest of the budget
+    goes to one LTTB pass over speed, throttle and RPM (each scaled to its
+    own range). The result can exceed `n_out` when a lap has more change
+    points than the budget allows.
+
+    Args:
+        frame: One lap's telemetry, sorted by distance
+        n_out: Target number of samples
+
+    Returns:
+        Sorted, unique row positions into `frame`
+    """
+    n = len(frame)
+    if n <= n_out:
+        return np.arange(n)
+
+    keep = [np.array([0, n - 1])]
+    for channel in STEP_CHANNELS:
+        if channel in frame:
+            values = frame[channel].to_numpy(dtype=np.float64)
+            keep.append(change_point_indices(np.nan_to_num(values, nan=-1.0)))
+    steps = np.unique(np.concatenate(keep))
+
+    channels = [c for c in CONTINUOUS_CHANNELS if c in frame]
+    if channels:
+        y = frame[channels].to_numpy(dtype=np.float64)
+        lo, hi = np.nanmin(y, axis=0), np.nanmax(y, axis=0)
+        y = np.nan_to_num((y - lo) / np.where(hi > lo, hi - lo, 1.0), nan=0.0)
+        x = frame['distance'].to_numpy(dtype=np.float64)
+        keep.append(lttb_indices(x, y, max(n_out - len(steps), 3)))
+    return np.unique(np.concatenate(keep))
+
+
+def lap_lod_tiers(frame: pd.DataFrame, tiers: Sequence[int] = LOD_TIERS) -> np.ndarray:
+    """
+    `lod_tier` value for each sample of one lap (sorted by distance)
+
+    Tiers are built coarsest first. Each finer tier keeps every sample of
+    the coarser ones and tops up with a downsample of the remaining budget
+    (retried a few times, since the two selections overlap), so tiers are
+    nested and close to their target size. A sample's value is the index
+    of the coarsest tier containing it.
+    """
+    levels = np.full(len(frame), len(tiers), dtype=np.int16)
+    kept = np.array([], dtype=np.int64)
+    for level, target in enumerate(tiers):
+        if target >= len(frame):
+            levels[levels > level] = level
+            break
+        budget = target - len(kept)
+        for _ in range(4):
+            merged = np.union1d(kept, downsample_indices(frame, budget))
+            if len(merged) >= target:
+                break
+            budget += target - len(merged)
+        levels[np.setdiff1d(merged, kept)] = level
+        kept = merged
+    return levels
+
+
+def assign_lod_tiers(telemetry: pd.DataFrame) -> pd.Series:
+    """
+    `lod_tier` for every row of a multi-lap telemetry frame
+
+    Returns:
+        Series aligned with `telemetry.index`
+    """
+    tiers = pd.Series(FULL_RESOLUTION, index=telemetry.index, dtype=np.int16)
+    if not len(telemetry):
+        return tiers
+    ordered = telemetry.sort_values(['lap_id', 'distance'], kind='stable')
+    for _, lap in ordered.groupby('lap_id', sort=False):
+        tiers.loc[lap.index] = lap_lod_tiers(lap)
+    return tiers
+
+
+def tier_for_points(points: int) -> int:
+    """Coarsest stored tier with at least `points` samples (full resolution beyond)"""
+    for level, tier_points in enumerate(LOD_TIERS):
+        if tier_points >= points:
+            return level
+    return FULL_RESOLUTION
+
+
+def downsample_rows(rows: Sequence, columns: Sequence[str], n_out: int) -> list:
+    """
+    `downsample_indices` over fetched rows of one lap, for targets below
+    the smallest stored tier
+
+    Args:
+        rows: Query rows in distance order (tuples or DB rows)
+        columns: Column name of each row value
+        n_out: Target number of samples
+    """
+    if len(rows) <= n_out:
+        return list(rows)
+    frame = pd.DataFrame([tuple(row) for row in rows], columns=list(columns))
+    return [rows[i] for i in downsample_indices(frame, n_out)]
+
+
+def points_for_resolution(lap_length: Optional[float], resolution: float) -> int:
+    """Samples needed for one point every `resolution` metres over a lap"""
+    if not lap_length or resolution <= 0:
+        return LOD_TIERS[-1] + 1
+    return int(math.ceil(lap_length / resolution)) + 1
+
+
+def backfill_lod_tiers(conn, session_id: Optional[str] = None) -> int:
+    """
+    Compute `lod_tier` for telemetry ingested before LOD tiers existed
+
+    Works one session at a time. Each session partition is rewritten
+    (TRUNCATE + COPY in lap order) rather than updated in place, which
+    would scatter laps across the table and defeat its BRIN index.
+
+    Returns:
+        Number of telemetry rows rewritten
+    """
+    from telemetry_store import STORED_COLUMNS, partition_name, summarize_partition
+
+    cursor = conn.cursor()
+    if session_id:
+        cursor.execute("SELECT session_id, session_key FROM sessions WHERE session_id = %s",
+                       (session_id,))
+    else:
+        cursor.execute("SELECT session_id, session_key FROM sessions "
+                       "ORDER BY year, event_name, session_type")
+    sessions = cursor.fetchall()
+
+    updated = 0
+    for sid, session_key in sessions:
+        cursor.execute(
+            f"SELECT {', '.join(STORED_COLUMNS)} FROM telemetry WHERE session_key = %s "
+            "ORDER BY lap_key, sample",
+            (session_key,)
+        )
+        telemetry = pd.DataFrame(cursor.fetchall(), columns=STORED_COLUMNS)
+        if not len(telemetry):
+            continue
+        telemetry['lod_tier'] = assign_lod_tiers(telemetry.assign(lap_id=telemetry['lap_key']))
+
+        name = partition_name(session_key)
+        buf = io.StringIO()
+        telemetry.to_csv(buf, header=False, index=False, na_rep='')
+        buf.seek(0)
+        cursor.execute(f"TRUNCATE {name}")
+        cursor.copy_expert(f"COPY {name} ({', '.join(STORED_COLUMNS)}) "
+                           "FROM STDIN WITH (FORMAT csv, NULL '')", buf)
+        summarize_partition(cursor, session_key)
+        updated += len(telemetry)
+        conn.commit()
+        print(f"✅ {sid}: {len(telemetry):,} samples")
+    return updated
+
+
+def main(argv=None):
+    import psycopg2
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Backfill telemetry LOD tiers")
+    parser.add_argument('--session', help="Only this session_id (default: all)")
+    args = parser.parse_args(argv)
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    conn = psycopg2.connect(**db_config)
+    try:
+        total = backfill_lod_tiers(conn, args.session)
+        print(f"📊 Rewrote {total:,} telemetry rows")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
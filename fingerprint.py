@@ -0,0 +1,92 @@
+"""
+Content fingerprints for idempotent ingestion
+Hashes FastF1 cache artifacts, laps and telemetry so unchanged data is skipped
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+# Columns that define a lap's content (lap_id/session_id are assigned per run)
+LAP_HASH_COLUMNS = [
+    'driver_code', 'lap_number', 'lap_time_seconds', 'tire_compound', 'tire_life',
+    'is_personal_best', 'sector1_time', 'sector2_time', 'sector3_time'
+]
+
+TELEMETRY_HASH_COLUMNS = [
+    'distance', 'speed', 'throttle', 'brake', 'drs', 'gear', 'rpm',
+    'position_x', 'position_y'
+]
+
+
+def hash_cache_artifacts(session_dir: Path) -> str:
+    """
+    Fingerprint a FastF1 session cache directory
+
+    Hashes every `.ff1pkl` artifact (name + bytes) in a stable order, so the
+    result only changes when FastF1 re-downloads different data.
+
+    Returns:
+        Hex digest, or '' if the directory has no artifacts
+    """
+    files = sorted(Path(session_dir).glob('*.ff1pkl'))
+    if not files:
+        return ''
+    digest = hashlib.blake2b(digest_size=32)
+    for path in files:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _row_hashes(frame: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Deterministic uint64 hash per row (vectorized, index ignored)"""
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+
+
+def lap_content_hashes(laps: pd.DataFrame, telemetry: pd.DataFrame) -> np.ndarray:
+    """
+    One hash per lap covering the lap row and all of its telemetry samples
+
+    Args:
+        laps: Frame from `bulk_loader.laps_to_frame`
+        telemetry: Frame from `bulk_loader.telemetry_to_frame` (may be empty)
+
+    Returns:
+        Hex digest per lap, aligned with `laps`
+    """
+    lap_rows = _row_hashes(laps, LAP_HASH_COLUMNS)
+
+    samples: Dict[str, bytes] = {}
+    if len(telemetry):
+        order = np.argsort(telemetry['lap_id'].to_numpy(), kind='stable')
+        lap_ids = telemetry['lap_id'].to_numpy()[order]
+        rows = _row_hashes(telemetry, TELEMETRY_HASH_COLUMNS)[order]
+        bounds = np.flatnonzero(lap_ids[1:] != lap_ids[:-1]) + 1
+        starts = np.r_[0, bounds]
+        for lap_id, chunk in zip(lap_ids[starts], np.split(rows, bounds)):
+            samples[lap_id] = chunk.tobytes()
+
+    return np.array([
+        hashlib.blake2b(row.tobytes() + samples.get(lap_id, b''), digest_size=16).hexdigest()
+        for lap_id, row in zip(laps['lap_id'].to_numpy(), lap_rows)
+    ], dtype=object)
+
+
+def driver_content_hashes(laps: pd.DataFrame) -> Dict[str, str]:
+    """
+    Per-driver fingerprint from the per-lap `content_hash` column
+
+    Returns:
+        driver_code -> hex digest
+    """
+    ordered = laps.sort_values(['driver_code', 'lap_number'])
+    return {
+        driver: hashlib.blake2b(''.join(group['content_hash']).encode(),
+                                digest_size=16).hexdigest()
+        for driver, group in ordered.groupby('driver_code', sort=False)
+    }
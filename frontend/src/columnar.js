@@ -0,0 +1,95 @@
+import axios from 'axios';
+
+// Decoder for the API's columnar binary payloads (application/vnd.f1.columnar).
+// See columnar.py for the wire format: magic 'F1C1', uint32 header length,
+// JSON header, then 8-byte aligned little-endian column buffers.
+
+export const COLUMNAR_MIMETYPE = 'application/vnd.f1.columnar';
+
+const ARRAY_TYPES = {
+    f64: Float64Array,
+    f32: Float32Array,
+    i32: Int32Array,
+    i16: Int16Array,
+    u16: Uint16Array,
+    u8: Uint8Array,
+    bool: Uint8Array,
+};
+
+const INDEX_TYPES = { u16: Uint16Array, u32: Uint32Array };
+
+const toHex = (bytes) =>
+    Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+
+const formatUuid = (bytes) => {
+    const hex = toHex(bytes);
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+/**
+ * Decode a columnar payload into { rows, columns }.
+ *
+ * Numeric columns are typed array views over the response buffer (no copy).
+ * Dictionary columns decode to arrays of strings, uuid columns to strings.
+ * Columns with nulls also get a `<name>Valid` Uint8Array (0 = null).
+ */
+export function decodeColumnar(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'F1C1') {
+        throw new Error(`Unexpected columnar payload (magic "${magic}")`);
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const rows = header.rows;
+    const columns = {};
+
+    header.columns.forEach((col) => {
+        if (col.type === 'uuid') {
+            const bytes = new Uint8Array(buffer, col.offset, col.byteLength);
+            columns[col.name] = Array.from({ length: rows }, (_, i) =>
+                formatUuid(bytes.subarray(i * 16, i * 16 + 16)));
+        } else if (col.type === 'dict') {
+            const indices = new INDEX_TYPES[col.indexType](buffer, col.offset, rows);
+            columns[col.name] = Array.from(indices, (i) => col.dictionary[i]);
+        } else {
+            columns[col.name] = new ARRAY_TYPES[col.type](buffer, col.offset, rows);
+        }
+        if (col.validityOffset !== undefined) {
+            columns[`${col.name}Valid`] = new Uint8Array(buffer, col.validityOffset, rows);
+        }
+    });
+
+    return { rows, columns };
+}
+
+/**
+ * Expand decoded columns into row objects (for chart libraries like recharts
+ * that want an array of points).
+ */
+export function columnsToRows({ rows, columns }) {
+    const names = Object.keys(columns).filter((name) => !name.endsWith('Valid'));
+    const out = new Array(rows);
+    for (let i = 0; i < rows; i++) {
+        const row = {};
+        names.forEach((name) => {
+            const valid = columns[`${name}Valid`];
+            row[name] = valid && !valid[i] ? null : columns[name][i];
+        });
+        out[i] = row;
+    }
+    return out;
+}
+
+/**
+ * GET an endpoint that supports content negotiation and decode the
+ * columnar response (e.g. /api/telemetry/<lapId>, /api/laps/<sessionId>).
+ */
+export async function fetchColumnar(url, config = {}) {
+    const response = await axios.get(url, {
+        ...config,
+        responseType: 'arraybuffer',
+        headers: { ...(config.headers || {}), Accept: COLUMNAR_MIMETYPE },
+    });
+    return decodeColumnar(response.data);
+}
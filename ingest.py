@@ -0,0 +1,427 @@
+"""
+F1 Session Ingestion CLI
+Loads any set of FastF1 sessions in parallel and writes them through one DB writer
+
+Examples:
+    python ingest.py --season 2024
+    python ingest.py --season 2024 --events Monaco "British Grand Prix" --sessions R Q
+    python ingest.py --season 2024 --offline --dry-run
+    python ingest.py --season 2024 --force   # nightly: re-check, only changed data is written
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'cache'
+
+# Short session codes stored in sessions.session_type -> FastF1 session names
+SESSION_NAMES = {
+    'FP1': 'Practice 1',
+    'FP2': 'Practice 2',
+    'FP3': 'Practice 3',
+    'SQ': 'Sprint Qualifying',
+    'SS': 'Sprint Shootout',
+    'S': 'Sprint',
+    'Q': 'Qualifying',
+    'R': 'Race',
+}
+SESSION_CODES = {name: code for code, name in SESSION_NAMES.items()}
+
+
+@dataclass
+class SessionSpec:
+    """One session to ingest; `key` identifies it in the resume state file"""
+    year: int
+    event_name: str       # FastF1 event name, e.g. "Monaco Grand Prix"
+    session_name: str     # FastF1 session name, e.g. "Race"
+    session_date: date
+    cache_path: Optional[str] = None  # Cache directory (offline discovery only)
+    location: str = ''
+    country: str = ''
+
+    @property
+    def key(self) -> str:
+        return f"{self.year}/{self.event_name}/{self.session_name}"
+
+    @property
+    def session_type(self) -> str:
+        return SESSION_CODES.get(self.session_name, self.session_name)
+
+    @property
+    def short_event_name(self) -> str:
+        """Name stored in sessions.event_name ("Monaco Grand Prix" -> "Monaco")"""
+        return self.event_name.replace(' Grand Prix', '').strip()
+
+
+def _matches_event(spec: SessionSpec, events: Optional[List[str]]) -> bool:
+    if not events:
+        return True
+    names = {spec.event_name.lower(), spec.short_event_name.lower(),
+             spec.location.lower(), spec.country.lower()}
+    return any(e.lower() in names for e in events)
+
+
+def _matches_session(spec: SessionSpec, sessions: Optional[List[str]]) -> bool:
+    if not sessions:
+        return True
+    wanted = {SESSION_NAMES.get(s.upper(), s).lower() for s in sessions}
+    return spec.session_name.lower() in wanted
+
+
+def discover_cached_sessions(cache_dir: Path, year: int) -> List[SessionSpec]:
+    """
+    Find sessions present in the FastF1 cache without touching the network
+
+    Cache layout: <cache>/<year>/<date>_<Event_Name>/<date>_<Session_Name>/
+    """
+    specs = []
+    for info_file in sorted((cache_dir / str(year)).glob('*/*/session_info.ff1pkl')):
+        with open(info_file, 'rb') as f:
+            info = pickle.load(f)['data']
+        meeting = info.get('Meeting', {})
+        specs.append(SessionSpec(
+            year=year,
+            event_name=meeting.get('Name') or info_file.parent.parent.name.split('_', 1)[1].replace('_', ' '),
+            session_name=info.get('Name') or info_file.parent.name.split('_', 1)[1].replace('_', ' '),
+            session_date=info['StartDate'].date() if info.get('StartDate') else
+            datetime.strptime(info_file.parent.name[:10], '%Y-%m-%d').date(),
+            cache_path=str(info_file.parent),
+            location=meeting.get('Location', ''),
+            country=meeting.get('Country', {}).get('Name', ''),
+        ))
+    return specs
+
+
+def discover_scheduled_sessions(year: int) -> List[SessionSpec]:
+    """Sessions from the FastF1 event schedule (needs network or a cached schedule)"""
+    import fastf1
+
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    specs = []
+    for _, event in schedule.iterrows():
+        for i in range(1, 6):
+            name = event.get(f'Session{i}')
+            session_date = event.get(f'Session{i}Date')
+            if not name or session_date is None or str(session_date) == 'NaT':
+                continue
+            specs.append(SessionSpec(
+                year=year,
+                event_name=event['EventName'],
+                session_name=name,
+                session_date=session_date.date(),
+                location=event.get('Location', ''),
+                country=event.get('Country', ''),
+            ))
+    return specs
+
+
+def _offline_session(spec: SessionSpec):
+    """Build a FastF1 Session straight from cache metadata (no schedule lookup)"""
+    import pandas as pd
+    from fastf1.core import Session
+    from fastf1.events import Event
+
+    with open(Path(spec.cache_path) / 'session_info.ff1pkl', 'rb') as f:
+        info = pickle.load(f)['data']
+    start = pd.Timestamp(info['StartDate'])
+    offset = pd.Timedelta(info.get('GmtOffset') or 0)
+
+    fields = {'RoundNumber': 0, 'Country': spec.country, 'Location': spec.location,
+              'OfficialEventName': info.get('Meeting', {}).get('OfficialName', ''),
+              'EventDate': pd.Timestamp(spec.session_date), 'EventName': spec.event_name,
+              'EventFormat': 'conventional', 'F1ApiSupport': True}
+    # Only Session5 is populated; FastF1 looks the session up by name
+    for i in range(1, 6):
+        fields[f'Session{i}'] = spec.session_name if i == 5 else ''
+        fields[f'Session{i}Date'] = (start.tz_localize(timezone(offset.to_pytimedelta()))
+                                     if i == 5 else pd.NaT)
+        fields[f'Session{i}DateUtc'] = start - offset if i == 5 else pd.NaT
+    return Session(Event(fields, year=spec.year), spec.session_name, f1_api_support=True)
+
+
+def _init_worker(cache_dir: str, offline: bool):
+    """Process pool initializer: every worker shares the same FastF1 cache"""
+    import fastf1
+
+    fastf1.set_log_level('WARNING')
+    fastf1.Cache.enable_cache(cache_dir)
+    if offline:
+        fastf1.Cache.offline_mode(True)
+
+
+def load_spec(spec: SessionSpec, offline: bool, include_telemetry: bool,
+              cache_dir: str, known_hash: Optional[str] = None):
+    """
+    Worker: parse one session with FastF1 and convert it to table frames
+
+    The session's cache artifacts are fingerprinted first; if they match
+    `known_hash` (what the database already holds) parsing is skipped.
+
+    Returns:
+        (spec, SessionFrames or None if unchanged, seconds spent)
+    """
+    import fastf1
+    from bulk_loader import extract_session
+    from fingerprint import hash_cache_artifacts
+
+    start = time.perf_counter()
+    if offline and spec.cache_path:
+        session = _offline_session(spec)
+        session_dir = Path(spec.cache_path)
+    else:
+        session = fastf1.get_session(spec.year, spec.event_name, spec.session_name)
+        session_dir = Path(cache_dir) / session.api_path.replace('/static/', '', 1)
+
+    source_hash = hash_cache_artifacts(session_dir)
+    if known_hash and source_hash == known_hash:
+        return spec, None, time.perf_counter() - start
+
+    session.load(laps=True, telemetry=include_telemetry, weather=False, messages=False)
+    if not source_hash:  # First download just populated the cache
+        source_hash = hash_cache_artifacts(session_dir)
+
+    frames = extract_session(
+        session,
+        year=spec.year,
+        event_name=spec.short_event_name,
+        session_type=spec.session_type,
+        session_date=spec.session_date,
+        include_telemetry=include_telemetry,
+        source_hash=source_hash,
+    )
+    return spec, frames, time.perf_counter() - start
+
+
+class IngestState:
+    """Resume bookkeeping: sessions already written and the last failure of each"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.completed: Dict[str, Dict] = {}
+        self.failed: Dict[str, str] = {}
+        if path.exists():
+            data = json.loads(path.read_text())
+            self.completed = data.get('completed', {})
+            self.failed = data.get('failed', {})
+        self._lock = threading.Lock()
+
+    def mark_done(self, spec: SessionSpec, result: Dict):
+        with self._lock:
+            self.completed[spec.key] = result
+            self.failed.pop(spec.key, None)
+            self._save()
+
+    def mark_failed(self, spec: SessionSpec, error: str):
+        with self._lock:
+            self.failed[spec.key] = error
+            self._save()
+
+    def _save(self):
+        # Write-then-rename so an interrupted run never corrupts the state
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'completed': self.completed, 'failed': self.failed},
+                                  indent=2, default=str))
+        os.replace(tmp, self.path)
+
+
+class SessionWriter(threading.Thread):
+    """
+    Single DB writer fed through a bounded queue
+
+    Workers parse in parallel, but only this thread talks to the database, so
+    it sees one COPY stream (or SQLite write transaction) at a time. The queue bound applies
+    back-pressure when parsing outruns writing.
+    """
+
+    def __init__(self, db_config: Optional[Dict], state: IngestState, max_pending: int = 2):
+        super().__init__(daemon=True)
+        self.db_config = db_config
+        self.state = state
+        self.queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.unchanged = 0
+        self.errors = 0
+
+    def run(self):
+        from bulk_loader import write_session
+        from response_cache import invalidate_session
+        from storage import get_database
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            spec, frames, position = item
+            start = time.perf_counter()
+            try:
+                if frames is None:  # Cache fingerprint matched the database
+                    self.state.mark_done(spec, {'unchanged': True})
+                    self.unchanged += 1
+                    print(f"{position} ⏭️  {spec.key} unchanged, nothing written")
+                    continue
+                if self.db_config is None:  # --dry-run: nothing written, nothing to resume
+                    result = {'laps': len(frames.laps), 'telemetry': len(frames.telemetry),
+                              'drivers': len(frames.drivers)}
+                else:
+                    with get_database(self.db_config).connection() as db:
+                        result = write_session(db.cursor, frames)
+                    if not result['unchanged']:
+                        invalidate_session(result['session_id'])
+                    self.state.mark_done(spec, result)
+                self.written += 1
+                print(f"{position} ✅ wrote {spec.key}: {result['laps']} laps, "
+                      f"{result['telemetry']} telemetry rows in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                self.errors += 1
+                self.state.mark_failed(spec, f"write: {e}")
+                print(f"{position} ❌ write failed for {spec.key}: {e}")
+
+
+def run_ingest(specs: List[SessionSpec], db_config: Optional[Dict], cache_dir: Path,
+               state: IngestState, workers: int, offline: bool,
+               include_telemetry: bool = True) -> Dict[str, int]:
+    """
+    Parse `specs` in a process pool and write them through one SessionWriter
+
+    Sessions whose cache fingerprint matches the database are skipped by
+    the workers before any parsing.
+
+    Returns:
+        Counts of written, unchanged, failed and skipped sessions
+    """
+    pending = [s for s in specs if s.key not in state.completed]
+    skipped = len(specs) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} session(s) already ingested (use --force to redo)")
+
+    known = {}
+    if db_config is not None and pending:
+        from bulk_loader import known_session_hashes
+        from storage import get_database
+
+        with get_database(db_config).connection() as db:
+            known = known_session_hashes(db.cursor)
+
+    writer = SessionWriter(db_config, state)
+    writer.start()
+    load_errors = 0
+    total = len(pending)
+
+    # Cap in-flight loads so parsed sessions never pile up in memory
+    window = workers + writer.queue.maxsize
+    todo = iter(pending)
+    done_count = 0
+
+    # Spawned (not forked) workers: the writer thread is already running here
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(cache_dir), offline),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        in_flight = {}
+        while True:
+            while len(in_flight) < window:
+                spec = next(todo, None)
+                if spec is None:
+                    break
+                known_hash = known.get((spec.year, spec.short_event_name, spec.session_type))
+                in_flight[pool.submit(load_spec, spec, offline, include_telemetry,
+                                      str(cache_dir), known_hash)] = spec
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                spec = in_flight.pop(future)
+                done_count += 1
+                position = f"[{done_count}/{total}]"
+                try:
+                    _, frames, seconds = future.result()
+                except Exception as e:
+                    load_errors += 1
+                    state.mark_failed(spec, f"load: {e}")
+                    print(f"{position} ❌ load failed for {spec.key}: {e}")
+                    continue
+                if frames is not None:
+                    print(f"{position} parsed {spec.key}: {len(frames.laps)} laps in {seconds:.1f}s")
+                writer.queue.put((spec, frames, position))  # blocks while the writer is behind
+
+    writer.queue.put(None)
+    writer.join()
+    return {'written': writer.written, 'unchanged': writer.unchanged,
+            'failed': load_errors + writer.errors, 'skipped': skipped}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Ingest FastF1 sessions into the telemetry database")
+    parser.add_argument('--season', type=int, required=True, help="Season year, e.g. 2024")
+    parser.add_argument('--events', nargs='+', help="Event names/locations (default: every event)")
+    parser.add_argument('--sessions', nargs='+',
+                        help=f"Session codes or names, e.g. R Q FP1 (codes: {', '.join(SESSION_NAMES)})")
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--offline', action='store_true',
+                        help="Only use sessions already in the FastF1 cache; never hit the network")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--no-telemetry', action='store_true', help="Load laps only")
+    parser.add_argument('--state-file', type=Path,
+                        help="Resume state (default: <cache-dir>/ingest_state_<season>.json)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-check sessions marked complete (unchanged ones are still "
+                             "skipped by fingerprint, so nightly runs stay cheap)")
+    parser.add_argument('--dry-run', action='store_true', help="Parse sessions without writing to the DB")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.offline:
+        specs = discover_cached_sessions(args.cache_dir, args.season)
+    else:
+        specs = discover_scheduled_sessions(args.season)
+    specs = [s for s in specs
+             if _matches_event(s, args.events) and _matches_session(s, args.sessions)]
+
+    if not specs:
+        print("No matching sessions found")
+        return 1
+
+    state_file = args.state_file or args.cache_dir / f"ingest_state_{args.season}.json"
+    state = IngestState(state_file)
+    if args.force:
+        for spec in specs:
+            state.completed.pop(spec.key, None)
+
+    db_config = None if args.dry_run else {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD')
+    }
+
+    print(f"🏎️  Ingesting {len(specs)} session(s) with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    counts = run_ingest(specs, db_config, args.cache_dir, state, args.workers,
+                        args.offline, include_telemetry=not args.no_telemetry)
+    print(f"Done in {time.perf_counter() - start:.1f}s: {counts['written']} written, "
+          f"{counts['unchanged']} unchanged, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""
+Request instrumentation for the Flask API
+Times named spans (db.connect, db.query, db.fetch, compute.*, serialize)
+within each request, exports them as Prometheus histograms on
+/api/metrics and adds a Server-Timing header. A sampling profiler can be
+attached to single requests with `?profile=1` (or `?profile=collapsed`
+for flame graph input).
+
+Both are off unless INSTRUMENTATION=1 / PROFILING=1: `span()` then returns
+a shared no-op context manager and no request hooks are installed.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+INSTRUMENTATION_ENABLED = _env_flag('INSTRUMENTATION')
+PROFILING_ENABLED = _env_flag('PROFILING')
+PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL_MS', 5)) / 1000
+
+# Upper bounds (seconds); spans are often sub-millisecond
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_SPAN = nullcontext()
+
+# Span name -> [seconds, calls] for the request being handled (None outside requests)
+_request_spans: ContextVar[Optional[Dict[str, List]]] = ContextVar('request_spans', default=None)
+
+
+class _Span:
+    __slots__ = ('name', 'totals', 'started')
+
+    def __init__(self, name: str, totals: Dict[str, List]):
+        self.name = name
+        self.totals = totals
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        entry = self.totals.get(self.name)
+        if entry is None:
+            entry = self.totals[self.name] = [0.0, 0]
+        entry[0] += time.perf_counter() - self.started
+        entry[1] += 1
+        return False
+
+
+def span(name: str):
+    """
+    Time a block as part of the current request
+
+    Repeated spans of the same name add up (e.g. every `db.query` of a
+    request). Outside an instrumented request this is a no-op.
+    """
+    if not INSTRUMENTATION_ENABLED:
+        return _NULL_SPAN
+    totals = _request_spans.get()
+    if totals is None:
+        return _NULL_SPAN
+    return _Span(name, totals)
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute* as `db.query` and fetch* as `db.fetch`"""
+
+    def __init__(self, cursor):
+        self.wrapped = cursor
+
+    def execute(self, *args, **kwargs):
+        with span('db.query'):
+            return self.wrapped.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with span('db.query'):
+            return self.wrapped.executemany(*args, **kwargs)
+
+    def fetchone(self):
+        with span('db.fetch'):
+            return self.wrapped.fetchone()
+
+    def fetchmany(self, *args, **kwargs):
+        with span('db.fetch'):
+            return self.wrapped.fetchmany(*args, **kwargs)
+
+    def fetchall(self):
+        with span('db.fetch'):
+            return self.wrapped.fetchall()
+
+    def __iter__(self):
+        return iter(self.wrapped)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+def connection(database):
+    """
+    `database.connection()`, timing the borrow and the cursor when enabled
+
+    Args:
+        database: F1ConnectionPool or storage.SQLiteDatabase
+    """
+    if not INSTRUMENTATION_ENABLED or _request_spans.get() is None:
+        return database.connection()
+    return _timed_connection(database)
+
+
+@contextmanager
+def _timed_connection(database) -> Iterator:
+    from db_pool import PooledDatabase
+
+    with ExitStack() as stack:
+        with span('db.connect'):
+            db = stack.enter_context(database.connection())
+        yield PooledDatabase(conn=db.conn, cursor=InstrumentedCursor(db.cursor))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (Prometheus semantics)"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Request and span histograms, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Histogram('f1_http_request_duration_seconds',
+                                  "Time to build the response (streamed bodies excluded)",
+                                  ('endpoint', 'method', 'status'))
+        self.spans = Histogram('f1_span_duration_seconds',
+                               "Time per request spent in each span",
+                               ('endpoint', 'span'))
+        self.span_calls = Histogram('f1_span_calls', "Span entries per request (e.g. queries)",
+                                    ('endpoint', 'span'),
+                                    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000))
+
+    def record(self, endpoint: str, method: str, status: int, seconds: float,
+               spans: Dict[str, List]):
+        with self._lock:
+            self.requests.observe((endpoint, method, str(status)), seconds)
+            for name, (span_seconds, calls) in spans.items():
+                self.spans.observe((endpoint, name), span_seconds)
+                self.span_calls.observe((endpoint, name), calls)
+
+    def render(self) -> str:
+        lines = ["# HELP f1_instrumentation_enabled Whether request spans are recorded",
+                 "# TYPE f1_instrumentation_enabled gauge",
+                 f"f1_instrumentation_enabled {int(INSTRUMENTATION_ENABLED)}"]
+        with self._lock:
+            for histogram in (self.requests, self.spans, self.span_calls):
+                lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread
+
+    A daemon thread records the target thread's Python stack every
+    `interval` seconds, so cost is bounded by the sample rate rather than
+    by the number of calls (unlike cProfile).
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = PROFILER_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._started = 0.0
+        self.seconds = 0.0
+
+    def start(self) -> 'SamplingProfiler':
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                             f"{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One `root;...;leaf count` line per distinct stack (flamegraph.pl / speedscope input)"""
+        return ''.join(f"{';'.join(stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top(self, limit: int = 25) -> List[Dict]:
+        """Hottest functions: samples at the top of the stack (self) and anywhere on it (total)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for frame in set(stack):
+                total[frame] += n
+        return [{'function': frame, 'self': n, 'total': total[frame],
+                 'self_percent': round(100 * n / self.samples, 1),
+                 'total_percent': round(100 * total[frame] / self.samples, 1)}
+                for frame, n in own.most_common(limit)]
+
+
+def _endpoint() -> str:
+    from flask import request
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def init_app(app):
+    """
+    Install the request hooks on a Flask app
+
+    Nothing is installed unless INSTRUMENTATION or PROFILING is enabled.
+    """
+    if not (INSTRUMENTATION_ENABLED or PROFILING_ENABLED):
+        return
+    from flask import Response, g, jsonify, request
+    from flask.json.provider import DefaultJSONProvider
+
+    class TimedJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            with span('serialize'):
+                return super().dumps(obj, **kwargs)
+
+    if INSTRUMENTATION_ENABLED:
+        app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_request():
+        g.instrumentation_started = time.perf_counter()
+        g.instrumentation_token = _request_spans.set({})
+        if PROFILING_ENABLED and request.args.get('profile'):
+            g.bypass_cache = True  # Profile the real work, not a cache hit
+            g.profiler = SamplingProfiler().start()
+
+    @app.after_request
+    def _finish_request(response):
+        seconds = time.perf_counter() - g.get('instrumentation_started', time.perf_counter())
+        spans = _request_spans.get() or {}
+        if INSTRUMENTATION_ENABLED:
+            metrics.record(_endpoint(), request.method, response.status_code, seconds, spans)
+            response.headers['Server-Timing'] = ', '.join(
+                [f"{name};dur={s * 1000:.2f}" for name, (s, _) in spans.items()]
+                + [f"total;dur={seconds * 1000:.2f}"])
+
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        if request.args.get('profile') == 'collapsed':
+            return Response(profiler.collapsed(), mimetype='text/plain')
+        return jsonify({
+            'status': response.status_code,
+            'seconds': round(seconds, 6),
+            'samples': profiler.samples,
+            'interval_ms': profiler.interval * 1000,
+            'spans': {name: {'ms': round(s * 1000, 3), 'calls': calls}
+                      for name, (s, calls) in spans.items()},
+            'top': profiler.top()
+        })
+
+    @app.teardown_request
+    def _end_request(exc):
+        token = g.pop('instrumentation_token', None)
+        if token is not None:
+            _request_spans.reset(token)
+        profiler = g.pop('profiler', None)
+        if profiler is not None:  # after_request skipped (unhandled error)
+            profiler.stop()
@@ -0,0 +1,310 @@
+"""
+Training features for LapTimePredictor
+Builds feature matrices in `LapTimePredictor.feature_names` order from the
+laps table: tire age, derived fuel load, running position, compound and
+lap number.
+
+For training over many sessions the matrices are built once per session
+set, written as chunked `.npy` files under FEATURE_CACHE_DIR and read
+back chunk by chunk (memory-mapped), so memory stays bounded by the
+chunk size rather than the number of seasons.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lap_predictor import LapTimePredictor
+from telemetry_stream import iter_row_batches
+from tire_analysis import MIN_VALID_LAP_TIME
+
+# Bump when derived features change so cached matrices are rebuilt
+PIPELINE_VERSION = 1
+CHUNK_ROWS = 100_000
+MODEL_INPUTS = ('tire_age', 'fuel_load', 'track_position', 'compound', 'lap_number')
+
+# Laps slower than this share of the session median (pit in/out laps,
+# safety car) are left out of training
+MAX_LAP_TIME_RATIO = 1.07
+
+LAP_FEATURES_QUERY = """
+    SELECT session_id, driver_code, lap_number, lap_time_seconds, tire_compound, tire_life
+    FROM laps
+    WHERE session_id = ANY(%s::uuid[])
+    ORDER BY session_id, driver_code, lap_number
+"""
+
+
+def sessions_for(cursor, circuit: str, season: int,
+                 session_types: Sequence[str] = ('R',)) -> List[str]:
+    """Session ids of one circuit (sessions.event_name) and season"""
+    cursor.execute(
+        """
+        SELECT session_id FROM sessions
+        WHERE event_name = %s AND year = %s AND session_type = ANY(%s)
+        ORDER BY date
+        """,
+        (circuit, season, list(session_types))
+    )
+    return [str(r[0]) for r in cursor.fetchall()]
+
+
+def add_derived_features(laps: pd.DataFrame) -> pd.DataFrame:
+    """
+    Model inputs for raw lap rows (sorted by session, driver, lap)
+
+    - tire_age: laps already run on the tire (tire_life - 1; 0 = new)
+    - fuel_load: 100% on lap 1, burned evenly to the session's last lap
+    - track_position: running position from cumulative race time; missing
+      lap times count as the session median so later laps still rank
+    - train: the lap time is a usable training target
+    """
+    laps = laps.copy()
+    session = laps.groupby('session_id', sort=False)
+    median = session['lap_time_seconds'].transform('median')
+    total_laps = session['lap_number'].transform('max')
+
+    laps['tire_age'] = (laps['tire_life'].fillna(1) - 1).clip(lower=0)
+    laps['fuel_load'] = 100.0 - (laps['lap_number'] - 1) * 100.0 / total_laps
+    laps['compound'] = laps['tire_compound'].fillna('UNKNOWN')
+
+    elapsed = laps['lap_time_seconds'].fillna(median)
+    laps['race_time'] = elapsed.groupby([laps['session_id'], laps['driver_code']]).cumsum()
+    laps['track_position'] = laps.groupby(['session_id', 'lap_number'])['race_time'].rank(
+        method='first').astype(np.int64)
+
+    lap_time = laps['lap_time_seconds']
+    laps['train'] = (lap_time.notna() & (lap_time > MIN_VALID_LAP_TIME)
+                     & (lap_time < median * MAX_LAP_TIME_RATIO))
+    return laps
+
+
+def fetch_lap_features(cursor, session_ids: Sequence[str]) -> pd.DataFrame:
+    """Lap rows of several sessions with derived features, one query"""
+    cursor.execute(LAP_FEATURES_QUERY, (list(session_ids),))
+    laps = pd.DataFrame(cursor.fetchall(), columns=[c.name for c in cursor.description])
+    if not len(laps):
+        return laps
+    laps['session_id'] = laps['session_id'].astype(str)
+    laps['lap_time_seconds'] = laps['lap_time_seconds'].astype(np.float64)
+    return add_derived_features(laps)
+
+
+def training_matrix(features: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (X, y) for `LapTimePredictor.fit` from `fetch_lap_features` output
+
+    X columns follow `LapTimePredictor.feature_names`.
+    """
+    rows = features[features['train']]
+    X = LapTimePredictor().prepare_features_batch(
+        {name: rows[name].to_numpy() for name in MODEL_INPUTS})
+    return X.astype(np.float64), rows['lap_time_seconds'].to_numpy(dtype=np.float64)
+
+
+@dataclass
+class FeatureSet:
+    """A cached, chunked feature matrix for one set of sessions"""
+    key: str
+    path: Path
+    sessions: List[str]
+    feature_names: List[str]
+    n_rows: int
+    chunks: List[int]  # rows per chunk
+
+    def iter_chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(X, y) chunk by chunk; arrays are memory-mapped, not read up front"""
+        for i in range(len(self.chunks)):
+            yield (np.load(self.path / f'X_{i:05d}.npy', mmap_mode='r'),
+                   np.load(self.path / f'y_{i:05d}.npy', mmap_mode='r'))
+
+    def load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Whole matrix in memory (for sets small enough to fit)"""
+        parts = list(self.iter_chunks())
+        if not parts:
+            return np.empty((0, len(self.feature_names))), np.empty(0)
+        return (np.concatenate([X for X, _ in parts]), np.concatenate([y for _, y in parts]))
+
+
+def feature_set_key(cursor, session_ids: Sequence[str]) -> str:
+    """
+    Cache key of a session set
+
+    Covers the sorted session ids, each session's ingest fingerprint and
+    lap count, and PIPELINE_VERSION, so re-ingested sessions get new
+    matrices.
+    """
+    cursor.execute(
+        """
+        SELECT s.session_id, s.content_hash, COUNT(l.lap_id)
+        FROM sessions s LEFT JOIN laps l ON l.session_id = s.session_id
+        WHERE s.session_id = ANY(%s::uuid[])
+        GROUP BY s.session_id, s.content_hash
+        ORDER BY s.session_id
+        """,
+        (list(session_ids),)
+    )
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{PIPELINE_VERSION}|".encode())
+    for session_id, content_hash, n_laps in cursor.fetchall():
+        digest.update(f"{session_id}|{content_hash}|{n_laps};".encode())
+    return digest.hexdigest()
+
+
+def iter_session_features(conn, session_ids: Sequence[str],
+                          batch_size: int = 20_000) -> Iterator[pd.DataFrame]:
+    """
+    `fetch_lap_features` output one session at a time
+
+    One query for all sessions, read through a server-side cursor; rows
+    arrive grouped by session, and each session is finished (derived
+    features need the whole session) as soon as its last row is read.
+    """
+    pending: List[pd.DataFrame] = []
+    for columns, rows in iter_row_batches(conn, LAP_FEATURES_QUERY, (list(session_ids),),
+                                          batch_size=batch_size):
+        batch = pd.DataFrame(rows, columns=columns)
+        batch['session_id'] = batch['session_id'].astype(str)
+        batch['lap_time_seconds'] = batch['lap_time_seconds'].astype(np.float64)
+        sessions = batch['session_id'].to_numpy()
+        bounds = np.flatnonzero(sessions[1:] != sessions[:-1]) + 1
+        for part in np.split(np.arange(len(batch)), bounds):
+            frame = batch.iloc[part]
+            if pending and pending[-1]['session_id'].iat[0] != frame['session_id'].iat[0]:
+                yield add_derived_features(pd.concat(pending, ignore_index=True))
+                pending = []
+            pending.append(frame)
+    if pending:
+        yield add_derived_features(pd.concat(pending, ignore_index=True))
+
+
+def _cache_root(cache_dir: Optional[str]) -> Path:
+    return Path(cache_dir or os.getenv('FEATURE_CACHE_DIR', os.path.join('cache', 'features')))
+
+
+def _read_feature_set(path: Path) -> Optional[FeatureSet]:
+    try:
+        meta = json.loads((path / 'meta.json').read_text())
+    except FileNotFoundError:
+        return None
+    return FeatureSet(path=path, **meta)
+
+
+def build_feature_set(conn, session_ids: Sequence[str], cache_dir: Optional[str] = None,
+                      chunk_rows: int = CHUNK_ROWS, rebuild: bool = False) -> FeatureSet:
+    """
+    Cached training matrix of a session set (built on first use)
+
+    Chunks are written to a temporary directory that is renamed into
+    place when complete, so concurrent builders and readers never see a
+    partial set.
+
+    Args:
+        conn: Open connection (a server-side cursor is used)
+        session_ids: Sessions to include
+        cache_dir: Root directory (default FEATURE_CACHE_DIR or cache/features)
+        chunk_rows: Rows per .npy chunk
+        rebuild: Ignore an existing cache entry
+    """
+    sessions = sorted(str(s) for s in session_ids)
+    cursor = conn.cursor()
+    key = feature_set_key(cursor, sessions)
+    cursor.close()
+    root = _cache_root(cache_dir)
+    path = root / key
+    if not rebuild:
+        cached = _read_feature_set(path)
+        if cached is not None:
+            return cached
+
+    feature_names = LapTimePredictor().feature_names
+    staging = root / f'.{key}.{uuid.uuid4().hex}'
+    staging.mkdir(parents=True)
+    chunks: List[int] = []
+    parts_X: List[np.ndarray] = []
+    parts_y: List[np.ndarray] = []
+
+    def flush():
+        X, y = np.concatenate(parts_X), np.concatenate(parts_y)
+        np.save(staging / f'X_{len(chunks):05d}.npy', X)
+        np.save(staging / f'y_{len(chunks):05d}.npy', y)
+        chunks.append(len(y))
+        parts_X.clear()
+        parts_y.clear()
+
+    try:
+        for frame in iter_session_features(conn, sessions):
+            X, y = training_matrix(frame)
+            for start in range(0, len(y), chunk_rows):
+                parts_X.append(X[start:start + chunk_rows])
+                parts_y.append(y[start:start + chunk_rows])
+                if sum(len(p) for p in parts_y) >= chunk_rows:
+                    flush()
+        if parts_y:
+            flush()
+        meta = {'key': key, 'sessions': sessions, 'feature_names': feature_names,
+                'n_rows': int(sum(chunks)), 'chunks': chunks}
+        (staging / 'meta.json').write_text(json.dumps(meta, indent=2))
+        if rebuild and path.exists():
+            shutil.rmtree(path)
+        os.replace(staging, path)
+    except OSError:
+        # Another process finished the same set first
+        shutil.rmtree(staging, ignore_errors=True)
+        cached = _read_feature_set(path)
+        if cached is None:
+            raise
+        return cached
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return _read_feature_set(path)
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from storage import connect
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Build cached training feature matrices")
+    parser.add_argument('--season', type=int, nargs='+', required=True)
+    parser.add_argument('--circuit', help="sessions.event_name (default: every event)")
+    parser.add_argument('--session-types', nargs='+', default=['R'])
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args(argv)
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    conn = connect(db_config)
+    try:
+        cursor = conn.cursor()
+        query = "SELECT session_id FROM sessions WHERE year = ANY(%s) AND session_type = ANY(%s)"
+        params = [args.season, args.session_types]
+        if args.circuit:
+            query += " AND event_name = %s"
+            params.append(args.circuit)
+        cursor.execute(query, params)
+        sessions = [str(r[0]) for r in cursor.fetchall()]
+        feature_set = build_feature_set(conn, sessions, rebuild=args.rebuild)
+        print(f"✅ {len(sessions)} sessions -> {feature_set.n_rows:,} rows in "
+              f"{len(feature_set.chunks)} chunks: {feature_set.path}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
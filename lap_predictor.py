@@ -8,11 +8,53 @@ import numpy as np
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.model_selection import cross_val_score
-from typing import List, Tuple, Dict, Optional
+from typing import Any, Iterable, List, Mapping, Tuple, Dict, Optional
 from dataclasses import dataclass
+from functools import reduce
 import json
 
 
+# Lap time modifier per tire compound (seconds)
+COMPOUND_MODIFIERS = {
+    'SOFT': -0.8,    # Faster but degrades quickly
+    'MEDIUM': 0.0,   # Baseline
+    'HARD': 0.5,     # Slower but more durable
+    'INTERMEDIATE': 1.5,
+    'WET': 3.0
+}
+
+
+# Compounds with a one-hot feature column, in `feature_names` order; any
+# other compound encodes as all zeros (the extra last row of the table)
+ONE_HOT_COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+_ONE_HOT_INDEX = {name: i for i, name in enumerate(ONE_HOT_COMPOUNDS)}
+_ONE_HOT_TABLE = np.vstack([np.eye(len(ONE_HOT_COMPOUNDS)), np.zeros(len(ONE_HOT_COMPOUNDS))])
+
+# Inputs of `predict`, with its defaults (tire_age has none)
+PREDICT_INPUTS = {
+    'tire_age': None,
+    'fuel_load': 100.0,
+    'track_position': 10,
+    'compound': 'MEDIUM',
+    'lap_number': 1,
+}
+
+
+def encode_compounds(compounds) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-hot rows and lap time modifiers for an array of compound names
+
+    Each distinct name is looked up once; rows are gathered by index.
+
+    Returns:
+        ((n, 3) one-hot matrix, (n,) compound modifiers)
+    """
+    names, inverse = np.unique(np.asarray(compounds, dtype=str), return_inverse=True)
+    one_hot = _ONE_HOT_TABLE[[_ONE_HOT_INDEX.get(n, len(ONE_HOT_COMPOUNDS)) for n in names]]
+    modifiers = np.array([COMPOUND_MODIFIERS.get(n.upper(), 0.0) for n in names])
+    return one_hot[inverse.ravel()], modifiers[inverse.ravel()]
+
+
 @dataclass
 class LapPrediction:
     """Prediction results for lap times"""
@@ -22,6 +64,18 @@ class LapPrediction:
     model_used: str
 
 
+@dataclass
+class BatchPrediction:
+    """Prediction results for many laps (one array entry per input row)"""
+    predicted_time: np.ndarray
+    confidence: float
+    factors: Dict[str, np.ndarray]
+    model_used: str
+    
+    def __len__(self) -> int:
+        return len(self.predicted_time)
+
+
 class LapTimePredictor:
     """
     ML model for predicting lap times based on multiple factors:
@@ -50,17 +104,21 @@ class LapTimePredictor:
                          compound: str,
                          lap_number: int) -> np.ndarray:
         """Convert raw inputs to feature array"""
-        features = [
-            tire_age,
-            fuel_load,
-            track_position,
-            1 if compound == 'SOFT' else 0,
-            1 if compound == 'MEDIUM' else 0,
-            1 if compound == 'HARD' else 0,
-            lap_number
-        ]
+        one_hot = _ONE_HOT_TABLE[_ONE_HOT_INDEX.get(compound, len(ONE_HOT_COMPOUNDS))]
+        features = [tire_age, fuel_load, track_position, *one_hot, lap_number]
         return np.array(features).reshape(1, -1)
     
+    def prepare_features_batch(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Feature matrix (n, 7) in `feature_names` order from `_batch_columns` output"""
+        one_hot, _ = encode_compounds(columns['compound'])
+        return np.column_stack([
+            columns['tire_age'],
+            columns['fuel_load'],
+            columns['track_position'],
+            one_hot,
+            columns['lap_number'],
+        ])
+    
     def fit(self, X: np.ndarray, y: np.ndarray, use_polynomial: bool = True):
         """
         Train the prediction model
@@ -90,6 +148,60 @@ class LapTimePredictor:
             return np.mean(scores)
         return 0.0
     
+    def fit_chunks(self, chunks: Iterable[Tuple[np.ndarray, np.ndarray]],
+                   use_polynomial: bool = True, cv: int = 5) -> float:
+        """
+        Train on (X, y) chunks without holding the whole matrix
+        
+        Fits the same model as `fit` from merged per-chunk moments (means
+        and centered cross-products), which is all Ridge/least squares
+        needs. Each chunk is split into `cv` contiguous parts, one per
+        fold, so the cross-validation score comes out of the same pass.
+        
+        Args:
+            chunks: Iterable of (X, y) arrays, e.g. `FeatureSet.iter_chunks()`
+            use_polynomial: Whether to use polynomial features
+            cv: Number of folds
+            
+        Returns:
+            Mean cross-validated R² (0.0 with fewer than `cv` samples)
+        """
+        self.poly_features = None
+        folds = None
+        for X, y in chunks:
+            X = np.asarray(X, dtype=np.float64)
+            if use_polynomial and self.poly_features is None:
+                self.poly_features = PolynomialFeatures(degree=2, include_bias=False).fit(X[:1])
+            if self.poly_features is not None:
+                X = self.poly_features.transform(X)
+            Z = np.column_stack([X, y])
+            if folds is None:
+                folds = [_moments(Z[:0]) for _ in range(cv)]
+            for fold, part in enumerate(np.array_split(Z, cv)):
+                folds[fold] = _merge_moments(folds[fold], _moments(part))
+        if folds is None:
+            raise ValueError("No training chunks")
+        
+        total = reduce(_merge_moments, folds)
+        if total[0] == 0:
+            raise ValueError("No training samples")
+        alpha = 1.0 if use_polynomial else 0.0
+        coef, intercept = _solve_moments(total, alpha)
+        
+        self.model = Ridge(alpha=alpha) if use_polynomial else LinearRegression()
+        self.model.coef_, self.model.intercept_ = coef, intercept
+        self.model.n_features_in_ = len(coef)
+        self.base_lap_time = float(total[1][-1])
+        self.is_fitted = True
+        
+        if total[0] < cv:
+            return 0.0
+        scores = []
+        for held_out in range(cv):
+            train = reduce(_merge_moments, folds[:held_out] + folds[held_out + 1:])
+            scores.append(_r2_from_moments(folds[held_out], *_solve_moments(train, alpha)))
+        return float(np.mean(scores))
+    
     def predict(self, 
                 tire_age: int,
                 fuel_load: float = 100.0,
@@ -131,6 +243,75 @@ class LapTimePredictor:
             model_used='polynomial_regression'
         )
     
+    def predict_batch(self, inputs: Any) -> BatchPrediction:
+        """
+        Predict lap times for many laps in one call
+        
+        Same results as calling `predict` row by row, but with one feature
+        matrix, one polynomial transform and one `model.predict` call (or
+        array arithmetic for the analytical model).
+        
+        Args:
+            inputs: DataFrame or mapping of columns named like the `predict`
+                arguments; tire_age is required, missing columns take
+                `predict`'s defaults
+            
+        Returns:
+            BatchPrediction with arrays of predictions and factor contributions
+        """
+        columns = _batch_columns(inputs)
+        if not self.is_fitted:
+            return self._analytical_batch(columns)
+        
+        X = self.prepare_features_batch(columns)
+        if self.poly_features:
+            X = self.poly_features.transform(X)
+        predicted = self.model.predict(X)
+        
+        _, modifiers = encode_compounds(columns['compound'])
+        factors = {
+            'tire_degradation': columns['tire_age'] * 0.05,
+            'fuel_effect': -columns['fuel_load'] * 0.03,
+            'traffic_effect': np.maximum(0, (columns['track_position'] - 5) * 0.1),
+            'compound_modifier': modifiers
+        }
+        
+        return BatchPrediction(
+            predicted_time=np.round(predicted, 3),
+            confidence=0.85,
+            factors=factors,
+            model_used='polynomial_regression'
+        )
+    
+    def _analytical_batch(self, columns: Mapping[str, np.ndarray]) -> BatchPrediction:
+        """Vectorized `_analytical_prediction` (same terms, same order)"""
+        from race_sim import python_round
+        
+        tire_deg = columns['tire_age'] * 0.05
+        fuel_effect = (100 - columns['fuel_load']) * 0.03 / 100
+        traffic = np.maximum(0, (columns['track_position'] - 5) * 0.1)
+        _, compound_mod = encode_compounds(columns['compound'])
+        
+        predicted = (self.base_lap_time +
+                     tire_deg -
+                     fuel_effect +
+                     traffic +
+                     compound_mod)
+        
+        factors = {
+            'tire_degradation': tire_deg,
+            'fuel_effect': -fuel_effect,
+            'traffic_effect': traffic,
+            'compound_modifier': compound_mod
+        }
+        
+        return BatchPrediction(
+            predicted_time=python_round(predicted, 3),
+            confidence=0.6,
+            factors=factors,
+            model_used='analytical'
+        )
+    
     def _analytical_prediction(self,
                                tire_age: int,
                                fuel_load: float,
@@ -167,14 +348,58 @@ class LapTimePredictor:
     
     def _compound_modifier(self, compound: str) -> float:
         """Get lap time modifier for tire compound"""
-        modifiers = {
-            'SOFT': -0.8,    # Faster but degrades quickly
-            'MEDIUM': 0.0,   # Baseline
-            'HARD': 0.5,     # Slower but more durable
-            'INTERMEDIATE': 1.5,
-            'WET': 3.0
-        }
-        return modifiers.get(compound.upper(), 0.0)
+        return COMPOUND_MODIFIERS.get(compound.upper(), 0.0)
+
+
+def _moments(Z: np.ndarray) -> Tuple[int, np.ndarray, np.ndarray]:
+    """(count, column means, centered cross-product matrix) of the rows of Z"""
+    n = len(Z)
+    if not n:
+        return 0, np.zeros(Z.shape[1]), np.zeros((Z.shape[1], Z.shape[1]))
+    mean = Z.mean(axis=0)
+    centered = Z - mean
+    return n, mean, centered.T @ centered
+
+
+def _merge_moments(a: Tuple, b: Tuple) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Moments of the union of two row sets (pairwise update, no raw sums)"""
+    (na, mean_a, m_a), (nb, mean_b, m_b) = a, b
+    if not na or not nb:
+        return b if not na else a
+    n = na + nb
+    delta = mean_b - mean_a
+    return n, mean_a + delta * nb / n, m_a + m_b + np.outer(delta, delta) * (na * nb / n)
+
+
+def _solve_moments(stats: Tuple, alpha: float) -> Tuple[np.ndarray, float]:
+    """Ridge (least squares for alpha=0) coefficients and intercept from moments"""
+    _, mean, m = stats
+    gram, cross = m[:-1, :-1], m[:-1, -1]
+    coef = np.linalg.lstsq(gram + alpha * np.eye(len(gram)), cross, rcond=None)[0]
+    return coef, float(mean[-1] - mean[:-1] @ coef)
+
+
+def _r2_from_moments(stats: Tuple, coef: np.ndarray, intercept: float) -> float:
+    """R² of a linear model on the rows summarized by `stats`"""
+    n, mean, m = stats
+    gram, cross, total = m[:-1, :-1], m[:-1, -1], m[-1, -1]
+    bias = mean[-1] - intercept - mean[:-1] @ coef
+    sse = total - 2 * coef @ cross + coef @ gram @ coef + n * bias ** 2
+    return float(1 - sse / total) if total else 0.0
+
+
+def _batch_columns(inputs: Any) -> Dict[str, np.ndarray]:
+    """`predict_batch` inputs -> equal-length column arrays (defaults filled in)"""
+    if 'tire_age' not in inputs:
+        raise ValueError("tire_age column is required")
+    n = len(np.atleast_1d(np.asarray(inputs['tire_age'])))
+    columns = {}
+    for name, default in PREDICT_INPUTS.items():
+        values = np.asarray(inputs[name]) if name in inputs else np.asarray(default)
+        if name != 'compound':
+            values = values.astype(np.float64) if values.dtype.kind == 'O' else values
+        columns[name] = np.broadcast_to(values, (n,))
+    return columns
 
 
 def predict_race_strategy(
@@ -189,7 +414,10 @@ def predict_race_strategy(
     Returns:
         Strategy recommendation with pit stops and compound choices
     """
+    from race_sim import simulate_strategies
+
     strategies = []
+    stints = []
     
     # 1-stop strategy
     if total_laps <= 50:
@@ -198,14 +426,9 @@ def predict_race_strategy(
         strategies.append({
             'name': '1-Stop',
             'stops': [stint1_laps],
-            'compounds': ['MEDIUM', 'HARD'],
-            'estimated_time': _calculate_race_time(
-                [stint1_laps, stint2_laps],
-                ['MEDIUM', 'HARD'],
-                base_lap_time,
-                pit_stop_time
-            )
+            'compounds': ['MEDIUM', 'HARD']
         })
+        stints.append([stint1_laps, stint2_laps])
     
     # 2-stop strategy
     stint1 = total_laps // 3
@@ -214,27 +437,24 @@ def predict_race_strategy(
     strategies.append({
         'name': '2-Stop',
         'stops': [stint1, stint1 + stint2],
-        'compounds': ['SOFT', 'MEDIUM', 'HARD'],
-        'estimated_time': _calculate_race_time(
-            [stint1, stint2, stint3],
-            ['SOFT', 'MEDIUM', 'HARD'],
-            base_lap_time,
-            pit_stop_time
-        )
+        'compounds': ['SOFT', 'MEDIUM', 'HARD']
     })
+    stints.append([stint1, stint2, stint3])
     
     # Aggressive strategy
     strategies.append({
         'name': 'Aggressive',
         'stops': [total_laps // 4, total_laps // 2, 3 * total_laps // 4],
-        'compounds': ['SOFT', 'SOFT', 'SOFT', 'MEDIUM'],
-        'estimated_time': _calculate_race_time(
-            [total_laps // 4, total_laps // 4, total_laps // 4, total_laps - 3 * (total_laps // 4)],
-            ['SOFT', 'SOFT', 'SOFT', 'MEDIUM'],
-            base_lap_time,
-            pit_stop_time
-        )
+        'compounds': ['SOFT', 'SOFT', 'SOFT', 'MEDIUM']
     })
+    stints.append([total_laps // 4, total_laps // 4, total_laps // 4,
+                   total_laps - 3 * (total_laps // 4)])
+    
+    # All candidates in one vectorized pass
+    times = simulate_strategies(stints, [s['compounds'] for s in strategies],
+                                base_lap_time, pit_stop_time)
+    for strategy, estimated_time in zip(strategies, times):
+        strategy['estimated_time'] = estimated_time
     
     # Find optimal
     optimal = min(strategies, key=lambda x: x['estimated_time'])
@@ -254,7 +474,12 @@ def _calculate_race_time(stints: List[int],
                          compounds: List[str],
                          base_time: float,
                          pit_time: float) -> float:
-    """Calculate total race time for a strategy"""
+    """
+    Calculate total race time for a strategy
+    
+    Scalar reference implementation; `race_sim.race_times` computes the
+    same totals for many strategies at once.
+    """
     predictor = LapTimePredictor()
     predictor.base_lap_time = base_time
     
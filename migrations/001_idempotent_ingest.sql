@@ -0,0 +1,48 @@
+-- Migration 001: idempotent re-ingest
+-- Brings a database created from the original schema.sql up to date.
+-- Removes duplicates left by running process_monaco.py more than once,
+-- then adds the unique keys and fingerprint columns used by ingest.py.
+
+BEGIN;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE laps ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32);
+
+CREATE TABLE IF NOT EXISTS driver_fingerprints (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    content_hash VARCHAR(32) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code)
+);
+
+-- Keep the oldest copy of each duplicated session
+CREATE TEMP TABLE duplicate_sessions ON COMMIT DROP AS
+SELECT session_id FROM (
+    SELECT session_id, ROW_NUMBER() OVER (
+        PARTITION BY year, event_name, session_type ORDER BY created_at, session_id
+    ) AS rn
+    FROM sessions
+) s WHERE rn > 1;
+
+-- ...and the oldest copy of each duplicated lap
+CREATE TEMP TABLE duplicate_laps ON COMMIT DROP AS
+SELECT lap_id FROM laps WHERE session_id IN (SELECT session_id FROM duplicate_sessions)
+UNION
+SELECT lap_id FROM (
+    SELECT lap_id, ROW_NUMBER() OVER (
+        PARTITION BY session_id, driver_code, lap_number ORDER BY created_at, lap_id
+    ) AS rn
+    FROM laps
+) l WHERE rn > 1;
+
+DELETE FROM telemetry WHERE lap_id IN (SELECT lap_id FROM duplicate_laps);
+DELETE FROM laps WHERE lap_id IN (SELECT lap_id FROM duplicate_laps);
+DELETE FROM sessions WHERE session_id IN (SELECT session_id FROM duplicate_sessions);
+
+DROP INDEX IF EXISTS idx_sessions_lookup;
+DROP INDEX IF EXISTS idx_laps_lookup;
+CREATE UNIQUE INDEX idx_sessions_lookup ON sessions(year, event_name, session_type);
+CREATE UNIQUE INDEX idx_laps_lookup ON laps(session_id, driver_code, lap_number);
+
+COMMIT;
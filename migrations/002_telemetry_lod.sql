@@ -0,0 +1,10 @@
+-- Migration 002: telemetry level-of-detail tiers
+-- Adds telemetry.lod_tier, which ingest.py fills in for new data.
+-- Existing rows start at full resolution only; compute their tiers with:
+--     python downsample.py
+
+BEGIN;
+
+ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS lod_tier SMALLINT NOT NULL DEFAULT 4;
+
+COMMIT;
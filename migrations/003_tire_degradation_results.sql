@@ -0,0 +1,26 @@
+-- Migration 003: memoized tire degradation results
+-- Results are filled lazily by the tire-analysis and pit-strategy endpoints.
+
+BEGIN;
+
+-- Memoized tire degradation fits per stint (degradation_store.py).
+-- stint_number 0 holds the whole-race fit used by /api/pit-strategy.
+CREATE TABLE IF NOT EXISTS tire_degradation_results (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,
+    method VARCHAR(10) NOT NULL,  -- 'scipy' or 'batch'
+    start_lap INTEGER,
+    end_lap INTEGER,
+    input_hash VARCHAR(32) NOT NULL,  -- lap times + compound + method + model version
+    compound VARCHAR(20),
+    degradation_rate FLOAT,
+    optimal_stint_length INTEGER,
+    cliff_lap INTEGER,
+    performance_loss_percent FLOAT,
+    strategy_recommendation TEXT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code, stint_number, method)
+);
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- Migration 004: partitioned, compact telemetry
+-- Gives sessions and laps integer keys and replaces `telemetry` with a table
+-- partitioned by session_key: integer keys instead of UUIDs, no per-row
+-- created_at, narrow column types and a BRIN index instead of two B-trees.
+-- The old table is kept as telemetry_legacy; copy it into the partitions
+-- (one session per transaction, resumable) and drop it with:
+--     python telemetry_store.py migrate --drop-legacy
+
+BEGIN;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS session_key INTEGER GENERATED BY DEFAULT AS IDENTITY;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_key ON sessions(session_key);
+ALTER TABLE laps ADD COLUMN IF NOT EXISTS lap_key INTEGER GENERATED BY DEFAULT AS IDENTITY;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_laps_key ON laps(lap_key);
+
+ALTER TABLE telemetry RENAME TO telemetry_legacy;
+ALTER INDEX IF EXISTS idx_telemetry_lookup RENAME TO idx_telemetry_legacy_lookup;
+
+CREATE TABLE telemetry (
+    session_key INTEGER NOT NULL,
+    lap_key INTEGER NOT NULL,
+    sample INTEGER NOT NULL,  -- position in the lap, in distance order
+    distance REAL NOT NULL,
+    speed SMALLINT,
+    throttle SMALLINT,
+    brake BOOLEAN,
+    drs SMALLINT,
+    gear SMALLINT,
+    rpm SMALLINT,
+    position_x REAL,
+    position_y REAL,
+    lod_tier SMALLINT NOT NULL DEFAULT 4
+) PARTITION BY LIST (session_key);
+
+CREATE INDEX idx_telemetry_lap ON telemetry USING brin (lap_key)
+    WITH (pages_per_range = 4, autosummarize = on);
+
+COMMIT;
@@ -0,0 +1,44 @@
+-- Migration 005: materialized session summaries
+-- Refreshed by bulk_loader.write_session at ingest; run
+-- `python session_summary.py` once to fill them for sessions already loaded.
+
+BEGIN;
+
+-- Each driver's fastest timed lap per session (session_summary.py)
+CREATE TABLE IF NOT EXISTS session_fastest_laps (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    lap_id UUID NOT NULL,
+    lap_number INTEGER NOT NULL,
+    lap_time_seconds FLOAT NOT NULL,
+    tire_compound VARCHAR(20),
+    tire_life INTEGER,
+    PRIMARY KEY (session_id, driver_code)
+);
+
+-- Stints as segmented by /api/tire-analysis; compound usage is aggregated from these
+CREATE TABLE IF NOT EXISTS session_stints (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,  -- from 1
+    compound VARCHAR(20) NOT NULL,
+    start_lap INTEGER NOT NULL,
+    end_lap INTEGER NOT NULL,
+    laps INTEGER NOT NULL,  -- start_lap..end_lap, untimed laps included
+    clean_laps INTEGER NOT NULL,  -- laps averaged into avg_lap_time
+    avg_lap_time FLOAT,
+    best_lap_time FLOAT,
+    PRIMARY KEY (session_id, driver_code, stint_number)
+);
+
+-- Running position and gap to the leader at the end of each lap
+CREATE TABLE IF NOT EXISTS session_positions (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    lap_number INTEGER NOT NULL,
+    position SMALLINT NOT NULL,
+    gap_to_leader FLOAT,
+    PRIMARY KEY (session_id, driver_code, lap_number)
+);
+
+COMMIT;
@@ -0,0 +1,269 @@
+"""
+Trained LapTimePredictor registry
+Trains one model per circuit and season from the laps table and stores
+each fit as a numbered version on disk with its feature schema and
+metrics. Models are loaded lazily (arrays memory-mapped) and kept warm
+in an in-process LRU, so serving a prediction never refits.
+
+Layout: <MODEL_REGISTRY_DIR>/<circuit-slug>/<season>/v<N>/{model.joblib,meta.json}
+plus a LATEST file per circuit/season naming the current version.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import sklearn
+
+from lap_features import CHUNK_ROWS, build_feature_set, sessions_for
+from lap_predictor import LapTimePredictor
+
+# Bump when the meaning or order of the model inputs changes; models with a
+# different schema are refused at load time
+FEATURE_SCHEMA_VERSION = 1
+
+
+class ModelNotFoundError(LookupError):
+    """Raised when no trained model exists for a circuit/season (or version)"""
+
+
+@dataclass
+class ModelInfo:
+    """Everything stored next to a fitted model"""
+    circuit: str
+    season: int
+    version: int
+    feature_names: List[str]
+    feature_schema_version: int
+    metrics: Dict[str, float]
+    sessions: List[str]
+    trained_at: float
+    sklearn_version: str = field(default_factory=lambda: sklearn.__version__)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def circuit_slug(circuit: str) -> str:
+    """'Monaco Grand Prix' -> 'monaco-grand-prix'"""
+    return re.sub(r'[^a-z0-9]+', '-', circuit.lower()).strip('-')
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store of fitted predictors with a warm LRU
+
+    Saving writes a new version directory and then swaps the LATEST pointer
+    atomically, so readers never see a half-written model.
+    """
+
+    def __init__(self, root: str, cache_size: int = 16):
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[str, int, int], Tuple[LapTimePredictor, ModelInfo]]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {'hits': 0, 'loads': 0, 'evictions': 0, 'load_seconds_total': 0.0}
+
+    def _dir(self, circuit: str, season: int) -> Path:
+        return self.root / circuit_slug(circuit) / str(season)
+
+    def latest_version(self, circuit: str, season: int) -> Optional[int]:
+        try:
+            return int((self._dir(circuit, season) / 'LATEST').read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, predictor: LapTimePredictor, circuit: str, season: int,
+             metrics: Dict[str, float], sessions: Sequence[str]) -> ModelInfo:
+        """Store a fitted predictor as the next version and make it current"""
+        base = self._dir(circuit, season)
+        base.mkdir(parents=True, exist_ok=True)
+        versions = [int(p.name[1:]) for p in base.glob('v*') if p.name[1:].isdigit()]
+        version = max(versions, default=0) + 1
+
+        info = ModelInfo(
+            circuit=circuit, season=season, version=version,
+            feature_names=list(predictor.feature_names),
+            feature_schema_version=FEATURE_SCHEMA_VERSION,
+            metrics=metrics, sessions=list(sessions), trained_at=time.time(),
+        )
+        target = base / f'v{version}'
+        target.mkdir()
+        # Uncompressed so the arrays can be memory-mapped on load
+        joblib.dump(predictor, target / 'model.joblib')
+        (target / 'meta.json').write_text(json.dumps(info.to_dict(), indent=2))
+
+        pointer = base / 'LATEST.tmp'
+        pointer.write_text(str(version))
+        os.replace(pointer, base / 'LATEST')
+        return info
+
+    def load(self, circuit: str, season: int,
+             version: Optional[int] = None) -> Tuple[LapTimePredictor, ModelInfo]:
+        """
+        Fitted predictor and its metadata (latest version by default)
+
+        Raises:
+            ModelNotFoundError: No such model
+            ValueError: The stored feature schema does not match this code
+        """
+        if version is None:
+            version = self.latest_version(circuit, season)
+            if version is None:
+                raise ModelNotFoundError(f"No model for {circuit} {season}")
+        key = (circuit_slug(circuit), season, version)
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.metrics['hits'] += 1
+                return entry
+
+        started = time.perf_counter()
+        path = self._dir(circuit, season) / f'v{version}'
+        try:
+            info = ModelInfo(**json.loads((path / 'meta.json').read_text()))
+        except FileNotFoundError:
+            raise ModelNotFoundError(f"No model v{version} for {circuit} {season}")
+        predictor = joblib.load(path / 'model.joblib', mmap_mode='r')
+        if (info.feature_schema_version != FEATURE_SCHEMA_VERSION
+                or info.feature_names != predictor.feature_names):
+            raise ValueError(f"Model {circuit} {season} v{version} was trained on feature "
+                             f"schema {info.feature_schema_version}; retrain it")
+
+        with self._lock:
+            self._cache[key] = (predictor, info)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.metrics['evictions'] += 1
+            self.metrics['loads'] += 1
+            self.metrics['load_seconds_total'] += time.perf_counter() - started
+        return predictor, info
+
+    def list_models(self) -> List[ModelInfo]:
+        """Metadata of every stored version"""
+        return [ModelInfo(**json.loads(meta.read_text()))
+                for meta in sorted(self.root.glob('*/*/v*/meta.json'))]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.metrics, 'warm_models': len(self._cache),
+                    'cache_size': self.cache_size, 'root': str(self.root)}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Process-wide model registry
+
+    Configured by MODEL_REGISTRY_DIR (default ./models) and
+    MODEL_REGISTRY_CACHE_SIZE (warm models kept in memory).
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    root=os.getenv('MODEL_REGISTRY_DIR', 'models'),
+                    cache_size=int(os.getenv('MODEL_REGISTRY_CACHE_SIZE', 16)),
+                )
+    return _registry
+
+
+def train_model(cursor, circuit: str, season: int,
+                session_types: Sequence[str] = ('R',),
+                use_polynomial: bool = True,
+                registry: Optional[ModelRegistry] = None) -> ModelInfo:
+    """
+    Fit a predictor on every lap of a circuit/season and store it
+
+    Features come from the cached `lap_features` pipeline; sets larger
+    than one chunk are fitted chunk by chunk (`fit_chunks`) so memory
+    stays bounded.
+
+    Raises:
+        ModelNotFoundError: No sessions or no usable laps to train on
+    """
+    sessions = sessions_for(cursor, circuit, season, session_types)
+    if not sessions:
+        raise ModelNotFoundError(f"No {'/'.join(session_types)} sessions for {circuit} {season}")
+    feature_set = build_feature_set(cursor.connection, sessions)
+    if feature_set.n_rows < 5:
+        raise ModelNotFoundError(f"Only {feature_set.n_rows} usable laps for {circuit} {season}")
+
+    predictor = LapTimePredictor()
+    if feature_set.n_rows <= CHUNK_ROWS:
+        cv_r2 = predictor.fit(*feature_set.load(), use_polynomial=use_polynomial)
+    else:
+        cv_r2 = predictor.fit_chunks(feature_set.iter_chunks(), use_polynomial=use_polynomial)
+
+    squared = absolute = 0.0
+    for X, y in feature_set.iter_chunks():
+        residuals = predictor.model.predict(predictor.poly_features.transform(X)
+                                            if predictor.poly_features else X) - y
+        squared += float(residuals @ residuals)
+        absolute += float(np.abs(residuals).sum())
+    metrics = {
+        'cv_r2': float(cv_r2),
+        'train_rmse': float(np.sqrt(squared / feature_set.n_rows)),
+        'train_mae': absolute / feature_set.n_rows,
+        'n_samples': int(feature_set.n_rows),
+    }
+    return (registry or get_registry()).save(predictor, circuit, season, metrics, sessions)
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from storage import connect
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Train and list lap time models")
+    sub = parser.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help="Train a model for one circuit and season")
+    train.add_argument('--circuit', required=True, help="sessions.event_name, e.g. Monaco")
+    train.add_argument('--season', type=int, required=True)
+    train.add_argument('--session-types', nargs='+', default=['R'])
+    train.add_argument('--linear', action='store_true', help="Plain linear model")
+    sub.add_parser('list', help="List stored models")
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for info in get_registry().list_models():
+            print(f"📦 {info.circuit} {info.season} v{info.version}: "
+                  f"{info.metrics['n_samples']} laps, RMSE {info.metrics['train_rmse']:.3f}s, "
+                  f"CV R² {info.metrics['cv_r2']:.3f}")
+        return
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    conn = connect(db_config)
+    try:
+        info = train_model(conn.cursor(), args.circuit, args.season,
+                           args.session_types, use_polynomial=not args.linear)
+        print(f"✅ {info.circuit} {info.season} v{info.version}: {info.metrics}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Monte Carlo race strategy simulation
+Randomized race rollouts (safety cars, pit-stop variance, degradation
+uncertainty, lap-to-lap noise) for several strategies at once, vectorized
+over rollouts and sharded across a process pool with reproducible seeding.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lap_predictor import LapTimePredictor
+from tire_analysis import TireDegradation, degradation_model
+
+# Rollouts per shard; fixed so results depend only on the seed, not on the
+# number of workers
+SHARD_ROLLOUTS = 20_000
+MAX_ROLLOUTS = 1_000_000
+
+# Mean wear (seconds per lap of tire age) and cliff onset per compound
+DEFAULT_DEGRADATION = {'SOFT': 0.10, 'MEDIUM': 0.06, 'HARD': 0.035,
+                       'INTERMEDIATE': 0.08, 'WET': 0.05}
+DEFAULT_CLIFF_START = {'SOFT': 20, 'MEDIUM': 32, 'HARD': 45,
+                       'INTERMEDIATE': 25, 'WET': 30}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 50
+
+
+@dataclass
+class RaceConditions:
+    """Race length, lap model inputs and the random event parameters"""
+    total_laps: int
+    base_lap_time: float
+    track_position: int = 5
+    lap_time_sd: float = 0.3                   # s, lap-to-lap noise
+    pit_time: float = 22.0                     # s, mean pit lane loss
+    pit_time_sd: float = 0.8
+    slow_stop_probability: float = 0.05        # per stop
+    slow_stop_loss: float = 5.0                # s added by a slow stop
+    safety_cars_per_race: float = 0.6          # expected deployments
+    safety_car_laps: Tuple[int, int] = (3, 5)  # duration range (inclusive)
+    safety_car_slowdown: float = 0.35          # lap time factor under SC
+    safety_car_pit_factor: float = 0.5         # share of pit loss under SC
+    degradation: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_DEGRADATION))
+    degradation_sd: float = 0.2                # relative, per rollout
+    cliff_start: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_CLIFF_START))
+    cliff_start_sd: float = 3.0                # laps, per rollout
+    cliff_factor: float = 0.01                 # s / lap^2 past the cliff
+
+
+@dataclass
+class StrategyDistribution:
+    """Finish-time distribution of one strategy"""
+    stints: List[int]
+    compounds: List[str]
+    mean: float
+    std: float
+    percentiles: Dict[str, float]
+    win_probability: float
+    histogram: List[int]
+
+    def to_dict(self) -> Dict:
+        return {
+            'stints': self.stints,
+            'stops': np.cumsum(self.stints[:-1]).tolist(),
+            'compounds': self.compounds,
+            'mean': round(self.mean, 3),
+            'std': round(self.std, 3),
+            'percentiles': {k: round(v, 3) for k, v in self.percentiles.items()},
+            'win_probability': round(self.win_probability, 4),
+            'histogram': self.histogram,
+        }
+
+
+@dataclass
+class MonteCarloResult:
+    """Distributions of all strategies over the same rollouts"""
+    n_rollouts: int
+    seed: int
+    strategies: List[StrategyDistribution]
+    histogram_edges: List[float]
+    elapsed_seconds: float
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.n_rollouts / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'n_rollouts': self.n_rollouts,
+            'seed': self.seed,
+            'strategies': [s.to_dict() for s in self.strategies],
+            'histogram_edges': [round(e, 3) for e in self.histogram_edges],
+            'elapsed_seconds': round(self.elapsed_seconds, 4),
+            'rollouts_per_second': round(self.rollouts_per_second, 1),
+        }
+
+
+def degradation_from_analyses(analyses: Sequence[TireDegradation]) -> Tuple[Dict[str, float],
+                                                                               Dict[str, float]]:
+    """
+    Per-compound mean wear and cliff onset from fitted stints
+
+    Compounds without fitted stints keep the defaults.
+
+    Returns:
+        (degradation, cliff_start) dicts for `RaceConditions`
+    """
+    degradation, cliff_start = dict(DEFAULT_DEGRADATION), dict(DEFAULT_CLIFF_START)
+    for compound in {a.compound for a in analyses}:
+        fitted = [a for a in analyses if a.compound == compound]
+        degradation[compound] = float(np.mean([max(a.degradation_rate, 0.0) for a in fitted]))
+        cliffs = [a.cliff_lap for a in fitted if a.cliff_lap]
+        if cliffs:
+            cliff_start[compound] = float(np.median(cliffs))
+    return degradation, cliff_start
+
+
+def fresh_tire_lap_times(conditions: RaceConditions, compounds: Sequence[str],
+                         predictor: Optional[LapTimePredictor] = None) -> np.ndarray:
+    """
+    Lap time on new tires for every (compound, lap), from `LapTimePredictor`
+
+    Evaluated once per simulation at tire age 0 with the race's fuel load;
+    tire wear is added per rollout with `degradation_model`.
+
+    Returns:
+        (len(compounds), total_laps) array
+    """
+    if predictor is None:
+        predictor = LapTimePredictor()
+        predictor.base_lap_time = conditions.base_lap_time
+    fuel_per_lap = 100.0 / conditions.total_laps
+    return np.array([
+        [predictor.predict(tire_age=0, fuel_load=100.0 - lap * fuel_per_lap,
+                           track_position=conditions.track_position,
+                           compound=compound, lap_number=lap).predicted_time
+         for lap in range(conditions.total_laps)]
+        for compound in compounds
+    ])
+
+
+@dataclass
+class _Plan:
+    """Strategies laid out lap by lap (the picklable input of a shard)"""
+    conditions: RaceConditions
+    compounds: List[str]            # distinct compounds, indexes the columns below
+    fresh: np.ndarray               # (C, L) fresh-tire lap times
+    lap_compound: np.ndarray        # (S, L) compound index per lap
+    tire_age: np.ndarray            # (S, L)
+    pit_laps: List[np.ndarray]      # per strategy, laps after which it pits
+
+
+def _safety_car_laps(rng: np.random.Generator, n: int, conditions: RaceConditions) -> np.ndarray:
+    """(n, L) mask of laps run behind the safety car"""
+    n_laps = conditions.total_laps
+    shortest, longest = conditions.safety_car_laps
+    rollout, lap = np.nonzero(rng.random((n, n_laps)) < conditions.safety_cars_per_race / n_laps)
+    duration = rng.integers(shortest, longest + 1, size=len(lap))
+    mask = np.zeros((n, n_laps), dtype=bool)
+    for offset in range(longest):
+        covered = (duration > offset) & (lap + offset < n_laps)
+        mask[rollout[covered], lap[covered] + offset] = True
+    return mask
+
+
+def _simulate_shard(plan: _Plan, seed: np.random.SeedSequence, n: int) -> np.ndarray:
+    """
+    Finish times of every strategy over `n` rollouts
+
+    Safety cars, each compound's wear rate and cliff onset are drawn once per
+    rollout and shared by all strategies (same race, different plans); lap
+    noise and pit-stop times are drawn per strategy. Lap noise is independent
+    per lap, so its sum over the green-flag laps is drawn directly as one
+    normal per rollout.
+
+    Returns:
+        (S, n) finish times in seconds
+    """
+    cond = plan.conditions
+    rng = np.random.default_rng(seed)
+    n_compounds = len(plan.compounds)
+
+    mean_rate = np.array([cond.degradation.get(c, DEFAULT_DEGRADATION['MEDIUM'])
+                          for c in plan.compounds])
+    rates = np.maximum(mean_rate * (1 + cond.degradation_sd * rng.standard_normal((n, n_compounds))),
+                       0.0)
+    cliff_mean = np.array([cond.cliff_start.get(c, DEFAULT_CLIFF_START['MEDIUM'])
+                           for c in plan.compounds])
+    cliffs = cliff_mean + cond.cliff_start_sd * rng.standard_normal((n, n_compounds))
+
+    safety_car = _safety_car_laps(rng, n, cond)
+    green = (~safety_car).astype(np.float64)
+    green_laps = green.sum(axis=1)
+    sc_time = (cond.total_laps - green_laps) * cond.base_lap_time * (1 + cond.safety_car_slowdown)
+
+    laps = np.arange(cond.total_laps)
+    finish = np.empty((len(plan.lap_compound), n))
+    for s, (compound, age, pits) in enumerate(zip(plan.lap_compound, plan.tire_age, plan.pit_laps)):
+        wear = degradation_model(age, 0.0, rates[:, compound], cond.cliff_factor, cliffs[:, compound])
+        racing = green @ plan.fresh[compound, laps] + np.einsum('ij,ij->i', wear, green)
+        noise = cond.lap_time_sd * np.sqrt(green_laps) * rng.standard_normal(n)
+
+        stop_loss = cond.pit_time + cond.pit_time_sd * rng.standard_normal((n, len(pits)))
+        stop_loss += cond.slow_stop_loss * (rng.random((n, len(pits))) < cond.slow_stop_probability)
+        # Pitting under the safety car loses less time to the field
+        stop_loss *= np.where(safety_car[:, pits], cond.safety_car_pit_factor, 1.0)
+        finish[s] = racing + noise + sc_time + stop_loss.sum(axis=1)
+    return finish
+
+
+def _simulate_task(args: Tuple[_Plan, np.random.SeedSequence, int]) -> np.ndarray:
+    return _simulate_shard(*args)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared worker pool for rollouts (None when running single-process)
+
+    Sized by MONTE_CARLO_WORKERS (default: CPU count); spawned, like the
+    tire analysis pool, so it is safe to create from threaded servers.
+    """
+    global _executor
+    workers = int(os.getenv('MONTE_CARLO_WORKERS', os.cpu_count() or 1))
+    if workers <= 1:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _plan(stints: Sequence[Sequence[int]], compounds: Sequence[Sequence[str]],
+          conditions: RaceConditions, predictor: Optional[LapTimePredictor]) -> _Plan:
+    names = sorted({c.upper() for seq in compounds for c in seq})
+    index = {c: i for i, c in enumerate(names)}
+    lap_compound, tire_age, pit_laps = [], [], []
+    for laps, fitted in zip(stints, compounds):
+        if sum(laps) != conditions.total_laps or len(laps) != len(fitted) or min(laps) < 1:
+            raise ValueError(f"Strategy {list(laps)} / {list(fitted)} does not cover "
+                             f"{conditions.total_laps} laps")
+        lap_compound.append(np.repeat([index[c.upper()] for c in fitted], laps))
+        tire_age.append(np.concatenate([np.arange(n) for n in laps]))
+        # The in-lap of each stop is the last lap of the stint
+        pit_laps.append(np.cumsum(laps[:-1]).astype(np.int64) - 1)
+    return _Plan(conditions, names, fresh_tire_lap_times(conditions, names, predictor),
+                 np.array(lap_compound), np.array(tire_age), pit_laps)
+
+
+def simulate_race_strategies(stints: Sequence[Sequence[int]],
+                             compounds: Sequence[Sequence[str]],
+                             conditions: RaceConditions,
+                             n_rollouts: int = 10_000,
+                             seed: int = 0,
+                             predictor: Optional[LapTimePredictor] = None,
+                             parallel: bool = True) -> MonteCarloResult:
+    """
+    Finish-time distributions and win probabilities of several strategies
+
+    Rollouts are split into fixed-size shards, each seeded from
+    `SeedSequence(seed).spawn`, so a seed always gives the same result
+    whether shards run in-process or on the worker pool.
+
+    Args:
+        stints: Stint lengths per strategy (each summing to total_laps)
+        compounds: Compound per stint, per strategy
+        conditions: Race and randomness parameters
+        n_rollouts: Races simulated per strategy
+        seed: Root seed
+        predictor: Lap model for fresh-tire laps (default: analytical
+            `LapTimePredictor` at the race's base lap time)
+        parallel: Use the worker pool when one is configured
+
+    Returns:
+        MonteCarloResult; a strategy "wins" a rollout when it finishes
+        first among the strategies given
+    """
+    if not 1 <= n_rollouts <= MAX_ROLLOUTS:
+        raise ValueError(f"n_rollouts must be between 1 and {MAX_ROLLOUTS}")
+    if not stints:
+        raise ValueError("At least one strategy is required")
+
+    started = time.perf_counter()
+    plan = _plan(stints, compounds, conditions, predictor)
+    sizes = [SHARD_ROLLOUTS] * (n_rollouts // SHARD_ROLLOUTS)
+    if n_rollouts % SHARD_ROLLOUTS:
+        sizes.append(n_rollouts % SHARD_ROLLOUTS)
+    shards = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    tasks = [(plan, shard_seed, n) for shard_seed, n in shards]
+    executor = _get_executor() if parallel and len(tasks) > 1 else None
+    try:
+        parts = list(executor.map(_simulate_task, tasks) if executor
+                     else map(_simulate_task, tasks))
+    except BrokenProcessPool:
+        # A worker died; drop the pool (the next call starts a new one) and finish here
+        _reset_executor()
+        parts = [_simulate_task(task) for task in tasks]
+    finish = np.concatenate(parts, axis=1)
+
+    wins = np.bincount(finish.argmin(axis=0), minlength=len(finish)) / n_rollouts
+    edges = np.histogram_bin_edges(finish, bins=HISTOGRAM_BINS)
+    quantiles = np.percentile(finish, PERCENTILES, axis=1)
+    distributions = [
+        StrategyDistribution(
+            stints=list(map(int, stints[s])),
+            compounds=[c.upper() for c in compounds[s]],
+            mean=float(finish[s].mean()),
+            std=float(finish[s].std()),
+            percentiles={f'p{p}': float(q) for p, q in zip(PERCENTILES, quantiles[:, s])},
+            win_probability=float(wins[s]),
+            histogram=np.histogram(finish[s], bins=edges)[0].tolist(),
+        )
+        for s in range(len(finish))
+    ]
+    return MonteCarloResult(n_rollouts, seed, distributions, edges.tolist(),
+                            time.perf_counter() - started)
@@ -0,0 +1,229 @@
+"""
+Vectorized race-time simulator
+Evaluates whole races, or many candidate strategies at once, with the same
+analytical lap model as `LapTimePredictor._analytical_prediction` and the
+same arithmetic as `lap_predictor._calculate_race_time`, so totals match
+it exactly.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lap_predictor import COMPOUND_MODIFIERS
+
+TIRE_DEG_PER_LAP = 0.05   # s per lap of tire age
+FUEL_EFFECT = 0.03        # s per 100% of fuel burned
+TRAFFIC_PER_PLACE = 0.1   # s per place behind P5
+DEFAULT_TRACK_POSITION = 5
+
+
+def python_round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Element-wise `round(x, ndigits)` with Python's exact semantics
+
+    `np.round` rounds the already-rounded product x * 10**ndigits, which can
+    land on the wrong side of a decimal midpoint. Here the rounding error of
+    that product is recovered exactly (Dekker's two-product), so the side is
+    decided on the exact value, as Python's correctly rounded `round` does.
+    Only valid while |x| * 10**ndigits stays well below 2**52, which lap and
+    race times always do.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    product = values * scale
+    split = values * 134217729.0  # 2**27 + 1
+    high = split - (split - values)
+    low = values - high
+    error = (high * scale - product) + low * scale
+    floor = np.floor(product)
+    above = (product - (floor + 0.5)) + error
+    # Exact binary ties (e.g. 0.125 at ndigits=2) round half to even
+    up = (above > 0) | ((above == 0) & (floor % 2 == 1))
+    return (floor + up) / scale
+
+
+def compound_modifiers(compounds: Sequence[str]) -> np.ndarray:
+    """Compound names -> lap time modifiers (unknown compounds count as 0.0)"""
+    return np.array([COMPOUND_MODIFIERS.get(c.upper(), 0.0) for c in compounds],
+                    dtype=np.float64)
+
+
+def encode_strategies(stints: Sequence[Sequence[int]],
+                      compounds: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ragged strategy lists -> padded (n_strategies, max_stints) arrays
+
+    Returns:
+        (stint lengths, compound modifiers, stint count per strategy);
+        padding stints have length 0
+    """
+    counts = np.array([len(s) for s in stints], dtype=np.int64)
+    width = max(int(counts.max(initial=0)), 1)
+    filled = np.arange(width) < counts[:, None]
+    lengths = np.zeros((len(stints), width), dtype=np.int64)
+    modifiers = np.zeros((len(stints), width), dtype=np.float64)
+    lengths[filled] = [laps for stint in stints for laps in stint]
+    modifiers[filled] = [COMPOUND_MODIFIERS.get(name.upper(), 0.0)
+                         for names in compounds for name in names]
+    return lengths, modifiers, counts
+
+
+def stint_lap_layout(lengths: np.ndarray, stint_values: Optional[np.ndarray] = None
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-lap tire age and stint value for strategies of the same race length
+
+    Args:
+        lengths: (S, K) stint lengths whose rows all sum to the same total L
+        stint_values: (S, K) per-stint values to spread over the laps
+            (default: the stint index)
+
+    Returns:
+        (tire_age (S, L), stint value (S, L))
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n, width = lengths.shape
+    total = int(lengths[0].sum()) if n else 0
+    flat = lengths.ravel()
+    if stint_values is None:
+        stint_values = np.broadcast_to(np.arange(width), lengths.shape)
+    per_lap = np.repeat(np.asarray(stint_values).ravel(), flat).reshape(n, total)
+    starts = (np.cumsum(lengths, axis=1) - lengths).ravel()
+    tire_age = np.arange(total) - np.repeat(starts, flat).reshape(n, total)
+    return tire_age, per_lap
+
+
+def fuel_loads(total_laps: int) -> np.ndarray:
+    """
+    Fuel at the start of each lap, burned in equal steps of 100 / total laps
+
+    Built with a sequential `subtract.accumulate` so every value is the
+    same float the scalar loop's `fuel -= fuel_per_lap` produces.
+    """
+    steps = np.full(total_laps, 100.0 / total_laps)
+    steps[0] = 100.0
+    return np.subtract.accumulate(steps)
+
+
+def _predicted(base_time: float, tire_age: np.ndarray, fuel: np.ndarray,
+               compound_mod: np.ndarray, track_position: int,
+               deg_per_lap=TIRE_DEG_PER_LAP) -> np.ndarray:
+    """`_analytical_prediction` term by term and in the same order (rounded to 0.001 s)"""
+    tire_deg = tire_age * deg_per_lap
+    fuel_effect = (100 - fuel) * FUEL_EFFECT / 100
+    traffic = max(0, (track_position - 5) * TRAFFIC_PER_PLACE)
+    return python_round(base_time + tire_deg - fuel_effect + traffic + compound_mod, 3)
+
+
+def lap_time_table(base_time: float, total_laps: int, modifiers: Sequence[float],
+                   track_position: int = DEFAULT_TRACK_POSITION,
+                   degradation: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Rounded lap time for every (compound, lap, tire age) of a race
+
+    A race only has L * L lap/age combinations per compound, so for large
+    batches rounding them once and gathering is far cheaper than rounding
+    every lap of every strategy.
+
+    Args:
+        degradation: Seconds per lap of tire age for each compound
+            (default: the analytical model's TIRE_DEG_PER_LAP for all)
+
+    Returns:
+        (len(modifiers), L, L) array indexed [compound, lap, tire_age]
+    """
+    deg_per_lap = TIRE_DEG_PER_LAP
+    if degradation is not None:
+        deg_per_lap = np.asarray(degradation, dtype=np.float64)[:, None, None]
+    return _predicted(base_time,
+                      np.arange(total_laps)[None, None, :],
+                      fuel_loads(total_laps)[None, :, None],
+                      np.asarray(modifiers, dtype=np.float64)[:, None, None],
+                      track_position, deg_per_lap)
+
+
+def _group_lap_times(lengths: np.ndarray, modifiers: np.ndarray, base_time: float,
+                     track_position: int) -> np.ndarray:
+    """Lap times (S, L) of strategies that all run the same number of laps"""
+    total = int(lengths[0].sum())
+    values, codes = np.unique(modifiers, return_inverse=True)
+    if len(lengths) < len(values) * total:
+        # Fewer laps than table entries: evaluate the laps themselves
+        tire_age, compound_mod = stint_lap_layout(lengths, modifiers)
+        return _predicted(base_time, tire_age, fuel_loads(total), compound_mod, track_position)
+
+    table = lap_time_table(base_time, total, values, track_position)
+    # Flat [compound, lap, tire_age] index with tire_age = lap - stint start:
+    # compound * L * L - start is constant over a stint, so one repeat does
+    starts = np.cumsum(lengths, axis=1) - lengths
+    stint_offset = codes.reshape(modifiers.shape) * total * total - starts
+    index = (np.repeat(stint_offset.ravel(), lengths.ravel()).reshape(len(lengths), total)
+             + np.arange(total) * (total + 1))
+    return table.ravel().take(index)
+
+
+def _by_race_length(lengths: np.ndarray):
+    """Yield (row indices, race length) for each distinct total of `lengths`"""
+    totals = lengths.sum(axis=1)
+    for total in np.unique(totals):
+        yield np.flatnonzero(totals == total), int(total)
+
+
+def lap_times(lengths: np.ndarray, modifiers: np.ndarray, base_time: float,
+              track_position: int = DEFAULT_TRACK_POSITION) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predicted (rounded) lap time of every lap of every strategy
+
+    Returns:
+        (lap times (S, L), valid lap mask (S, L)) where L is the longest
+        race; laps past a strategy's race length are 0.0
+    """
+    lengths = np.atleast_2d(np.asarray(lengths, dtype=np.int64))
+    modifiers = np.atleast_2d(np.asarray(modifiers, dtype=np.float64))
+    width = max(int(lengths.sum(axis=1).max(initial=0)), 1)
+    times = np.zeros((len(lengths), width))
+    for rows, total in _by_race_length(lengths):
+        if total:
+            times[rows, :total] = _group_lap_times(lengths[rows], modifiers[rows],
+                                                   base_time, track_position)
+    return times, np.arange(width)[None, :] < lengths.sum(axis=1)[:, None]
+
+
+def race_times(lengths: np.ndarray, modifiers: np.ndarray, base_time: float,
+               pit_time: float, stint_counts: Optional[np.ndarray] = None,
+               track_position: int = DEFAULT_TRACK_POSITION) -> np.ndarray:
+    """
+    Total race time of each strategy (same value as `_calculate_race_time`)
+
+    Args:
+        lengths: (S, K) stint lengths, 0 for unused stints
+        modifiers: (S, K) compound modifiers (see `encode_strategies`)
+        base_time: Base lap time in seconds
+        pit_time: Time lost per pit stop
+        stint_counts: (S,) stints per strategy, for strategies that list
+            empty stints (each still costs a stop, as in the scalar loop);
+            defaults to the number of non-empty stints
+
+    Returns:
+        (S,) race times rounded to 0.01 s
+    """
+    lengths = np.atleast_2d(np.asarray(lengths, dtype=np.int64))
+    modifiers = np.atleast_2d(np.asarray(modifiers, dtype=np.float64))
+    totals = np.zeros(len(lengths))
+    for rows, total in _by_race_length(lengths):
+        if not total:
+            continue
+        laps = _group_lap_times(lengths[rows], modifiers[rows], base_time, track_position)
+        # Running sum along each race: same summation order as the scalar loop
+        totals[rows] = np.add.accumulate(laps, axis=1, out=laps)[:, -1]
+    if stint_counts is None:
+        stint_counts = (lengths > 0).sum(axis=1)
+    return python_round(totals + pit_time * (np.asarray(stint_counts) - 1), 2)
+
+
+def simulate_strategies(stints: Sequence[Sequence[int]], compounds: Sequence[Sequence[str]],
+                        base_time: float, pit_time: float = 22.0) -> List[float]:
+    """Race time per (stints, compounds) strategy, as `_calculate_race_time` would return"""
+    lengths, modifiers, counts = encode_strategies(stints, compounds)
+    return race_times(lengths, modifiers, base_time, pit_time, counts).tolist()
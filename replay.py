@@ -0,0 +1,323 @@
+"""
+Live-timing replay
+Plays a stored or cached session lap by lap at a chosen speed and keeps
+per-driver stint, degradation and pit-window state incrementally: every
+lap is an O(1) update instead of a re-analysis of the whole race.
+
+Usage:
+    python replay.py --cache cache/2024/2024-05-26_Monaco_Grand_Prix/2024-05-26_Race --speed 100
+    python replay.py --session-id <uuid> --speed 0     # as fast as possible
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tire_analysis import MIN_VALID_LAP_TIME, IncrementalDegradation, calculate_optimal_pit_window
+
+DEFAULT_PIT_LOSS = 22.0
+
+REPLAY_LAPS_QUERY = """
+    SELECT driver_code, lap_number, lap_time_seconds, tire_compound, tire_life
+    FROM laps
+    WHERE session_id = %s
+    ORDER BY driver_code, lap_number
+"""
+
+
+@dataclass
+class ReplayLap:
+    """One completed lap as it appears on the timing feed"""
+    driver_code: str
+    lap_number: int
+    lap_time: Optional[float]
+    compound: str
+    tire_life: Optional[int]
+    session_time: float  # Seconds from the start until the lap was completed
+
+
+def laps_from_rows(rows: Sequence[Sequence]) -> List[ReplayLap]:
+    """
+    Replay laps from laps-table rows
+
+    The table has no timestamps, so a lap completes at the driver's
+    cumulative race time; missing lap times count as the session median.
+
+    Args:
+        rows: (driver_code, lap_number, lap_time_seconds, tire_compound,
+            tire_life) ordered by driver_code, lap_number
+    """
+    if not rows:
+        return []
+    times = np.array([r[2] for r in rows], dtype=np.float64)  # None -> NaN
+    median = np.nanmedian(times) if np.isfinite(times).any() else 0.0
+    elapsed, driver, laps = 0.0, None, []
+    for (code, lap_number, _, compound, tire_life), lap_time in zip(rows, times):
+        if code != driver:
+            driver, elapsed = code, 0.0
+        elapsed += float(lap_time if np.isfinite(lap_time) else median)
+        laps.append(ReplayLap(
+            driver_code=code,
+            lap_number=int(lap_number),
+            lap_time=float(lap_time) if np.isfinite(lap_time) else None,
+            compound=compound or 'UNKNOWN',
+            tire_life=int(tire_life) if tire_life is not None else None,
+            session_time=elapsed,
+        ))
+    return laps
+
+
+def load_session_laps(cursor, session_id: str) -> List[ReplayLap]:
+    """Replay laps of a stored session (empty if it has none)"""
+    cursor.execute(REPLAY_LAPS_QUERY, (session_id,))
+    return laps_from_rows(cursor.fetchall())
+
+
+def load_cached_laps(session_path: str, cache_dir: Optional[str] = None) -> Tuple[List[ReplayLap], int]:
+    """
+    Replay laps straight from a FastF1 cache directory (offline)
+
+    Uses the feed's own lap end times, so gaps and pit stops play back as
+    they happened.
+
+    Args:
+        session_path: Session cache directory, e.g.
+            cache/2024/2024-05-26_Monaco_Grand_Prix/2024-05-26_Race
+        cache_dir: FastF1 cache root (default: derived from the
+            `<root>/<year>/<event>/<session>` layout of session_path)
+
+    Returns:
+        (laps, scheduled race distance in laps)
+    """
+    import fastf1
+    import pandas as pd
+    from ingest import discover_cached_sessions, _offline_session
+
+    path = Path(session_path).resolve()
+    if cache_dir:
+        root = Path(cache_dir).resolve()
+    else:
+        root = path.parents[2] if len(path.parents) > 2 else path
+    relative = path.relative_to(root).parts if path.is_relative_to(root) else ()
+    if len(relative) != 3 or not relative[0].isdigit():
+        raise FileNotFoundError(
+            f"{session_path} is not a <year>/<event>/<session> directory under {root}")
+    year = int(relative[0])
+    spec = next((s for s in discover_cached_sessions(root, year)
+                 if Path(s.cache_path).resolve() == path), None)
+    if spec is None:
+        raise FileNotFoundError(f"No cached session at {session_path}")
+
+    fastf1.set_log_level('ERROR')
+    fastf1.Cache.enable_cache(str(root))
+    fastf1.Cache.offline_mode(True)
+    session = _offline_session(spec)
+    session.load(laps=True, telemetry=False, weather=False, messages=False)
+
+    frame = session.laps
+    frame = frame[frame['Time'].notna() & frame['LapNumber'].notna()]
+    start = frame.loc[frame['LapNumber'] == 1, 'LapStartTime'].min()
+    if pd.isna(start):
+        start = pd.Timedelta(0)
+    laps = [
+        ReplayLap(
+            driver_code=row.Driver,
+            lap_number=int(row.LapNumber),
+            lap_time=row.LapTime.total_seconds() if pd.notna(row.LapTime) else None,
+            compound=row.Compound if isinstance(row.Compound, str) else 'UNKNOWN',
+            tire_life=int(row.TyreLife) if pd.notna(row.TyreLife) else None,
+            session_time=(row.Time - start).total_seconds(),
+        )
+        for row in frame.itertuples(index=False)
+    ]
+    total_laps = int(session.total_laps or frame['LapNumber'].max())
+    return laps, total_laps
+
+
+class DriverReplayState:
+    """Current stint and incremental degradation estimate of one driver"""
+
+    __slots__ = ('stint', 'compound', 'tire_age', 'last_tire_life', 'degradation')
+
+    def __init__(self):
+        self.stint = 0
+        self.compound = None
+        self.tire_age = 0
+        self.last_tire_life = None
+        self.degradation = IncrementalDegradation()
+
+    def update(self, lap: ReplayLap):
+        """Fold one lap into the state (new stint on a compound change or fresh set)"""
+        new_stint = (self.compound != lap.compound or
+                     (lap.tire_life is not None and self.last_tire_life is not None
+                      and lap.tire_life < self.last_tire_life))
+        if new_stint:
+            self.stint += 1
+            self.compound = lap.compound
+            self.degradation = IncrementalDegradation(lap.compound)
+        if lap.tire_life is not None:
+            self.tire_age = max(lap.tire_life - 1, 0)  # Used sets start part-worn
+        else:
+            self.tire_age = 0 if new_stint else self.tire_age + 1
+        self.last_tire_life = lap.tire_life
+
+        # Same lap selection as the stored-session analysis (segment_stints)
+        if lap.lap_time is not None and lap.lap_time >= MIN_VALID_LAP_TIME:
+            self.degradation.add(lap.lap_time)
+
+    @property
+    def degradation_rate(self) -> float:
+        """Seconds per lap, as `analyze_tire_degradation` reports it (0 under 5 laps)"""
+        if len(self.degradation) < 5:
+            return 0.0
+        return round(self.degradation.degradation_rate, 4)
+
+
+class ReplayEngine:
+    """
+    Plays laps in feed order and emits one update per completed lap
+
+    State (positions, stints, degradation) is built as laps arrive, so a
+    replay can start mid-race: earlier laps are folded in without pacing.
+    """
+
+    def __init__(self, laps: Sequence[ReplayLap], total_laps: Optional[int] = None,
+                 pit_loss: float = DEFAULT_PIT_LOSS):
+        self.laps = sorted(laps, key=lambda lap: (lap.session_time, lap.lap_number))
+        self.total_laps = total_laps or max((lap.lap_number for lap in self.laps), default=0)
+        self.pit_loss = pit_loss
+        self.drivers: Dict[str, DriverReplayState] = {}
+        self._finished_lap: Dict[int, int] = {}
+
+    def _update(self, lap: ReplayLap) -> Dict:
+        state = self.drivers.get(lap.driver_code)
+        if state is None:
+            state = self.drivers[lap.driver_code] = DriverReplayState()
+        state.update(lap)
+        # Running position: order in which drivers complete this lap
+        position = self._finished_lap.get(lap.lap_number, 0) + 1
+        self._finished_lap[lap.lap_number] = position
+
+        deg_rate = state.degradation_rate
+        earliest, latest, recommendation = calculate_optimal_pit_window(
+            lap.lap_number, self.total_laps, state.tire_age, deg_rate, self.pit_loss)
+        return {
+            'driver': lap.driver_code,
+            'lap': lap.lap_number,
+            'lap_time': lap.lap_time,
+            'session_time': round(lap.session_time, 3),
+            'position': position,
+            'stint': state.stint,
+            'compound': state.compound,
+            'tire_age': state.tire_age,
+            'degradation_rate': deg_rate,
+            'cliff_lap': state.degradation.cliff_lap,
+            'pit_window': {'earliest': earliest, 'latest': latest},
+            'recommendation': recommendation,
+        }
+
+    def play(self, speed: Optional[float] = 1.0, from_lap: int = 1,
+             heartbeat: Optional[float] = None,
+             clock: Callable[[], float] = time.monotonic,
+             sleep: Callable[[float], None] = time.sleep) -> Iterator[Optional[Dict]]:
+        """
+        Lap updates, paced to `speed` x real time
+
+        Args:
+            speed: Playback speed (None or 0: as fast as possible)
+            from_lap: First lap number to emit; earlier laps only build state
+            heartbeat: Longest silence in seconds; while waiting longer, None
+                is yielded at this interval (for keep-alives)
+            clock, sleep: Time source (injectable for tests and benchmarks)
+
+        Yields:
+            One update dict per completed lap (or None as a heartbeat)
+        """
+        started = origin = None
+        for lap in self.laps:
+            update = self._update(lap)
+            if lap.lap_number < from_lap:
+                continue
+            if speed:
+                if started is None:
+                    started, origin = clock(), lap.session_time
+                due = started + (lap.session_time - origin) / speed
+                while True:
+                    wait = due - clock()
+                    if wait <= 0:
+                        break
+                    if heartbeat and wait > heartbeat:
+                        sleep(heartbeat)
+                        yield None
+                    else:
+                        sleep(wait)
+            yield update
+
+
+def sse_events(updates: Iterator[Optional[Dict]]) -> Iterator[str]:
+    """Server-sent event framing: `lap` events, comment keep-alives and a final `end`"""
+    for update in updates:
+        if update is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"event: lap\ndata: {json.dumps(update)}\n\n"
+    yield "event: end\ndata: {}\n\n"
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Replay a session lap by lap")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--session-id', help="Stored session (laps table)")
+    source.add_argument('--cache', help="FastF1 session cache directory")
+    parser.add_argument('--cache-dir', help="FastF1 cache root for --cache "
+                        "(default: three levels above it)")
+    parser.add_argument('--speed', type=float, default=100.0, help="x real time (0 = no pacing)")
+    parser.add_argument('--from-lap', type=int, default=1)
+    parser.add_argument('--total-laps', type=int)
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        try:
+            laps, total_laps = load_cached_laps(args.cache, args.cache_dir)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return
+    else:
+        from storage import connect
+
+        db_config = {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'database': os.getenv('DB_NAME', 'f1_telemetry'),
+            'user': os.getenv('DB_USER', 'postgres'),
+            'password': os.getenv('DB_PASSWORD', '')
+        }
+        conn = connect(db_config)
+        try:
+            laps, total_laps = load_session_laps(conn.cursor(), args.session_id), None
+        finally:
+            conn.close()
+    if not laps:
+        print("❌ No laps to replay")
+        return
+
+    engine = ReplayEngine(laps, args.total_laps or total_laps)
+    print(f"🏁 Replaying {len(laps)} laps ({engine.total_laps}-lap race) at {args.speed:g}x")
+    for update in engine.play(args.speed, args.from_lap):
+        window = update['pit_window']
+        print(f"L{update['lap']:>2} P{update['position']:<2} {update['driver']} "
+              f"{update['compound']:<12} age {update['tire_age']:>2}  "
+              f"deg {update['degradation_rate']:.3f}s/lap  "
+              f"window {window['earliest']}-{window['latest']}  {update['recommendation']}")
+
+
+if __name__ == '__main__':
+    main()
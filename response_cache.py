@@ -0,0 +1,384 @@
+"""
+Server-side response cache for read-only API endpoints
+Stores pre-serialized, gzip-compressed bodies with ETags in an
+in-process LRU/TTL cache, optionally backed by a SQLite file that every
+worker process on the host (and the ingest pipeline) shares.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, current_app, g, request
+
+
+@dataclass
+class CachedResponse:
+    """A ready-to-send response body"""
+    body: bytes          # gzip-compressed body
+    etag: str            # unquoted strong ETag
+    tags: Tuple[str, ...]
+    expires_at: float
+    mimetype: str = 'application/json'
+    vary: str = 'Accept-Encoding'
+
+
+class SharedCacheBackend:
+    """
+    SQLite-backed store shared by processes on one machine
+
+    Also records invalidations so other processes can drop their
+    in-memory copies of entries for the same tags.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            # It is only a cache: rebuild instead of migrating
+            conn.executescript("""
+                DROP TABLE IF EXISTS responses;
+                DROP TABLE IF EXISTS response_tags;
+                DROP TABLE IF EXISTS invalidations;
+            """)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                body BLOB NOT NULL,
+                tags TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                mimetype TEXT NOT NULL,
+                vary TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS response_tags (
+                tag TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (tag, key)
+            );
+            CREATE TABLE IF NOT EXISTS invalidations (
+                tag TEXT PRIMARY KEY,
+                invalidated_at REAL NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        row = self._conn().execute(
+            "SELECT etag, body, tags, expires_at, mimetype, vary FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None or row[3] < time.time():
+            return None
+        return CachedResponse(body=row[1], etag=row[0],
+                              tags=tuple(t for t in row[2].split(',') if t),
+                              expires_at=row[3], mimetype=row[4], vary=row[5])
+
+    def set(self, key: str, entry: CachedResponse, since: Optional[float] = None) -> bool:
+        """
+        Store an entry unless one of its tags was invalidated at or after
+        `since` (wall clock), i.e. while the response was being built
+
+        Returns:
+            Whether the entry was stored
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if since is not None and entry.tags:
+                stale = conn.execute(
+                    f"SELECT 1 FROM invalidations WHERE invalidated_at >= ? AND tag IN "
+                    f"({', '.join('?' * len(entry.tags))}) LIMIT 1",
+                    (since, *entry.tags)
+                ).fetchone()
+                if stale:
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, etag, body, tags, expires_at, mimetype, vary) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.etag, entry.body, ','.join(entry.tags), entry.expires_at,
+                 entry.mimetype, entry.vary)
+            )
+            conn.executemany("INSERT OR IGNORE INTO response_tags (tag, key) VALUES (?, ?)",
+                             [(tag, key) for tag in entry.tags])
+        return True
+
+    def invalidate(self, tags: Iterable[str]):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            for tag in tags:
+                conn.execute("DELETE FROM responses WHERE key IN "
+                             "(SELECT key FROM response_tags WHERE tag = ?)", (tag,))
+                conn.execute("DELETE FROM response_tags WHERE tag = ?", (tag,))
+                conn.execute("INSERT OR REPLACE INTO invalidations (tag, invalidated_at) "
+                             "VALUES (?, ?)", (tag, now))
+
+    def invalidations_since(self, since: float) -> List[Tuple[str, float]]:
+        return self._conn().execute(
+            "SELECT tag, invalidated_at FROM invalidations WHERE invalidated_at > ?", (since,)
+        ).fetchall()
+
+
+class ResponseCache:
+    """
+    In-process LRU + TTL cache of compressed response bodies
+
+    Args:
+        max_entries: LRU capacity (entries)
+        max_bytes: LRU capacity (compressed bytes)
+        ttl: Seconds an entry stays valid
+        shared_path: Optional SQLite file shared with other processes
+        sync_interval: How often (seconds) to pick up invalidations made by
+            other processes through the shared backend
+    """
+
+    def __init__(self,
+                 max_entries: int = 512,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 3600.0,
+                 shared_path: Optional[str] = None,
+                 sync_interval: float = 1.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.shared = SharedCacheBackend(shared_path) if shared_path else None
+
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_sync = time.time()
+        self._next_sync = 0.0
+        # Invalidation counter, and its value when each tag was last invalidated
+        self._generation = 0
+        self._tag_generations: Dict[str, int] = {}
+        self.metrics = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'not_modified': 0,
+                        'evictions': 0, 'invalidations': 0, 'stale_skipped': 0}
+
+    def count(self, metric: str):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def marker(self) -> Tuple[int, float]:
+        """
+        Point in time to pass as `set(..., since=)`: an entry is not stored if
+        one of its tags is invalidated after this (the view read old data)
+        """
+        with self._lock:
+            return self._generation, time.time()
+
+    def _sync_invalidations(self):
+        """Drop local entries whose tags another process invalidated"""
+        now = time.time()
+        if self.shared is None or now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+        changed = self.shared.invalidations_since(self._last_sync)
+        if changed:
+            self._last_sync = max(ts for _, ts in changed)
+            self._drop_local({tag for tag, _ in changed})
+
+    def _drop_local(self, tags: set):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._tag_generations[tag] = self._generation
+            for key in [k for k, e in self._entries.items() if tags.intersection(e.tags)]:
+                self._bytes -= len(self._entries.pop(key).body)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        self._sync_invalidations()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.metrics['hits'] += 1
+                    return entry
+                self._bytes -= len(self._entries.pop(key).body)
+
+        if self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self._put_local(key, entry)
+                self.count('shared_hits')
+                return entry
+
+        self.count('misses')
+        return None
+
+    def _put_local(self, key: str, entry: CachedResponse):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.metrics['evictions'] += 1
+
+    def set(self, key: str, body: bytes, tags: Iterable[str],
+            mimetype: str = 'application/json', vary: str = 'Accept-Encoding',
+            since: Optional[Tuple[int, float]] = None) -> CachedResponse:
+        """
+        Compress and store a serialized response body
+
+        Args:
+            since: `marker()` taken before the body was computed; the entry is
+                returned but not stored if one of its tags was invalidated since
+        """
+        entry = CachedResponse(
+            body=gzip.compress(body, compresslevel=6),
+            etag=hashlib.blake2b(body, digest_size=16).hexdigest(),
+            tags=tuple(sorted(set(tags))),
+            expires_at=time.time() + self.ttl,
+            mimetype=mimetype,
+            vary=vary,
+        )
+        if since is not None:
+            with self._lock:
+                stale = any(self._tag_generations.get(tag, 0) > since[0] for tag in entry.tags)
+            if stale or (self.shared is not None and not self.shared.set(key, entry, since[1])):
+                self.count('stale_skipped')
+                return entry
+        elif self.shared is not None:
+            self.shared.set(key, entry)
+        self._put_local(key, entry)
+        return entry
+
+    def invalidate(self, tags: Iterable[str]):
+        """Drop every entry carrying one of `tags` (here and in the shared backend)"""
+        tags = set(tags)
+        self._drop_local(tags)
+        if self.shared is not None:
+            self.shared.invalidate(tags)
+        self.count('invalidations')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes,
+                    'shared': self.shared is not None, **self.metrics}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """
+    Process-wide response cache
+
+    Configured by RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_TTL and RESPONSE_CACHE_SHARED_PATH (SQLite file; unset
+    keeps the cache purely in-process).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512)),
+                    max_bytes=int(float(os.getenv('RESPONSE_CACHE_MAX_MB', 64)) * 1024 * 1024),
+                    ttl=float(os.getenv('RESPONSE_CACHE_TTL', 3600)),
+                    shared_path=os.getenv('RESPONSE_CACHE_SHARED_PATH') or None,
+                )
+    return _cache
+
+
+def session_tag(session_id) -> str:
+    return f"session:{session_id}"
+
+
+def invalidate_session(session_id):
+    """Drop cached responses derived from one session (called after ingest)"""
+    get_cache().invalidate([session_tag(session_id), 'sessions', 'drivers'])
+
+
+def add_cache_tags(*tags: str):
+    """Attach extra invalidation tags to the response being built"""
+    g.setdefault('cache_tags', []).extend(tags)
+
+
+def _request_key(variant: str = '') -> str:
+    args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{request.path}?{args}#{variant}"
+
+
+def _send(entry: CachedResponse) -> Response:
+    headers = {'ETag': f'"{entry.etag}"', 'Vary': entry.vary,
+               'Cache-Control': 'no-cache'}  # Clients revalidate with If-None-Match
+    if entry.etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+
+    if request.accept_encodings['gzip'] > 0:
+        headers['Content-Encoding'] = 'gzip'
+        body = entry.body
+    else:
+        body = gzip.decompress(entry.body)
+    return Response(body, status=200, mimetype=entry.mimetype, headers=headers)
+
+
+def cached_response(tags: Callable[..., Iterable[str]] = lambda **kwargs: (),
+                    variant: Optional[Callable[[], str]] = None):
+    """
+    Cache a read-only view keyed by path + query string
+
+    Only 200 responses are stored, and not if one of their tags was
+    invalidated while the view ran. `tags(**view_kwargs)` names what the
+    response depends on (e.g. `session:<id>`); views can add tags known only
+    after querying through `add_cache_tags` (or skip the cache for one request
+    by setting `g.bypass_cache`). `variant()` distinguishes
+    representations of the same URL (e.g. the negotiated content type),
+    which also adds `Accept` to the Vary header.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if g.get('bypass_cache'):
+                return view(**kwargs)
+            cache = get_cache()
+            key = _request_key(variant() if variant else '')
+            since = cache.marker()
+            entry = cache.get(key)
+            if entry is not None:
+                if entry.etag in request.if_none_match:
+                    cache.count('not_modified')
+                return _send(entry)
+
+            response = current_app.make_response(view(**kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            entry = cache.set(key, response.get_data(),
+                              list(tags(**kwargs)) + g.get('cache_tags', []),
+                              mimetype=response.mimetype,
+                              vary='Accept-Encoding, Accept' if variant else 'Accept-Encoding',
+                              since=since)
+            return _send(entry)
+        return wrapper
+    return decorator
@@ -3,10 +3,12 @@
 
 CREATE TABLE sessions (
     session_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    session_key INTEGER GENERATED BY DEFAULT AS IDENTITY,  -- compact key (telemetry partitions)
     year INTEGER NOT NULL,
     event_name VARCHAR(100) NOT NULL,
     session_type VARCHAR(10) NOT NULL,
     date DATE NOT NULL,
+    content_hash VARCHAR(64),  -- fingerprint of the FastF1 cache artifacts
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -20,6 +22,7 @@ CREATE TABLE drivers (
 
 CREATE TABLE laps (
     lap_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    lap_key INTEGER GENERATED BY DEFAULT AS IDENTITY,  -- compact key used by telemetry
     session_id UUID REFERENCES sessions(session_id),
     driver_code VARCHAR(3) REFERENCES drivers(driver_code),
     lap_number INTEGER NOT NULL,
@@ -30,24 +33,100 @@ CREATE TABLE laps (
     sector1_time FLOAT,
     sector2_time FLOAT,
     sector3_time FLOAT,
+    content_hash VARCHAR(32),  -- lap row + its telemetry
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- One list partition per session (telemetry_s<session_key>), created at
+-- ingest by telemetry_store.py. A lap's samples are written together in
+-- distance order, so the BRIN index on lap_key finds them in a few pages.
+-- Rows are removed with their laps by bulk_loader (no foreign keys).
 CREATE TABLE telemetry (
-    telemetry_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    lap_id UUID REFERENCES laps(lap_id),
-    distance FLOAT NOT NULL,
-    speed INTEGER,
-    throttle INTEGER,
+    session_key INTEGER NOT NULL,
+    lap_key INTEGER NOT NULL,
+    sample INTEGER NOT NULL,  -- position in the lap, in distance order
+    distance REAL NOT NULL,
+    speed SMALLINT,
+    throttle SMALLINT,
     brake BOOLEAN,
-    drs INTEGER,
-    gear INTEGER,
-    rpm INTEGER,
-    position_x FLOAT,
-    position_y FLOAT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    drs SMALLINT,
+    gear SMALLINT,
+    rpm SMALLINT,
+    position_x REAL,
+    position_y REAL,
+    lod_tier SMALLINT NOT NULL DEFAULT 4  -- coarsest LOD tier containing the sample (downsample.py)
+) PARTITION BY LIST (session_key);
+
+-- Per-driver fingerprints let re-ingest skip drivers whose laps did not change
+CREATE TABLE driver_fingerprints (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    content_hash VARCHAR(32) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code)
+);
+
+-- Memoized tire degradation fits per stint (degradation_store.py).
+-- stint_number 0 holds the whole-race fit used by /api/pit-strategy.
+CREATE TABLE tire_degradation_results (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,
+    method VARCHAR(10) NOT NULL,  -- 'scipy' or 'batch'
+    start_lap INTEGER,
+    end_lap INTEGER,
+    input_hash VARCHAR(32) NOT NULL,  -- lap times + compound + method + model version
+    compound VARCHAR(20),
+    degradation_rate FLOAT,
+    optimal_stint_length INTEGER,
+    cliff_lap INTEGER,
+    performance_loss_percent FLOAT,
+    strategy_recommendation TEXT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code, stint_number, method)
+);
+
+-- Each driver's fastest timed lap per session (session_summary.py, refreshed at ingest)
+CREATE TABLE session_fastest_laps (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    lap_id UUID NOT NULL,
+    lap_number INTEGER NOT NULL,
+    lap_time_seconds FLOAT NOT NULL,
+    tire_compound VARCHAR(20),
+    tire_life INTEGER,
+    PRIMARY KEY (session_id, driver_code)
+);
+
+-- Stints as segmented by /api/tire-analysis; compound usage is aggregated from these
+CREATE TABLE session_stints (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,  -- from 1
+    compound VARCHAR(20) NOT NULL,
+    start_lap INTEGER NOT NULL,
+    end_lap INTEGER NOT NULL,
+    laps INTEGER NOT NULL,  -- start_lap..end_lap, untimed laps included
+    clean_laps INTEGER NOT NULL,  -- laps averaged into avg_lap_time
+    avg_lap_time FLOAT,
+    best_lap_time FLOAT,
+    PRIMARY KEY (session_id, driver_code, stint_number)
+);
+
+-- Running position and gap to the leader at the end of each lap
+CREATE TABLE session_positions (
+    session_id UUID REFERENCES sessions(session_id),
+    driver_code VARCHAR(3) REFERENCES drivers(driver_code),
+    lap_number INTEGER NOT NULL,
+    position SMALLINT NOT NULL,
+    gap_to_leader FLOAT,
+    PRIMARY KEY (session_id, driver_code, lap_number)
 );
 
-CREATE INDEX idx_sessions_lookup ON sessions(year, event_name, session_type);
-CREATE INDEX idx_laps_lookup ON laps(session_id, driver_code, lap_number);
-CREATE INDEX idx_telemetry_lookup ON telemetry(lap_id, distance);
+-- Unique lookups make re-ingest idempotent (ON CONFLICT targets)
+CREATE UNIQUE INDEX idx_sessions_lookup ON sessions(year, event_name, session_type);
+CREATE UNIQUE INDEX idx_laps_lookup ON laps(session_id, driver_code, lap_number);
+CREATE UNIQUE INDEX idx_sessions_key ON sessions(session_key);
+CREATE UNIQUE INDEX idx_laps_key ON laps(lap_key);
+CREATE INDEX idx_telemetry_lap ON telemetry USING brin (lap_key)
+    WITH (pages_per_range = 4, autosummarize = on);
@@ -0,0 +1,127 @@
+-- F1 Telemetry Database Schema
+-- SQLite 3.35+ (embedded backend, DB_BACKEND=sqlite; created by storage.py)
+-- Same tables and keys as schema.sql with every migration applied. UUIDs
+-- are stored as text; session_key and lap_key are rowid aliases. There is
+-- no partitioning: telemetry is clustered on (lap_key, sample) instead, so
+-- a lap's samples are one contiguous range of the table.
+
+PRAGMA journal_mode = WAL;
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key INTEGER PRIMARY KEY,
+    session_id TEXT UNIQUE NOT NULL DEFAULT (lower(printf('%s-%s-4%s-%s%s-%s',
+        hex(randomblob(4)), hex(randomblob(2)), substr(hex(randomblob(2)), 2),
+        substr('89ab', 1 + (abs(random()) % 4), 1), substr(hex(randomblob(2)), 2),
+        hex(randomblob(6))))),
+    year INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    session_type TEXT NOT NULL,
+    date DATE NOT NULL,
+    content_hash TEXT,  -- fingerprint of the FastF1 cache artifacts
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS drivers (
+    driver_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    driver_code TEXT UNIQUE NOT NULL,
+    full_name TEXT,
+    team TEXT,
+    number INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS laps (
+    lap_key INTEGER PRIMARY KEY,
+    lap_id TEXT UNIQUE NOT NULL,  -- generated client side (bulk_loader)
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    lap_number INTEGER NOT NULL,
+    lap_time_seconds REAL,
+    tire_compound TEXT,
+    tire_life INTEGER,
+    is_personal_best BOOLEAN DEFAULT FALSE,
+    sector1_time REAL,
+    sector2_time REAL,
+    sector3_time REAL,
+    content_hash TEXT,  -- lap row + its telemetry
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS telemetry (
+    session_key INTEGER NOT NULL,
+    lap_key INTEGER NOT NULL,
+    sample INTEGER NOT NULL,  -- position in the lap, in distance order
+    distance REAL NOT NULL,
+    speed INTEGER,
+    throttle INTEGER,
+    brake BOOLEAN,
+    drs INTEGER,
+    gear INTEGER,
+    rpm INTEGER,
+    position_x REAL,
+    position_y REAL,
+    lod_tier INTEGER NOT NULL DEFAULT 4,  -- coarsest LOD tier containing the sample (downsample.py)
+    PRIMARY KEY (lap_key, sample)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS driver_fingerprints (
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    content_hash TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tire_degradation_results (
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,
+    method TEXT NOT NULL,  -- 'scipy' or 'batch'
+    start_lap INTEGER,
+    end_lap INTEGER,
+    input_hash TEXT NOT NULL,
+    compound TEXT,
+    degradation_rate REAL,
+    optimal_stint_length INTEGER,
+    cliff_lap INTEGER,
+    performance_loss_percent REAL,
+    strategy_recommendation TEXT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, driver_code, stint_number, method)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS session_fastest_laps (
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    lap_id TEXT NOT NULL,
+    lap_number INTEGER NOT NULL,
+    lap_time_seconds REAL NOT NULL,
+    tire_compound TEXT,
+    tire_life INTEGER,
+    PRIMARY KEY (session_id, driver_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS session_stints (
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    stint_number INTEGER NOT NULL,
+    compound TEXT NOT NULL,
+    start_lap INTEGER NOT NULL,
+    end_lap INTEGER NOT NULL,
+    laps INTEGER NOT NULL,
+    clean_laps INTEGER NOT NULL,
+    avg_lap_time REAL,
+    best_lap_time REAL,
+    PRIMARY KEY (session_id, driver_code, stint_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS session_positions (
+    session_id TEXT REFERENCES sessions(session_id),
+    driver_code TEXT REFERENCES drivers(driver_code),
+    lap_number INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    gap_to_leader REAL,
+    PRIMARY KEY (session_id, driver_code, lap_number)
+) WITHOUT ROWID;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_lookup ON sessions(year, event_name, session_type);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_laps_lookup ON laps(session_id, driver_code, lap_number);
@@ -0,0 +1,253 @@
+"""
+Materialized session summaries
+Fastest laps, per-stint pace and running positions are computed from
+`laps` when a session is written (bulk_loader.write_session) and stored in
+small tables keyed by session, so the `/api/summary` endpoints read a few
+dozen indexed rows instead of every lap of the session.
+
+Usage:
+    python session_summary.py                 # backfill every session
+    python session_summary.py --session <session_id>
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from storage import execute_values
+from tire_analysis import MIN_VALID_LAP_TIME, segment_stints
+
+# A stint lap counts towards its average pace when it is within this ratio
+# of the driver's median lap (drops in/out laps, safety car and red flags)
+CLEAN_LAP_RATIO = 1.07
+
+SUMMARY_LAPS_QUERY = """
+    SELECT lap_id, driver_code, lap_number, lap_time_seconds, tire_compound, tire_life
+    FROM laps
+    WHERE session_id = %s
+    ORDER BY driver_code, lap_number
+"""
+LAP_COLUMNS = ['lap_id', 'driver_code', 'lap_number', 'lap_time_seconds', 'tire_compound',
+               'tire_life']
+
+# Read side (rows as the API's dict cursors return them)
+FASTEST_LAPS_QUERY = """
+    SELECT driver_code, lap_id, lap_number, lap_time_seconds, tire_compound, tire_life
+    FROM session_fastest_laps
+    WHERE session_id = %s
+    ORDER BY lap_time_seconds, lap_number, driver_code
+"""
+STINTS_QUERY = """
+    SELECT driver_code, stint_number, compound, start_lap, end_lap, laps, clean_laps,
+           avg_lap_time, best_lap_time
+    FROM session_stints
+    WHERE session_id = %s {driver_filter}
+    ORDER BY driver_code, stint_number
+"""
+COMPOUND_USAGE_QUERY = """
+    SELECT compound, SUM(laps) AS laps, COUNT(*) AS stints,
+           COUNT(DISTINCT driver_code) AS drivers, MIN(best_lap_time) AS best_lap_time
+    FROM session_stints
+    WHERE session_id = %s
+    GROUP BY compound
+    ORDER BY SUM(laps) DESC, compound
+"""
+POSITIONS_QUERY = """
+    SELECT driver_code, lap_number, position, gap_to_leader
+    FROM session_positions
+    WHERE session_id = %s
+    ORDER BY driver_code, lap_number
+"""
+
+
+def _lap_frame(cursor, session_id: str) -> pd.DataFrame:
+    cursor.execute(SUMMARY_LAPS_QUERY, (session_id,))
+    laps = pd.DataFrame([tuple(r) for r in cursor.fetchall()], columns=LAP_COLUMNS)
+    laps['lap_id'] = laps['lap_id'].astype(str)
+    laps['lap_time_seconds'] = laps['lap_time_seconds'].astype(np.float64)
+    return laps
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 3)
+
+
+def _int(value) -> Optional[int]:
+    return None if value is None or pd.isna(value) else int(value)
+
+
+def fastest_lap_rows(session_id: str, laps: pd.DataFrame) -> List[tuple]:
+    """Each driver's fastest timed lap (laps under MIN_VALID_LAP_TIME ignored)"""
+    valid = laps[laps['lap_time_seconds'] >= MIN_VALID_LAP_TIME]
+    if not len(valid):
+        return []
+    best = valid.loc[valid.groupby('driver_code', sort=True)['lap_time_seconds'].idxmin()]
+    return [(session_id, r.driver_code, r.lap_id, int(r.lap_number), _float(r.lap_time_seconds),
+             r.tire_compound, _int(r.tire_life))
+            for r in best.itertuples(index=False)]
+
+
+def stint_rows(session_id: str, laps: pd.DataFrame) -> List[tuple]:
+    """
+    One row per stint, segmented exactly as /api/tire-analysis does
+
+    laps counts every lap from start_lap to end_lap, untimed ones included,
+    so compound usage adds up to the laps driven. avg_lap_time is the mean
+    of the stint's clean_laps: within CLEAN_LAP_RATIO of the driver's own
+    median, so a driver's rows never depend on other drivers' laps and can
+    be refreshed on their own.
+    """
+    stints = segment_stints(list(laps[['driver_code', 'lap_number', 'lap_time_seconds',
+                                       'tire_compound', 'tire_life']].itertuples(index=False)))
+    rows = []
+    medians = {}
+    for i, number in enumerate(stints.stint_numbers()):
+        driver = stints.driver_codes[i]
+        if driver not in medians:
+            driver_times = [stints.lap_times[stints.offsets[j]:stints.offsets[j + 1]]
+                            for j in range(len(stints)) if stints.driver_codes[j] == driver]
+            medians[driver] = float(np.median(np.concatenate(driver_times)))
+        times = stints.lap_times[stints.offsets[i]:stints.offsets[i + 1]]
+        clean = times[times <= medians[driver] * CLEAN_LAP_RATIO]
+        start, end = stints.start_laps[i], stints.end_laps[i]
+        rows.append((session_id, driver, number, stints.compounds[i], start, end,
+                     end - start + 1, len(clean),
+                     _float(clean.mean()) if len(clean) else None, _float(times.min())))
+    return rows
+
+
+def position_rows(session_id: str, laps: pd.DataFrame) -> List[tuple]:
+    """
+    Running position and gap to the leader at the end of every lap
+
+    Positions come from cumulative race time with missing lap times counted
+    as the session median (as `lap_features.add_derived_features` ranks
+    track_position), so they depend on every driver of the session.
+    """
+    if not len(laps):
+        return []
+    elapsed = laps['lap_time_seconds'].fillna(laps['lap_time_seconds'].median())
+    race_time = elapsed.groupby(laps['driver_code']).cumsum()
+    by_lap = race_time.groupby(laps['lap_number'])
+    position = by_lap.rank(method='first').astype(np.int64)
+    gap = race_time - by_lap.transform('min')
+    return [(session_id, driver, int(lap), int(pos), _float(g))
+            for driver, lap, pos, g in zip(laps['driver_code'], laps['lap_number'],
+                                           position, gap)]
+
+
+def refresh_session_summary(cursor, session_id: str,
+                            drivers: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Recompute a session's summary rows from its laps
+
+    Fastest laps and stints are replaced only for `drivers` (default: every
+    driver), so re-ingesting a few changed drivers stays cheap; positions
+    always cover the whole session because every driver affects them.
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction
+        session_id: Session to refresh
+        drivers: Drivers whose laps changed (None = all)
+
+    Returns:
+        Rows written per summary table
+    """
+    laps = _lap_frame(cursor, session_id)
+    if drivers is None:
+        drivers = sorted(set(laps['driver_code']))
+        cursor.execute("DELETE FROM session_fastest_laps WHERE session_id = %s", (session_id,))
+        cursor.execute("DELETE FROM session_stints WHERE session_id = %s", (session_id,))
+    else:
+        drivers = list(drivers)
+        for table in ('session_fastest_laps', 'session_stints'):
+            cursor.execute(f"DELETE FROM {table} WHERE session_id = %s AND driver_code = ANY(%s)",
+                           (session_id, drivers))
+    driver_laps = laps[laps['driver_code'].isin(drivers)]
+
+    written = {
+        'session_fastest_laps': fastest_lap_rows(session_id, driver_laps),
+        'session_stints': stint_rows(session_id, driver_laps),
+        'session_positions': position_rows(session_id, laps),
+    }
+    cursor.execute("DELETE FROM session_positions WHERE session_id = %s", (session_id,))
+    execute_values(
+        cursor,
+        """
+        INSERT INTO session_fastest_laps (session_id, driver_code, lap_id, lap_number,
+                                          lap_time_seconds, tire_compound, tire_life) VALUES %s
+        """,
+        written['session_fastest_laps']
+    )
+    execute_values(
+        cursor,
+        """
+        INSERT INTO session_stints (session_id, driver_code, stint_number, compound, start_lap,
+                                    end_lap, laps, clean_laps, avg_lap_time, best_lap_time) VALUES %s
+        """,
+        written['session_stints']
+    )
+    execute_values(
+        cursor,
+        """
+        INSERT INTO session_positions (session_id, driver_code, lap_number, position,
+                                       gap_to_leader) VALUES %s
+        """,
+        written['session_positions'],
+        page_size=1000
+    )
+    return {table: len(rows) for table, rows in written.items()}
+
+
+def positions_to_json(rows) -> Dict[str, Dict[str, List]]:
+    """POSITIONS_QUERY rows -> per-driver lap, position and gap arrays (chart series)"""
+    drivers: Dict[str, Dict[str, List]] = {}
+    for row in rows:
+        series = drivers.setdefault(row['driver_code'], {'laps': [], 'positions': [], 'gaps': []})
+        series['laps'].append(row['lap_number'])
+        series['positions'].append(row['position'])
+        series['gaps'].append(row['gap_to_leader'])
+    return drivers
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from storage import connect
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Rebuild materialized session summaries")
+    parser.add_argument('--session', help="Only this session_id (default: every session)")
+    args = parser.parse_args(argv)
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    conn = connect(db_config)
+    try:
+        cursor = conn.cursor()
+        if args.session:
+            sessions = [args.session]
+        else:
+            cursor.execute("SELECT session_id FROM sessions ORDER BY date")
+            sessions = [str(r[0]) for r in cursor.fetchall()]
+        for session_id in sessions:
+            start = time.perf_counter()
+            written = refresh_session_summary(cursor, session_id)
+            conn.commit()
+            print(f"✅ {session_id}: {written['session_fastest_laps']} drivers, "
+                  f"{written['session_stints']} stints, {written['session_positions']:,} "
+                  f"positions in {(time.perf_counter() - start) * 1000:.0f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
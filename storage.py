@@ -0,0 +1,370 @@
+"""
+Storage backends
+PostgreSQL (default) or an embedded SQLite database in WAL mode, chosen
+with DB_BACKEND=postgres|sqlite. Both hand out `PooledDatabase(conn, cursor)`
+from `get_database(db_config).connection()`, and SQLite cursors accept the
+PostgreSQL-flavoured SQL used across the repo (`%s` placeholders, `= ANY(%s)`
+list parameters, `::uuid` casts), so routes and loaders run unchanged.
+
+Usage:
+    DB_BACKEND=sqlite SQLITE_PATH=f1_local.sqlite3 python app.py
+    python storage.py init                     # create the SQLite schema
+    python storage.py copy-from-postgres       # snapshot PostgreSQL into SQLite
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from db_pool import PooledDatabase
+
+BACKENDS = ('postgres', 'sqlite')
+DEFAULT_SQLITE_PATH = 'f1_local.sqlite3'
+SQLITE_SCHEMA = Path(__file__).parent / 'schema_sqlite.sql'
+
+# Tables in foreign-key order (copy-from-postgres)
+TABLES = ['sessions', 'drivers', 'laps', 'telemetry', 'driver_fingerprints',
+          'tire_degradation_results', 'session_fastest_laps', 'session_stints',
+          'session_positions']
+
+# Python/NumPy values psycopg2 adapts on its own
+for _type, _adapt in [(np.int64, int), (np.int32, int), (np.int16, int),
+                      (np.float64, float), (np.float32, float), (np.bool_, bool),
+                      (uuid.UUID, str), (date, date.isoformat),
+                      (datetime, lambda v: v.isoformat(' '))]:
+    sqlite3.register_adapter(_type, _adapt)
+# Declared column types read back as the same Python types psycopg2 returns
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter('BOOLEAN', lambda b: bool(int(b)))
+
+
+def backend() -> str:
+    """Configured backend name (DB_BACKEND, default postgres)"""
+    name = os.getenv('DB_BACKEND', 'postgres').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"DB_BACKEND must be one of {', '.join(BACKENDS)}, not {name!r}")
+    return name
+
+
+_ANY_PARAM = re.compile(r"=\s*ANY\s*\(\s*%s(?:::\w+(?:\[\])?)?\s*\)", re.IGNORECASE)
+_CAST = re.compile(r"(%s)::\w+(?:\[\])?")
+
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql: str) -> str:
+    """PostgreSQL-style statement -> SQLite (list parameters arrive as JSON arrays)"""
+    sql = _ANY_PARAM.sub("IN (SELECT value FROM json_each(%s))", sql)
+    sql = _CAST.sub(r"\1", sql)
+    return sql.replace('%s', '?').replace('%%', '%')
+
+
+def _adapt_params(params: Optional[Sequence]) -> Sequence:
+    if not params:
+        return ()
+    return [json.dumps(list(p), default=str) if isinstance(p, (list, tuple, np.ndarray)) else p
+            for p in params]
+
+
+class _Column(NamedTuple):
+    """`cursor.description` entry; `.name` like psycopg2's Column"""
+    name: str
+
+
+class SQLiteCursor:
+    """DB-API cursor with psycopg2's calling conventions on top of sqlite3"""
+
+    def __init__(self, connection: 'SQLiteConnection', dict_rows: bool = False):
+        self.connection = connection
+        self.itersize = 2000  # Accepted for named-cursor callers; rows are read lazily anyway
+        self._cursor = connection.raw.cursor()
+        if dict_rows:
+            self._cursor.row_factory = sqlite3.Row
+
+    def execute(self, sql: str, params: Optional[Sequence] = None):
+        self._cursor.execute(translate_sql(sql), _adapt_params(params))
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence]):
+        self._cursor.executemany(translate_sql(sql), (_adapt_params(p) for p in seq_of_params))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._cursor.fetchmany(size or self.itersize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self) -> Optional[List[_Column]]:
+        if self._cursor.description is None:
+            return None
+        return [_Column(d[0]) for d in self._cursor.description]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection that hands out SQLiteCursors (psycopg2-style `cursor()`)"""
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.raw = sqlite3.connect(path, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                                   check_same_thread=False)
+        self.raw.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA foreign_keys = ON;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA cache_size = -65536;
+            PRAGMA mmap_size = 268435456;
+        """)
+
+    def cursor(self, name: Optional[str] = None, cursor_factory=None) -> SQLiteCursor:
+        """`name` (server-side cursors) is ignored; any `cursor_factory` gives dict-like rows"""
+        return SQLiteCursor(self, dict_rows=cursor_factory is not None)
+
+    @property
+    def closed(self) -> bool:
+        try:
+            self.raw.total_changes
+            return False
+        except sqlite3.ProgrammingError:
+            return True
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+
+def create_schema(conn: SQLiteConnection):
+    """Create every table and index (no-op for tables that exist)"""
+    conn.raw.executescript(SQLITE_SCHEMA.read_text())
+
+
+class SQLiteDatabase:
+    """
+    Embedded database with the F1ConnectionPool interface
+
+    One connection per thread (WAL lets readers run alongside the single
+    writer), created lazily and reused; the schema is created on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._metrics = {'connections': 0, 'acquired': 0, 'errors_returned': 0}
+        conn = SQLiteConnection(self.path)
+        try:
+            create_schema(conn)
+        finally:
+            conn.close()
+
+    def _conn(self) -> SQLiteConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = self._local.conn = SQLiteConnection(self.path)
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._metrics['connections'] += 1
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledDatabase]:
+        """Same contract as `F1ConnectionPool.connection`: commit on success, roll back on error"""
+        conn = self._conn()
+        with self._lock:
+            self._metrics['acquired'] += 1
+        cursor = conn.cursor(cursor_factory=sqlite3.Row)
+        try:
+            yield PooledDatabase(conn=conn, cursor=cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                self._metrics['errors_returned'] += 1
+            raise
+        finally:
+            cursor.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'backend': 'sqlite', 'path': self.path, **self._metrics}
+
+
+_sqlite: Optional[SQLiteDatabase] = None
+_sqlite_lock = threading.Lock()
+
+
+def get_sqlite_database() -> SQLiteDatabase:
+    """Process-wide SQLite database at SQLITE_PATH"""
+    global _sqlite
+    if _sqlite is None:
+        with _sqlite_lock:
+            if _sqlite is None:
+                _sqlite = SQLiteDatabase(os.getenv('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+    return _sqlite
+
+
+def get_database(db_config: Dict):
+    """The configured backend: the PostgreSQL pool or the SQLite database"""
+    if backend() == 'sqlite':
+        return get_sqlite_database()
+    from db_pool import get_pool
+    return get_pool(db_config)
+
+
+def database_stats() -> Optional[Dict]:
+    """Pool/connection metrics of whichever backend is in use (None before first use)"""
+    if backend() == 'sqlite':
+        return _sqlite.stats() if _sqlite is not None else None
+    from db_pool import pool_stats
+    return pool_stats()
+
+
+def connect(db_config: Dict):
+    """A standalone connection for scripts (psycopg2, or SQLite at SQLITE_PATH)"""
+    if backend() == 'sqlite':
+        get_sqlite_database()  # Schema
+        return SQLiteConnection(os.getenv('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+    import psycopg2
+    return psycopg2.connect(**db_config)
+
+
+def is_sqlite(cursor) -> bool:
+    return isinstance(getattr(cursor, 'wrapped', cursor), SQLiteCursor)  # Unwrap InstrumentedCursor
+
+
+def execute_values(cursor, sql: str, rows: Sequence[Sequence], page_size: int = 100):
+    """`psycopg2.extras.execute_values` for either backend (`VALUES %s` statements)"""
+    if not is_sqlite(cursor):
+        from psycopg2.extras import execute_values as pg_execute_values
+        return pg_execute_values(cursor, sql, rows, page_size=page_size)
+    rows = list(rows)
+    if not rows:
+        return
+    placeholders = f"({', '.join(['%s'] * len(rows[0]))})"
+    cursor.executemany(sql.replace('VALUES %s', f'VALUES {placeholders}', 1), rows)
+
+
+def insert_frame(cursor, table: str, frame: pd.DataFrame, columns: List[str],
+                 chunk_rows: int = 250_000) -> int:
+    """
+    SQLite counterpart of `bulk_loader.copy_frame`: chunked executemany
+
+    Floats are rounded to 3 decimals like the COPY path.
+
+    Returns:
+        Number of rows inserted
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame[columns].iloc[start:start + chunk_rows].round(3)
+        values = chunk.astype(object).where(chunk.notna(), None)
+        cursor._cursor.executemany(sql, values.itertuples(index=False, name=None))
+    return len(frame)
+
+
+def copy_from_postgres(pg_conn, sqlite_conn: SQLiteConnection,
+                       tables: Sequence[str] = TABLES, batch_size: int = 50_000) -> Dict[str, int]:
+    """
+    Snapshot PostgreSQL tables into SQLite (replacing their rows)
+
+    Columns are matched by name, so session and lap keys carry over.
+
+    Returns:
+        Rows copied per table
+    """
+    from telemetry_stream import iter_row_batches
+
+    counts = {}
+    sqlite_cursor = sqlite_conn.cursor()
+    for table in reversed(tables):
+        sqlite_cursor.execute(f"DELETE FROM {table}")
+    for table in tables:
+        sqlite_cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+        target = {c.name for c in sqlite_cursor.description}
+        counts[table] = 0
+        for columns, rows in iter_row_batches(pg_conn, f"SELECT * FROM {table}", (), batch_size):
+            keep = [i for i, c in enumerate(columns) if c in target]
+            sql = (f"INSERT INTO {table} ({', '.join(columns[i] for i in keep)}) "
+                   f"VALUES ({', '.join(['?'] * len(keep))})")
+            sqlite_cursor._cursor.executemany(sql, ([r[i] for i in keep] for r in rows))
+            counts[table] += len(rows)
+    sqlite_conn.commit()
+    pg_conn.rollback()
+    return counts
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Embedded SQLite storage backend")
+    parser.add_argument('command', choices=['init', 'copy-from-postgres'])
+    parser.add_argument('--path', default=os.getenv('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+    args = parser.parse_args(argv)
+
+    sqlite_conn = SQLiteConnection(args.path)
+    create_schema(sqlite_conn)
+    if args.command == 'init':
+        print(f"✅ SQLite schema ready at {args.path}")
+        return
+
+    import psycopg2
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    pg_conn = psycopg2.connect(**db_config)
+    start = time.perf_counter()
+    try:
+        counts = copy_from_postgres(pg_conn, sqlite_conn)
+    finally:
+        pg_conn.close()
+        sqlite_conn.close()
+    print(f"✅ Copied into {args.path} in {time.perf_counter() - start:.1f}s: "
+          + ', '.join(f"{t} {n:,}" for t, n in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Optimal pit-strategy search
+Dynamic programming over stint boundaries finds the k fastest strategies
+(stop count, stop laps and compound sequence) for a race, under the
+two-compound rule, with the same lap model as `race_sim`.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lap_predictor import COMPOUND_MODIFIERS
+from race_sim import TIRE_DEG_PER_LAP, lap_time_table
+
+DRY_COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+# Using either waives the two-compound rule
+WET_COMPOUNDS = ('INTERMEDIATE', 'WET')
+
+DEFAULT_MAX_STOPS = 3
+DEFAULT_TOP_K = 5
+# Request limits. Work grows with laps^2 x stops x k: a typical race
+# (57-78 laps, 3 stops, top 5) takes ~15-20 ms, the largest allowed
+# request (200 laps, 5 stops, top 20) ~0.2 s on one core
+MAX_TOP_K = 20
+MAX_STOPS = 5
+MAX_RACE_LAPS = 200
+
+
+@dataclass
+class StrategyPlan:
+    """One complete race strategy"""
+    stints: List[int]
+    compounds: List[str]
+    estimated_time: float
+
+    @property
+    def stops(self) -> List[int]:
+        """Laps after which the car pits"""
+        return np.cumsum(self.stints[:-1]).tolist()
+
+    def to_dict(self) -> Dict:
+        n_stops = len(self.stints) - 1
+        return {
+            'name': f'{n_stops}-Stop' if n_stops else 'No-Stop',
+            'stops': self.stops,
+            'stints': self.stints,
+            'compounds': self.compounds,
+            'estimated_time': self.estimated_time,
+        }
+
+
+def stint_cost_table(lap_table: np.ndarray) -> np.ndarray:
+    """
+    Time of every possible stint, from a [compound, lap, tire_age] lap table
+
+    Returns:
+        (C, L, L + 1) array indexed [compound, start lap, stint length];
+        stints running past the flag cost inf
+    """
+    n_compounds, n_laps, _ = lap_table.shape
+    age = np.arange(n_laps)
+    lap = age[:, None] + age[None, :]                        # [start, age]
+    inside = lap < n_laps
+    laps = np.where(inside, lap_table[:, np.minimum(lap, n_laps - 1), age[None, :]], 0.0)
+    costs = np.concatenate([np.zeros((n_compounds, n_laps, 1)), np.cumsum(laps, axis=2)], axis=2)
+    too_long = ~np.concatenate([np.ones((n_laps, 1), dtype=bool), inside], axis=1)
+    costs[:, too_long] = np.inf
+    return costs
+
+
+def _smallest(pool: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """k smallest values along the last axis (ascending) and their positions"""
+    width = pool.shape[-1]
+    if width > k:
+        index = np.argpartition(pool, k - 1, axis=-1)[..., :k]
+    else:
+        index = np.broadcast_to(np.arange(width), pool.shape)
+    values = np.take_along_axis(pool, index, axis=-1)
+    order = np.argsort(values, axis=-1, kind='stable')
+    values = np.take_along_axis(values, order, axis=-1)
+    index = np.take_along_axis(index, order, axis=-1)
+    if width < k:
+        pad = pool.shape[:-1] + (k - width,)
+        values = np.concatenate([values, np.full(pad, np.inf)], axis=-1)
+        index = np.concatenate([index, np.zeros(pad, dtype=index.dtype)], axis=-1)
+    return values, index
+
+
+def optimize_strategy(total_laps: int,
+                      base_lap_time: float,
+                      compounds: Sequence[str] = DRY_COMPOUNDS,
+                      pit_time: float = 22.0,
+                      top_k: int = DEFAULT_TOP_K,
+                      max_stops: int = DEFAULT_MAX_STOPS,
+                      min_stint_laps: int = 1,
+                      degradation: Optional[Dict[str, float]] = None,
+                      require_two_compounds: bool = True) -> List[StrategyPlan]:
+    """
+    The k fastest strategies for a race
+
+    Stint costs come from one precomputed [compound, start lap, length]
+    table. The DP runs backwards over the laps where a stint can start;
+    its state is (lap, current compound, rule met, stops so far), where
+    "rule met" is the compound set used reduced to what the two-compound
+    rule needs: if it is not met yet, every earlier stint ran the current
+    compound. Each state keeps its k best completions, so the top-k comes
+    out of one pass.
+
+    Args:
+        total_laps: Race distance in laps
+        base_lap_time: Base lap time in seconds
+        compounds: Compounds that may be fitted
+        pit_time: Time lost per pit stop
+        top_k: Number of strategies to return
+        max_stops: Most pit stops considered (at most MAX_STOPS)
+        min_stint_laps: Shortest allowed stint
+        degradation: Seconds per lap of tire age per compound (default:
+            the analytical model's rate for every compound)
+        require_two_compounds: Enforce the two-dry-compound rule
+
+    Returns:
+        Up to `top_k` strategies, fastest first (fewer if fewer are legal)
+
+    Raises:
+        ValueError: On out-of-range arguments or unknown compounds
+    """
+    names = list(dict.fromkeys(c.upper() for c in compounds))
+    unknown = [c for c in names if c not in COMPOUND_MODIFIERS]
+    if unknown:
+        raise ValueError(f"Unknown compounds: {', '.join(unknown)}")
+    if not names:
+        raise ValueError("At least one compound is required")
+    if (require_two_compounds and not any(c in WET_COMPOUNDS for c in names)
+            and len(names) < 2):
+        raise ValueError("At least two dry compounds are required by the two-compound rule")
+    if not (np.isfinite(base_lap_time) and base_lap_time > 0):
+        raise ValueError("base_lap_time must be a positive number")
+    if not (np.isfinite(pit_time) and pit_time >= 0):
+        raise ValueError("pit_time must be a non-negative number")
+    if degradation and not all(np.isfinite(rate) for rate in degradation.values()):
+        raise ValueError("degradation rates must be finite")
+    if not 1 <= total_laps <= MAX_RACE_LAPS:
+        raise ValueError(f"total_laps must be between 1 and {MAX_RACE_LAPS}")
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"top_k must be between 1 and {MAX_TOP_K}")
+    if not 0 <= max_stops <= MAX_STOPS:
+        raise ValueError(f"max_stops must be between 0 and {MAX_STOPS}")
+    if min_stint_laps < 1:
+        raise ValueError("min_stint_laps must be >= 1")
+    # More stops than this cannot fit min_stint_laps stints into the race
+    max_stops = max(0, min(max_stops, total_laps // min_stint_laps - 1))
+
+    n_laps, n_compounds, k = total_laps, len(names), top_k
+    rates = None
+    if degradation:
+        rates = [degradation.get(c, TIRE_DEG_PER_LAP) for c in names]
+    costs = stint_cost_table(lap_time_table(
+        base_lap_time, n_laps, [COMPOUND_MODIFIERS[c] for c in names], degradation=rates))
+    costs[:, :, :min_stint_laps] = np.inf
+
+    # Rule state after fitting compound c2 on a car that ran c with rule state f
+    wet = np.array([c in WET_COMPOUNDS for c in names])
+    compound_ids = np.arange(n_compounds)
+    after_pit = np.ones((n_compounds, 2, n_compounds), dtype=np.int64)      # [c, f, c2]
+    if require_two_compounds:
+        after_pit = ((np.arange(2)[None, :, None] == 1)
+                     | (compound_ids[:, None, None] != compound_ids[None, None, :])
+                     | wet[None, None, :]).astype(np.int64)
+    at_start = (wet | (not require_two_compounds)).astype(np.int64)
+
+    # best[l, c, f, s]: k best times from a stint starting at lap l to the flag;
+    # pit[l, c, f, s]: k best times from pitting off compound c into lap l
+    shape = (n_laps, n_compounds, 2, max_stops + 1, k)
+    best = np.full(shape, np.inf)
+    best_choice = np.zeros(shape, dtype=np.int64)
+    pit = np.full((n_laps + 1,) + shape[1:], np.inf)
+    pit_choice = np.zeros((n_laps + 1,) + shape[1:], dtype=np.int64)
+
+    for start in range(n_laps - 1, -1, -1):
+        # Choice 0: run to the flag, legal only once the rule is met
+        finish = np.broadcast_to(costs[:, start, n_laps - start][:, None, None, None],
+                                 (n_compounds, 2, max_stops + 1, 1)).copy()
+        if require_two_compounds:
+            finish[:, 0] = np.inf
+        # Choice 1 + n_idx * k + rank: pit after n_idx + 1 laps, then the rank-th
+        # best continuation from that pit
+        n_pit = n_laps - start - 1
+        if n_pit:
+            stint = costs[:, start, 1:n_pit + 1]
+            follow = pit[start + 1:n_laps].transpose(1, 2, 3, 0, 4)
+            pool = stint[:, None, None, :, None] + follow
+            pool = np.concatenate(
+                [finish, pool.reshape(n_compounds, 2, max_stops + 1, n_pit * k)], axis=-1)
+        else:
+            pool = finish
+        best[start], best_choice[start] = _smallest(pool, k)
+
+        if start and max_stops:
+            # Pit into lap `start`: choice c2 * k + rank
+            nxt = best[start][:, :, 1:]                                  # [c2, f, s + 1]
+            options = nxt[compound_ids[None, None, :], after_pit]        # [c, f, c2, s, k]
+            options = pit_time + options.transpose(0, 1, 3, 2, 4).reshape(
+                n_compounds, 2, max_stops, n_compounds * k)
+            pit[start, :, :, :max_stops], pit_choice[start, :, :, :max_stops] = \
+                _smallest(options, k)
+
+    first = best[0][compound_ids, at_start, 0].reshape(-1)
+    totals, picks = _smallest(first, k)
+
+    plans = []
+    for total, pick in zip(totals.tolist(), picks.tolist()):
+        if not np.isfinite(total):
+            break
+        compound, rank = divmod(pick, k)
+        flag, stops, lap = int(at_start[compound]), 0, 0
+        stints, fitted = [], []
+        while True:
+            fitted.append(names[compound])
+            choice = int(best_choice[lap, compound, flag, stops, rank])
+            if choice == 0:
+                stints.append(n_laps - lap)
+                break
+            n_idx, rank = divmod(choice - 1, k)
+            stints.append(n_idx + 1)
+            lap += n_idx + 1
+            next_compound, rank = divmod(int(pit_choice[lap, compound, flag, stops, rank]), k)
+            flag = int(after_pit[compound, flag, next_compound])
+            compound, stops = next_compound, stops + 1
+        plans.append(StrategyPlan(stints, fitted, round(total, 2)))
+    return plans
@@ -0,0 +1,213 @@
+"""
+Distance-aligned multi-lap telemetry comparison
+Puts several laps on one distance grid and computes a cumulative
+delta-time curve against a reference lap.
+"""
+
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Channels interpolated linearly between samples
+CONTINUOUS_CHANNELS = ('speed', 'throttle', 'rpm')
+# Channels held at the previous sample's value (no in-between gears)
+STEP_CHANNELS = ('gear', 'brake', 'drs')
+
+MAX_LAPS = 20
+MIN_SPEED_MS = 1.0  # Guards the time integration against standstill samples
+
+
+@dataclass
+class LapTrace:
+    """One lap's raw telemetry as column arrays, sorted by distance"""
+    lap_id: str
+    session_id: str
+    driver_code: str
+    lap_number: int
+    lap_time_seconds: Optional[float]
+    distance: np.ndarray
+    channels: Dict[str, np.ndarray]
+
+    @property
+    def length(self) -> float:
+        return float(self.distance[-1]) if len(self.distance) else 0.0
+
+
+def parse_lap_ids(raw: str) -> List[str]:
+    """
+    Comma-separated lap UUIDs -> canonical, de-duplicated list (order kept)
+
+    Raises:
+        ValueError: If any entry is not a UUID
+    """
+    return list(dict.fromkeys(str(uuid.UUID(part.strip()))
+                              for part in raw.split(',') if part.strip()))
+
+
+def fetch_lap_traces(cursor, lap_ids: Sequence[str]) -> List[LapTrace]:
+    """
+    Load telemetry for several laps in one query
+
+    Rows come back ordered by (lap_key, distance); the session keys prune
+    the scan to the laps' telemetry partitions.
+
+    Returns:
+        Traces in the order of `lap_ids` (laps with fewer than two samples
+        are omitted)
+    """
+    cursor.execute(
+        """
+        SELECT l.lap_id, l.session_id, l.driver_code, l.lap_number, l.lap_time_seconds,
+               l.lap_key, s.session_key
+        FROM laps l JOIN sessions s ON s.session_id = l.session_id
+        WHERE l.lap_id = ANY(%s::uuid[])
+        """,
+        (list(lap_ids),)
+    )
+    laps = {r[5]: r for r in cursor.fetchall()}
+    if not laps:
+        return []
+
+    columns = CONTINUOUS_CHANNELS + STEP_CHANNELS
+    cursor.execute(
+        f"""
+        SELECT lap_key, distance, {', '.join(columns)}
+        FROM telemetry
+        WHERE session_key = ANY(%s) AND lap_key = ANY(%s)
+        ORDER BY lap_key, distance
+        """,
+        (sorted({r[6] for r in laps.values()}), list(laps))
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    ids = np.array([r[0] for r in rows])
+    values = np.array([r[1:] for r in rows], dtype=np.float64)  # None -> NaN
+    bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts, ends = np.r_[0, bounds], np.r_[bounds, len(ids)]
+
+    traces = {}
+    for start, end in zip(starts, ends):
+        if end - start < 2:
+            continue
+        lap = laps[ids[start]]
+        lap_id = str(lap[0])
+        block = values[start:end]
+        traces[lap_id] = LapTrace(
+            lap_id=lap_id,
+            session_id=str(lap[1]),
+            driver_code=lap[2],
+            lap_number=lap[3],
+            lap_time_seconds=lap[4],
+            distance=block[:, 0],
+            channels={name: block[:, i + 1] for i, name in enumerate(columns)},
+        )
+    return [traces[lap_id] for lap_id in lap_ids if lap_id in traces]
+
+
+def elapsed_time(trace: LapTrace) -> np.ndarray:
+    """
+    Time since the start of the lap at each sample
+
+    Telemetry rows carry no timestamps, so time is integrated from distance
+    and speed (trapezoidal), then scaled to the official lap time when known
+    so integration drift does not end up in the delta.
+    """
+    speed = np.nan_to_num(trace.channels['speed'], nan=0.0) / 3.6
+    speed = np.maximum(speed, MIN_SPEED_MS)
+    step = np.diff(trace.distance) / ((speed[1:] + speed[:-1]) / 2)
+    time = np.concatenate([[0.0], np.cumsum(step)])
+    if trace.lap_time_seconds and time[-1] > 0:
+        time *= trace.lap_time_seconds / time[-1]
+    return time
+
+
+def _interp_indices(x: np.ndarray, grid: np.ndarray):
+    """Left sample index and linear weight of each grid point (shared by all channels)"""
+    right = np.clip(np.searchsorted(x, grid, side='right'), 1, len(x) - 1)
+    left = right - 1
+    span = x[right] - x[left]
+    weight = np.clip(np.divide(grid - x[left], span, out=np.zeros_like(grid), where=span > 0),
+                     0.0, 1.0)
+    return left, right, weight
+
+
+def align_laps(traces: Sequence[LapTrace], step: float = 5.0) -> Dict:
+    """
+    Resample laps onto the first lap's distance axis
+
+    Every lap's distance is scaled to the reference lap's length (lines and
+    distance integration differ by a few metres per lap), then each lap's
+    channel matrix is interpolated in one pass using shared searchsorted
+    indices: linearly for speed/throttle/RPM, sample-and-hold for
+    gear/brake/DRS.
+
+    Args:
+        traces: Laps to compare; the first is the reference
+        step: Grid spacing in metres
+
+    Returns:
+        Dict with the distance grid and, per lap, aligned channels, elapsed
+        time and the cumulative delta to the reference (positive = slower)
+    """
+    reference = traces[0]
+    grid = np.arange(0.0, reference.length + step / 2, step)
+    grid[-1] = min(grid[-1], reference.length)
+
+    aligned = []
+    ref_time = None
+    for trace in traces:
+        scale = reference.length / trace.length if trace.length > 0 else 1.0
+        x = trace.distance * scale
+        left, right, weight = _interp_indices(x, grid)
+
+        continuous = np.column_stack([trace.channels[c] for c in CONTINUOUS_CHANNELS])
+        lerped = continuous[left] + weight[:, None] * (continuous[right] - continuous[left])
+        held = np.column_stack([trace.channels[c] for c in STEP_CHANNELS])[
+            np.where(weight >= 1.0, right, left)]
+
+        time = elapsed_time(trace)
+        time = time[left] + weight * (time[right] - time[left])
+        if ref_time is None:
+            ref_time = time
+
+        lap = {name: lerped[:, i] for i, name in enumerate(CONTINUOUS_CHANNELS)}
+        lap.update({name: held[:, i] for i, name in enumerate(STEP_CHANNELS)})
+        lap.update(time=time, delta=time - ref_time)
+        aligned.append((trace, lap))
+
+    return {'distance': grid, 'laps': aligned}
+
+
+def _column(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    """Rounded JSON-safe list (NaN -> null)"""
+    rounded = np.round(values, decimals)
+    return [None if v != v else v for v in rounded.tolist()]
+
+
+def comparison_to_json(result: Dict) -> Dict:
+    """Convert `align_laps` output to JSON columns"""
+    return {
+        'reference_lap_id': result['laps'][0][0].lap_id,
+        'distance': _column(result['distance'], 1),
+        'laps': [
+            {
+                'lap_id': trace.lap_id,
+                'driver_code': trace.driver_code,
+                'lap_number': trace.lap_number,
+                'lap_time_seconds': trace.lap_time_seconds,
+                'speed': _column(lap['speed'], 1),
+                'throttle': _column(lap['throttle'], 0),
+                'rpm': _column(lap['rpm'], 0),
+                'gear': _column(lap['gear'], 0),
+                'brake': _column(lap['brake'], 0),
+                'drs': _column(lap['drs'], 0),
+                'time': _column(lap['time'], 3),
+                'delta': _column(lap['delta'], 3),
+            }
+            for trace, lap in result['laps']
+        ],
+    }
@@ -0,0 +1,256 @@
+"""
+Compact telemetry layout
+Telemetry is partitioned by session (one PostgreSQL list partition per
+session) and keyed by small integers: `sessions.session_key`,
+`laps.lap_key` and the sample's position in its lap. A lap's rows are
+written together in distance order, so a per-lap read is one short
+sequential range found through a BRIN index, and rows carry no UUIDs or
+timestamps. On SQLite the table is clustered on (lap_key, sample) instead.
+
+Usage:
+    python telemetry_store.py migrate     # after migrations/004_compact_telemetry.sql
+    python telemetry_store.py sizes
+"""
+
+import argparse
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import is_sqlite
+
+# Per-sample channels served by the API, in table order
+TELEMETRY_FIELDS = [
+    'distance', 'speed', 'throttle', 'brake', 'drs', 'gear', 'rpm',
+    'position_x', 'position_y'
+]
+# Per-sample values as stored; lod_tier is bookkeeping and never served
+STORED_FIELDS = TELEMETRY_FIELDS + ['lod_tier']
+STORED_COLUMNS = ['session_key', 'lap_key', 'sample'] + STORED_FIELDS
+
+# Staging table for re-keying samples that still carry the frame's lap_id
+STAGE_DDL = """
+    CREATE TEMP TABLE telemetry_stage (
+        lap_id UUID, sample INTEGER, distance REAL, speed SMALLINT, throttle SMALLINT,
+        brake BOOLEAN, drs SMALLINT, gear SMALLINT, rpm SMALLINT,
+        position_x REAL, position_y REAL, lod_tier SMALLINT
+    ) ON COMMIT DROP
+"""
+
+
+def partition_name(session_key: int) -> str:
+    return f"telemetry_s{int(session_key)}"
+
+
+def ensure_partition(cursor, session_key: int) -> str:
+    """
+    Create the session's telemetry partition if needed
+
+    Returns:
+        Table to write the session's rows into (the partition itself, so
+        COPY skips tuple routing; plain `telemetry` on SQLite)
+    """
+    if is_sqlite(cursor):
+        return 'telemetry'
+    name = partition_name(session_key)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF telemetry "
+                   f"FOR VALUES IN ({int(session_key)})")
+    return name
+
+
+def summarize_partition(cursor, session_key: int):
+    """
+    Summarize page ranges written since the last VACUUM
+
+    Unsummarized BRIN ranges match every query, so call this after
+    writing a session or its laps would be found by scanning the new pages.
+    """
+    if is_sqlite(cursor):
+        return
+    cursor.execute(
+        """
+        SELECT brin_summarize_new_values(i.indexrelid::regclass)
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_am a ON a.oid = c.relam
+        WHERE i.indrelid = to_regclass(%s) AND a.amname = 'brin'
+        """,
+        (partition_name(session_key),)
+    )
+
+
+def get_session_key(cursor, session_id: str) -> int:
+    cursor.execute("SELECT session_key FROM sessions WHERE session_id = %s", (session_id,))
+    return cursor.fetchone()[0]
+
+
+def lap_keys(cursor, session_id: str, driver_codes: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """lap_id -> lap_key for a session's laps (optionally only some drivers)"""
+    query = "SELECT lap_id, lap_key FROM laps WHERE session_id = %s"
+    params: List = [session_id]
+    if driver_codes is not None:
+        query += " AND driver_code = ANY(%s)"
+        params.append(list(driver_codes))
+    cursor.execute(query, params)
+    return {str(r[0]): r[1] for r in cursor.fetchall()}
+
+
+def lap_location(cursor, lap_id: str) -> Optional[Tuple[str, int, int]]:
+    """(session_id, session_key, lap_key) of a lap, or None if it does not exist"""
+    try:
+        lap_id = str(uuid.UUID(str(lap_id)))
+    except ValueError:
+        return None  # Not a UUID, so no such lap (PostgreSQL would reject the cast)
+    cursor.execute(
+        """
+        SELECT l.session_id, s.session_key, l.lap_key
+        FROM laps l JOIN sessions s ON s.session_id = l.session_id
+        WHERE l.lap_id = %s
+        """,
+        (lap_id,)
+    )
+    row = cursor.fetchone()
+    return (str(row[0]), row[1], row[2]) if row else None
+
+
+def lap_telemetry_query(columns: str, lod: bool = False) -> str:
+    """
+    Samples of one lap in distance order
+
+    Parameters: session_key, lap_key (then the LOD tier if `lod`). The
+    session key prunes to one partition.
+    """
+    return (f"SELECT {columns} FROM telemetry WHERE session_key = %s AND lap_key = %s"
+            + (" AND lod_tier <= %s" if lod else "") + " ORDER BY distance")
+
+
+def with_samples(telemetry: pd.DataFrame) -> pd.DataFrame:
+    """Frame rows sorted by (lap_id, distance) with each row's `sample` number in its lap"""
+    telemetry = telemetry.sort_values(['lap_id', 'distance'], kind='stable')
+    return telemetry.assign(sample=telemetry.groupby('lap_id', sort=False).cumcount().to_numpy())
+
+
+def keyed_frame(telemetry: pd.DataFrame, session_key: int, keys: Dict[str, int]) -> pd.DataFrame:
+    """
+    Extracted telemetry (keyed by lap_id) -> STORED_COLUMNS rows
+
+    Rows come out in (lap_key, sample) order so each lap lands in
+    consecutive pages.
+    """
+    frame = with_samples(telemetry)
+    frame = frame.assign(session_key=session_key, lap_key=frame['lap_id'].map(keys).to_numpy())
+    frame = frame[frame['lap_key'].notna()].astype({'lap_key': np.int64})
+    return frame.sort_values(['lap_key', 'sample'], kind='stable')[STORED_COLUMNS]
+
+
+def delete_lap_telemetry(cursor, session_key: int, keys: Sequence[int]):
+    """Remove the samples of some laps of one session"""
+    if len(keys):
+        cursor.execute("DELETE FROM telemetry WHERE session_key = %s AND lap_key = ANY(%s)",
+                       (session_key, [int(k) for k in keys]))
+
+
+def migrate_legacy(conn, session_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    Copy `telemetry_legacy` (the pre-004 table) into session partitions
+
+    One session per transaction, in (lap_key, distance) order. Sessions
+    whose partition already has rows are skipped, so an interrupted run
+    can be resumed.
+
+    Returns:
+        Samples copied per session_id
+    """
+    cursor = conn.cursor()
+    query = "SELECT session_id, session_key FROM sessions"
+    params: Tuple = ()
+    if session_id:
+        query += " WHERE session_id = %s"
+        params = (session_id,)
+    cursor.execute(query + " ORDER BY session_key", params)
+    sessions = cursor.fetchall()
+
+    copied = {}
+    for sid, session_key in sessions:
+        name = ensure_partition(cursor, session_key)
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {name})")
+        if cursor.fetchone()[0]:
+            conn.commit()
+            continue
+        cursor.execute(
+            f"""
+            INSERT INTO {name} ({', '.join(STORED_COLUMNS)})
+            SELECT %s, l.lap_key,
+                   ROW_NUMBER() OVER (PARTITION BY l.lap_key ORDER BY t.distance, t.telemetry_id) - 1,
+                   {', '.join('t.' + c for c in STORED_FIELDS)}
+            FROM telemetry_legacy t JOIN laps l ON l.lap_id = t.lap_id
+            WHERE l.session_id = %s
+            ORDER BY l.lap_key, t.distance, t.telemetry_id
+            """,
+            (session_key, sid)
+        )
+        copied[str(sid)] = cursor.rowcount
+        summarize_partition(cursor, session_key)
+        cursor.execute(f"ANALYZE {name}")
+        conn.commit()
+        print(f"✅ {sid}: {copied[str(sid)]:,} samples -> {name}")
+    return copied
+
+
+def table_sizes(cursor) -> Dict[str, int]:
+    """On-disk bytes (heap + indexes) of the partitioned table and any legacy table"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(pg_total_relation_size(relid)), 0)
+        FROM pg_partition_tree('telemetry')
+    """)
+    sizes = {'telemetry': int(cursor.fetchone()[0])}
+    cursor.execute("SELECT to_regclass('telemetry_legacy') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        cursor.execute("SELECT pg_total_relation_size('telemetry_legacy')")
+        sizes['telemetry_legacy'] = int(cursor.fetchone()[0])
+    return sizes
+
+
+def main(argv=None):
+    import psycopg2
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Partitioned telemetry migration and sizes")
+    sub = parser.add_subparsers(dest='command', required=True)
+    migrate = sub.add_parser('migrate', help="Copy telemetry_legacy into session partitions")
+    migrate.add_argument('--session', help="Only this session_id (default: all)")
+    migrate.add_argument('--drop-legacy', action='store_true',
+                         help="Drop telemetry_legacy once every session is copied")
+    sub.add_parser('sizes', help="Report telemetry disk footprint")
+    args = parser.parse_args(argv)
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'f1_telemetry'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    conn = psycopg2.connect(**db_config)
+    try:
+        cursor = conn.cursor()
+        if args.command == 'migrate':
+            start = time.perf_counter()
+            copied = migrate_legacy(conn, args.session)
+            print(f"📊 Copied {sum(copied.values()):,} samples from {len(copied)} session(s) "
+                  f"in {time.perf_counter() - start:.1f}s")
+            if args.drop_legacy and not args.session:
+                cursor.execute("DROP TABLE telemetry_legacy")
+                conn.commit()
+                print("🗑️  Dropped telemetry_legacy")
+        for table, size in table_sizes(cursor).items():
+            print(f"💾 {table}: {size / 1e6:,.1f} MB")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Streaming telemetry serialization
+Reads rows through a server-side (named) cursor in batches and yields
+NDJSON or chunked JSON, so memory stays flat regardless of lap length.
+"""
+
+import uuid
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def iter_row_batches(conn, query: str, params: Sequence,
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[List[str], list]]:
+    """
+    Execute `query` on a named cursor and yield (column_names, rows) batches
+
+    Only `batch_size` rows are held client side at any time. The caller
+    must keep the connection's transaction open while iterating.
+    """
+    cursor = conn.cursor(name=f"telemetry_stream_{uuid.uuid4().hex}")
+    cursor.itersize = batch_size
+    try:
+        cursor.execute(query, params)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if columns is None:
+                columns = [c.name for c in cursor.description]
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        cursor.close()
+
+
+def ndjson_chunks(batches: Iterator[Tuple[List[str], list]],
+                  dumps: Callable[[object], str]) -> Iterator[str]:
+    """One JSON object per line, one chunk per batch"""
+    for columns, rows in batches:
+        yield ''.join(dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def json_array_chunks(batches: Iterator[Tuple[List[str], list]],
+                      dumps: Callable[[object], str],
+                      key: str = 'telemetry') -> Iterator[str]:
+    """
+    The same document `/api/telemetry/<lap_id>` returns ({key: [...]}),
+    emitted incrementally with chunked transfer encoding
+    """
+    yield '{"%s": [' % key
+    first = True
+    for columns, rows in batches:
+        body = ','.join(dumps(dict(zip(columns, row))) for row in rows)
+        yield body if first else ',' + body
+        first = False
+    yield ']}'
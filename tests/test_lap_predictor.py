@@ -0,0 +1,65 @@
+"""Batch lap time prediction against the row-by-row `predict`"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lap_predictor import LapTimePredictor
+
+FACTORS = ['tire_degradation', 'fuel_effect', 'traffic_effect', 'compound_modifier']
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    rng = np.random.default_rng(11)
+    n = 300
+    return pd.DataFrame({
+        'tire_age': rng.integers(0, 40, n),
+        'fuel_load': rng.uniform(0, 110, n).round(1),
+        'track_position': rng.integers(1, 21, n),
+        'compound': rng.choice(['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET', 'soft'], n),
+        'lap_number': rng.integers(1, 78, n),
+    })
+
+
+def fitted_predictor(use_polynomial):
+    rng = np.random.default_rng(5)
+    predictor = LapTimePredictor()
+    X = np.column_stack([rng.integers(0, 40, 200), rng.uniform(0, 110, 200),
+                         rng.integers(1, 21, 200), np.eye(3)[rng.integers(0, 3, 200)],
+                         rng.integers(1, 78, 200)])
+    y = 80 + X[:, 0] * 0.05 - X[:, 1] * 0.03 + rng.normal(0, 0.2, 200)
+    predictor.fit(X, y, use_polynomial=use_polynomial)
+    return predictor
+
+
+def assert_matches_rows(predictor, inputs):
+    batch = predictor.predict_batch(inputs)
+    rows = [predictor.predict(**row) for row in inputs.to_dict('records')]
+    assert len(batch) == len(rows)
+    np.testing.assert_allclose(batch.predicted_time, [r.predicted_time for r in rows], atol=1e-9)
+    for name in FACTORS:
+        np.testing.assert_allclose(batch.factors[name], [r.factors[name] for r in rows], atol=1e-12)
+    assert batch.confidence == rows[0].confidence
+    assert batch.model_used == rows[0].model_used
+
+
+def test_analytical_batch_matches_predict(inputs):
+    assert_matches_rows(LapTimePredictor(), inputs)
+
+
+@pytest.mark.parametrize('use_polynomial', [True, False])
+def test_fitted_batch_matches_predict(inputs, use_polynomial):
+    assert_matches_rows(fitted_predictor(use_polynomial), inputs)
+
+
+def test_missing_columns_take_predict_defaults():
+    predictor = LapTimePredictor()
+    batch = predictor.predict_batch({'tire_age': [0, 12]})
+    expected = [predictor.predict(0).predicted_time, predictor.predict(12).predicted_time]
+    assert batch.predicted_time.tolist() == expected
+
+
+def test_tire_age_is_required():
+    with pytest.raises(ValueError):
+        LapTimePredictor().predict_batch({'fuel_load': [50.0]})
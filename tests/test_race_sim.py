@@ -0,0 +1,58 @@
+"""Vectorized race simulation against the scalar `_calculate_race_time` loop"""
+
+import numpy as np
+import pytest
+
+from lap_predictor import _calculate_race_time, predict_race_strategy
+from race_sim import encode_strategies, lap_times, python_round, race_times, simulate_strategies
+
+
+def random_strategies(n_strategies: int, total_laps: int, seed: int = 0):
+    """1-4 stint strategies with random pit laps and compounds"""
+    rng = np.random.default_rng(seed)
+    stints, compounds = [], []
+    for _ in range(n_strategies):
+        n_stints = int(rng.integers(1, 5))
+        pits = np.sort(rng.integers(1, total_laps, n_stints - 1))
+        stints.append(np.diff(np.r_[0, pits, total_laps]).tolist())
+        compounds.append([str(c) for c in rng.choice(['SOFT', 'MEDIUM', 'HARD'], n_stints)])
+    return stints, compounds
+
+
+@pytest.mark.parametrize('total_laps,base_time', [(44, 105.2), (57, 82.3), (78, 74.9)])
+def test_totals_match_scalar_exactly(total_laps, base_time):
+    stints, compounds = random_strategies(300, total_laps, seed=total_laps)
+    expected = [_calculate_race_time(s, c, base_time, 22.0) for s, c in zip(stints, compounds)]
+    assert simulate_strategies(stints, compounds, base_time, 22.0) == expected
+
+
+def test_mixed_race_lengths_and_empty_stints():
+    # Repeated pit laps give zero-length stints, which still cost a stop
+    stints = [[20, 0, 37], [57], [10, 10, 10, 14], [30, 27]]
+    compounds = [['SOFT', 'MEDIUM', 'HARD'], ['HARD'], ['SOFT'] * 4, ['MEDIUM', 'HARD']]
+    expected = [_calculate_race_time(s, c, 90.0, 21.5) for s, c in zip(stints, compounds)]
+    lengths, modifiers, counts = encode_strategies(stints, compounds)
+    assert race_times(lengths, modifiers, 90.0, 21.5, counts).tolist() == expected
+
+
+def test_lap_times_layout():
+    lengths, modifiers, _ = encode_strategies([[25, 32], [20, 24]], [['SOFT', 'HARD'], ['MEDIUM', 'HARD']])
+    times, valid = lap_times(lengths, modifiers, 82.3)
+    assert times.shape == valid.shape == (2, 57)
+    assert valid.sum(axis=1).tolist() == [57, 44]
+    assert (times[1, 44:] == 0.0).all()
+    assert round(float(np.add.accumulate(times[0])[-1]), 2) == \
+        _calculate_race_time([25, 32], ['SOFT', 'HARD'], 82.3, 0.0)
+
+
+@pytest.mark.parametrize('value', [0.125, 2.675, 1.005, -0.125, 12345.675, 5458.985])
+def test_python_round_matches_builtin(value):
+    assert python_round(np.array([value]), 2)[0] == round(value, 2)
+
+
+def test_predict_race_strategy_uses_same_totals():
+    result = predict_race_strategy(total_laps=44, base_lap_time=82.3)
+    for strategy in result['strategies']:
+        stints = np.diff(np.r_[0, strategy['stops'], 44]).tolist()
+        assert strategy['estimated_time'] == _calculate_race_time(
+            stints, strategy['compounds'], 82.3, 22.0)
@@ -0,0 +1,33 @@
+"""Materialized stint rows"""
+
+import numpy as np
+import pandas as pd
+
+from session_summary import LAP_COLUMNS, stint_rows
+
+
+def laps_frame(rows):
+    return pd.DataFrame([(f'lap-{i}', *r) for i, r in enumerate(rows)], columns=LAP_COLUMNS)
+
+
+def test_stint_laps_count_untimed_and_slow_laps():
+    times = [80.0, 80.1, np.nan, 80.2, 120.0, 80.3, 95.0, 80.0, 80.1, 80.2]
+    compounds = ['SOFT'] * 6 + ['HARD'] * 4
+    life = [1, 2, 3, 4, 5, 6, 1, 2, 3, 4]
+    laps = laps_frame([('VER', n + 1, t, c, l)
+                       for n, (t, c, l) in enumerate(zip(times, compounds, life))])
+    rows = stint_rows('s1', laps)
+    assert [(r[3], r[4], r[5], r[6], r[7]) for r in rows] == [
+        ('SOFT', 1, 6, 6, 4),   # untimed lap 3 and the 120 s lap still count
+        ('HARD', 7, 10, 4, 3),  # 95 s out lap is not averaged
+    ]
+    assert rows[0][8] == round(np.mean([80.0, 80.1, 80.2, 80.3]), 3)
+
+
+def test_compound_usage_counts_every_lap_of_each_stint():
+    rng = np.random.default_rng(2)
+    times = 80 + rng.normal(0, 0.2, 30)
+    times[[0, 14, 15]] = [np.nan, 101.0, 99.0]
+    laps = laps_frame([('LEC', n + 1, t, 'MEDIUM' if n < 15 else 'HARD', n % 15 + 1)
+                       for n, t in enumerate(times)])
+    assert sum(r[6] for r in stint_rows('s1', laps)) == 29  # untimed lap 1 precedes the first stint
@@ -0,0 +1,80 @@
+"""Dynamic-programming strategy search against brute-force enumeration"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from race_sim import simulate_strategies
+from strategy_optimizer import MAX_STOPS, WET_COMPOUNDS, optimize_strategy
+
+
+def brute_force(total_laps, base_time, compounds, pit_time, max_stops, min_stint):
+    """Every legal (stints, compounds) strategy with its race time, fastest first"""
+    stints, fitted = [], []
+    for n_stops in range(max_stops + 1):
+        for pits in itertools.combinations(range(1, total_laps), n_stops):
+            lengths = np.diff((0,) + pits + (total_laps,)).tolist()
+            if min(lengths) < min_stint:
+                continue
+            for sequence in itertools.product(compounds, repeat=n_stops + 1):
+                if len(set(sequence)) < 2 and not set(sequence) & set(WET_COMPOUNDS):
+                    continue
+                stints.append(lengths)
+                fitted.append(list(sequence))
+    times = simulate_strategies(stints, fitted, base_time, pit_time)
+    return sorted(zip(times, stints, fitted))
+
+
+@pytest.mark.parametrize('total_laps,max_stops,min_stint,top_k', [
+    (12, 2, 1, 10), (15, 3, 3, 8), (9, 1, 1, 5), (20, 2, 4, 15),
+])
+def test_top_k_matches_brute_force(total_laps, max_stops, min_stint, top_k):
+    compounds = ['SOFT', 'MEDIUM', 'HARD']
+    expected = brute_force(total_laps, 84.0, compounds, 21.0, max_stops, min_stint)[:top_k]
+    plans = optimize_strategy(total_laps=total_laps, base_lap_time=84.0, compounds=compounds,
+                              pit_time=21.0, top_k=top_k, max_stops=max_stops,
+                              min_stint_laps=min_stint)
+    assert [p.estimated_time for p in plans] == pytest.approx([t for t, _, _ in expected],
+                                                              abs=0.011)
+    for plan in plans:
+        assert len(plan.stints) - 1 <= max_stops
+        assert min(plan.stints) >= min_stint and sum(plan.stints) == total_laps
+        assert len(set(plan.compounds)) >= 2
+
+
+def test_plan_times_match_race_sim():
+    plans = optimize_strategy(total_laps=57, base_lap_time=82.3, top_k=10)
+    expected = simulate_strategies([p.stints for p in plans], [p.compounds for p in plans],
+                                   82.3, 22.0)
+    assert [p.estimated_time for p in plans] == pytest.approx(expected, abs=0.011)
+
+
+def test_wet_compound_waives_two_compound_rule():
+    plans = optimize_strategy(total_laps=10, base_lap_time=90.0, compounds=['INTERMEDIATE'],
+                              max_stops=1, top_k=3)
+    assert plans and all(set(p.compounds) == {'INTERMEDIATE'} for p in plans)
+
+
+def test_fewer_plans_than_k_when_few_are_legal():
+    plans = optimize_strategy(total_laps=4, base_lap_time=90.0, compounds=['SOFT', 'HARD'],
+                              max_stops=1, min_stint_laps=2, top_k=10)
+    assert sorted((p.stints, p.compounds) for p in plans) == [
+        ([2, 2], ['HARD', 'SOFT']), ([2, 2], ['SOFT', 'HARD'])]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'base_lap_time': float('nan')},
+    {'pit_time': float('inf')},
+    {'compounds': ['SOFT']},
+    {'compounds': ['SOFT', 'soft']},
+    {'compounds': ['SLICK']},
+    {'max_stops': MAX_STOPS + 1},
+    {'top_k': 0},
+    {'total_laps': 0},
+    {'degradation': {'SOFT': float('nan')}},
+])
+def test_invalid_arguments_raise(kwargs):
+    arguments = {'total_laps': 57, 'base_lap_time': 82.3, **kwargs}
+    with pytest.raises(ValueError):
+        optimize_strategy(**arguments)
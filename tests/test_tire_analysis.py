@@ -0,0 +1,123 @@
+"""Tire analysis: batch fits against the per-stint SciPy path, stint segmentation"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from tire_analysis import (IncrementalDegradation, analyze_tire_degradation,
+                           analyze_tire_degradation_batch, segment_stints)
+
+
+def synthetic_stints(n_stints: int, seed: int = 0) -> Tuple[List[List[float]], List[str]]:
+    """Race-like stints: linear wear, optional cliff, noise and the odd pit/SC lap"""
+    rng = np.random.default_rng(seed)
+    stints, compounds = [], []
+    for _ in range(n_stints):
+        n = int(rng.integers(3, 40))
+        laps = np.arange(n)
+        times = 80 + rng.uniform(0, 0.12) * laps + rng.normal(0, 0.15, n)
+        if rng.random() < 0.4:
+            start = rng.uniform(8, max(n, 9))
+            times += rng.uniform(0.002, 0.03) * np.maximum(0, laps - start) ** 2
+        if rng.random() < 0.3:
+            times[rng.integers(n)] += 25
+        stints.append(times.tolist())
+        compounds.append(str(rng.choice(['SOFT', 'MEDIUM', 'HARD'])))
+    return stints, compounds
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    stints, compounds = synthetic_stints(400)
+    serial = [analyze_tire_degradation(t, c) for t, c in zip(stints, compounds)]
+    return stints, compounds, serial, analyze_tire_degradation_batch(stints, compounds)
+
+
+def test_rates_and_loss_match(fitted):
+    _, _, serial, batch = fitted
+    for a, b in zip(serial, batch):
+        assert b.compound == a.compound
+        assert b.degradation_rate == pytest.approx(a.degradation_rate, abs=1e-4)
+        assert b.performance_loss_percent == pytest.approx(a.performance_loss_percent, abs=1e-2)
+
+
+def test_cliff_lap_within_documented_tolerance(fitted):
+    _, _, serial, batch = fitted
+    exact = np.mean([a.cliff_lap == b.cliff_lap for a, b in zip(serial, batch)])
+    near = np.mean([(a.cliff_lap is None) == (b.cliff_lap is None) and
+                    (a.cliff_lap is None or abs(a.cliff_lap - b.cliff_lap) <= 2)
+                    for a, b in zip(serial, batch)])
+    assert exact >= 0.90
+    assert near >= 0.94
+
+
+def test_cliff_lap_not_rounded_up(fitted):
+    # A 0.5-lap grid without refinement reported k + 1 for optima in (k + 0.5, k + 1)
+    _, _, serial, batch = fitted
+    off_by_one = [a for a, b in zip(serial, batch)
+                  if a.cliff_lap is not None and b.cliff_lap == a.cliff_lap + 1]
+    assert len(off_by_one) <= 0.02 * len(serial)
+
+
+
+def test_incremental_snapshot_matches_batch():
+    stints, compounds = synthetic_stints(60, seed=3)
+    for times, compound in zip(stints, compounds):
+        incremental = IncrementalDegradation(compound)
+        for n, lap_time in enumerate(times, start=1):
+            incremental.add(lap_time)
+            snapshot = incremental.snapshot()
+            batch = analyze_tire_degradation_batch([times[:n]], compound)[0]
+            assert snapshot.degradation_rate == pytest.approx(batch.degradation_rate, abs=1e-9)
+            assert snapshot.performance_loss_percent == pytest.approx(
+                batch.performance_loss_percent, abs=1e-9)
+        incremental.refresh_cliff()
+        snapshot = incremental.snapshot()
+        assert snapshot.cliff_lap == batch.cliff_lap
+        assert snapshot.optimal_stint_length == batch.optimal_stint_length
+        assert snapshot.strategy_recommendation == batch.strategy_recommendation
+
+def test_layouts_agree(fitted):
+    stints, compounds, _, batch = fitted
+    offsets = np.concatenate([[0], np.cumsum([len(t) for t in stints])])
+    flat = analyze_tire_degradation_batch(np.concatenate(stints), compounds, offsets)
+    assert flat == batch
+
+
+def test_short_stint_is_insufficient():
+    result = analyze_tire_degradation_batch([[80.0, 80.1, 80.2]], 'SOFT')[0]
+    assert result.strategy_recommendation == "Insufficient data"
+    assert result == analyze_tire_degradation([80.0, 80.1, 80.2], 'SOFT')
+
+
+def test_segment_stints_splits_on_driver_and_compound():
+    rows = [('HAM', 1, 80.0, 'SOFT', 1), ('HAM', 2, 80.1, 'SOFT', 2), ('HAM', 3, 81.0, 'HARD', 1),
+            ('VER', 1, 79.9, 'HARD', 1), ('VER', 2, 80.0, 'HARD', 2)]
+    stints = segment_stints(rows)
+    assert stints.driver_codes == ['HAM', 'HAM', 'VER']
+    assert stints.compounds == ['SOFT', 'HARD', 'HARD']
+    assert (stints.start_laps, stints.end_laps) == ([1, 3, 1], [2, 3, 2])
+
+
+def test_segment_stints_splits_on_fresh_set_of_same_compound():
+    # Behaviour change from the old per-driver loop, which split on compound
+    # only: a stop for new mediums used to merge both sets into one stint
+    rows = [('LEC', n, 80.0 + 0.1 * life, 'MEDIUM', life)
+            for n, life in zip(range(1, 7), [5, 6, 7, 1, 2, 3])]
+    stints = segment_stints(rows)
+    assert stints.compounds == ['MEDIUM', 'MEDIUM']
+    assert (stints.start_laps, stints.end_laps) == ([1, 4], [3, 6])
+
+
+def test_segment_stints_without_tire_life_splits_on_compound_only():
+    rows = [('LEC', n, 80.0, 'MEDIUM', None) for n in range(1, 5)]
+    assert len(segment_stints(rows)) == 1
+
+
+def test_segment_stints_drops_invalid_laps():
+    rows = [('NOR', 1, None, 'SOFT', 1), ('NOR', 2, 30.0, 'SOFT', 2),
+            ('NOR', 3, 80.0, None, 3), ('NOR', 4, 80.2, None, 4)]
+    stints = segment_stints(rows)
+    assert stints.compounds == ['UNKNOWN']
+    assert stints.stint_lap_times(0) == [80.0, 80.2]
@@ -4,9 +4,17 @@ Machine Learning for tire wear prediction and strategy optimization
 Created by Luna for Arturo's portfolio
 """
 
+import heapq
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
 import numpy as np
 from scipy.optimize import curve_fit
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Sequence, Tuple, Optional
 from dataclasses import dataclass
 import json
 
@@ -111,6 +119,15 @@ def analyze_tire_degradation(lap_times: List[float],
     except Exception:
         pass
     
+    # Performance loss calculation
+    performance_loss = (clean_times[-1] - clean_times[0]) / clean_times[0] * 100
+    
+    return _build_degradation(compound, len(lap_times), deg_rate, cliff_lap, performance_loss)
+
+
+def _build_degradation(compound: str, n_laps: int, deg_rate: float,
+                       cliff_lap: Optional[int], performance_loss: float) -> TireDegradation:
+    """Stint length and recommendation from fitted parameters (shared by the batch path)"""
     # Calculate optimal stint length
     if cliff_lap:
         optimal_stint = cliff_lap - 2  # Stop 2 laps before cliff
@@ -123,9 +140,6 @@ def analyze_tire_degradation(lap_times: List[float],
         else:  # MEDIUM
             optimal_stint = min(25, max(15, int(0.7 / max(deg_rate, 0.01))))
     
-    # Performance loss calculation
-    performance_loss = (clean_times[-1] - clean_times[0]) / clean_times[0] * 100
-    
     # Strategy recommendation
     if deg_rate < 0.03:
         recommendation = "Low degradation - extend stint for track position"
@@ -136,7 +150,7 @@ def analyze_tire_degradation(lap_times: List[float],
     else:
         recommendation = "Severe degradation - pit ASAP for fresh tires"
     
-    if cliff_lap and cliff_lap < len(lap_times) + 5:
+    if cliff_lap and cliff_lap < n_laps + 5:
         recommendation += f" | WARNING: Tire cliff predicted at lap {cliff_lap}"
     
     return TireDegradation(
@@ -149,6 +163,571 @@ def analyze_tire_degradation(lap_times: List[float],
     )
 
 
+def pad_stints(lap_times, offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Stints -> NaN-padded (n_stints, max_laps) matrix
+
+    Args:
+        lap_times: List of per-stint lap time sequences, a padded 2-D
+            array, or (with `offsets`) one flat array of all stints
+        offsets: Ragged layout: stint i is lap_times[offsets[i]:offsets[i + 1]]
+    """
+    if offsets is not None:
+        flat = np.asarray(lap_times, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        padded = np.full((len(lengths), max(lengths.max(initial=0), 1)), np.nan)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.arange(len(flat)) - np.repeat(offsets[:-1], lengths)
+        padded[rows, cols] = flat[offsets[0]:offsets[-1]]
+        return padded
+    if isinstance(lap_times, np.ndarray) and lap_times.ndim == 2:
+        return lap_times.astype(np.float64)
+    width = max((len(t) for t in lap_times), default=1) or 1
+    padded = np.full((len(lap_times), width), np.nan)
+    for i, times in enumerate(lap_times):
+        padded[i, :len(times)] = times
+    return padded
+
+
+def _batch_lstsq(features: np.ndarray, times: np.ndarray, weights: np.ndarray):
+    """
+    Weighted least squares for many small problems at once
+
+    Args:
+        features: (..., laps, k) design matrices
+        times: (..., laps) targets (anything where weight is 0)
+        weights: (..., laps) 0/1 sample mask
+
+    Returns:
+        (coefficients (..., k), sum of squared residuals (...))
+    """
+    wf_t = np.swapaxes(features * weights[..., None], -1, -2)
+    gram = wf_t @ features
+    rhs = (wf_t @ times[..., None])[..., 0]
+    # A tiny ridge keeps degenerate problems (e.g. a cliff term that is zero
+    # on every lap) solvable without changing well-posed solutions
+    gram = gram + np.eye(gram.shape[-1]) * 1e-9
+    coef = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    residual = (times - (features @ coef[..., None])[..., 0]) * weights
+    return coef, (residual ** 2).sum(axis=-1)
+
+
+GOLDEN = (np.sqrt(5) - 1) / 2
+CLIFF_REFINE_ITERATIONS = 20  # Bracket shrinks to ~1e-4 of a lap
+
+
+def _cliff_fits(laps: np.ndarray, times: np.ndarray, weights: np.ndarray,
+                n_clean: np.ndarray, linear_sse: np.ndarray, starts: np.ndarray):
+    """
+    Cliff model fits for fixed `cliff_start` candidates
+
+    A fit that breaks the `analyze_tire_degradation` parameter bounds is
+    replaced by the linear fit (cliff_factor 0), which is where the bounded
+    solver ends up for that cliff_start; the residual profile is flat there.
+
+    Args:
+        laps, times, weights: (stints, laps) as in `_batch_lstsq`
+        n_clean: Clean laps per stint (upper bound of cliff_start)
+        linear_sse: Residual sum of squares of each stint's linear fit
+        starts: (stints, candidates) cliff_start values
+
+    Returns:
+        (coefficients (stints, candidates, 3), residual sum of squares with
+        inf where cliff_start itself is out of bounds)
+    """
+    cliff = np.maximum(0.0, laps[:, None, :] - starts[:, :, None]) ** 2   # (S, C, L)
+    features = np.stack([np.ones_like(cliff), np.broadcast_to(laps[:, None, :], cliff.shape),
+                         cliff], axis=-1)
+    coef, sse = _batch_lstsq(features, times[:, None, :], weights[:, None, :])
+    # A cliff steeper than the 0.1 bound sits on it: refit base and rate only
+    steep = np.nonzero(coef[..., 2] > 0.1)
+    if len(steep[0]):
+        stint = steep[0]
+        coef[steep + (slice(0, 2),)], sse[steep] = _batch_lstsq(
+            features[steep][..., :2], times[stint] - 0.1 * cliff[steep], weights[stint])
+        coef[steep + (2,)] = 0.1
+    bounded = ((coef[..., 1] >= 0) & (coef[..., 1] <= 1.0) & (coef[..., 2] >= 0) &
+               (cliff * weights[:, None, :]).any(axis=-1))
+    coef[..., 2] = np.where(bounded, coef[..., 2], 0.0)
+    sse = np.where(bounded, sse, linear_sse[:, None])
+    return coef, np.where((starts >= 5) & (starts <= n_clean[:, None]), sse, np.inf)
+
+
+class RunningLinearFit:
+    """
+    Least-squares line `y = intercept + slope * x` over a stream of points
+
+    Keeps the count, means and centered co-moments (Welford-style), so each
+    point is an O(1) update and the fit is available at any time without
+    revisiting earlier points.
+    """
+
+    __slots__ = ('n', 'mean_x', 'mean_y', 'm_xx', 'm_xy', 'm_yy')
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m_xx = self.m_xy = self.m_yy = 0.0
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.m_xx += dx * (x - self.mean_x)
+        self.m_xy += dx * (y - self.mean_y)
+        self.m_yy += dy * (y - self.mean_y)
+
+    def remove(self, x: float, y: float):
+        """Undo an earlier `add` of the same point"""
+        if self.n <= 1:
+            self.__init__()
+            return
+        self.n -= 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x -= dx / self.n
+        self.mean_y -= dy / self.n
+        self.m_xx -= dx * (x - self.mean_x)
+        self.m_xy -= dx * (y - self.mean_y)
+        self.m_yy -= dy * (y - self.mean_y)
+
+    @property
+    def slope(self) -> float:
+        return self.m_xy / self.m_xx if self.m_xx > 0 else 0.0
+
+    @property
+    def intercept(self) -> float:
+        return self.mean_y - self.slope * self.mean_x
+
+    @property
+    def sse(self) -> float:
+        """Sum of squared residuals of the current fit"""
+        return max(self.m_yy - self.slope * self.m_xy, 0.0)
+
+
+# Cliff re-estimation trigger: one-sided CUSUM of standardized residuals
+DRIFT_SLACK = 0.5
+DRIFT_THRESHOLD = 4.0
+MIN_RESIDUAL_STD = 0.05  # seconds; keeps near-perfect fits from tripping on noise
+
+
+class IncrementalDegradation:
+    """
+    `analyze_tire_degradation` for a stint that arrives one lap at a time
+
+    - Outlier filter: the stint median is kept with two heaps; laps sit in
+      an accepted (max-heap) or rejected (min-heap) bucket and only move
+      when the 10%-over-median threshold crosses them
+    - Linear fit: running sums over the accepted laps (`RunningLinearFit`),
+      updated only for laps that enter or leave
+    - Cliff: re-estimated with the batch fitter only when a CUSUM of the
+      new laps' residuals against the linear fit signals drift (or on
+      `refresh_cliff()`)
+
+    Each lap costs O(log n) heap work (effectively constant for stints),
+    and `snapshot()` returns what `analyze_tire_degradation_batch` gives for
+    the same laps, with the cliff as of its last re-estimate.
+    """
+
+    def __init__(self, compound: str = "MEDIUM"):
+        self.compound = compound
+        self.lap_times: List[float] = []
+        self.cliff_lap: Optional[int] = None
+        self.cliff_refits = 0
+        self._lower: List[float] = []   # max-heap (negated) of the lower half
+        self._upper: List[float] = []   # min-heap of the upper half
+        self._accepted: List[Tuple[float, int]] = []  # max-heap (negated time, lap)
+        self._rejected: List[Tuple[float, int]] = []  # min-heap (time, lap)
+        self._clean: List[bool] = []
+        self._fit = RunningLinearFit()       # accepted laps
+        self._fit_all = RunningLinearFit()   # every lap (used under 5 clean laps)
+        self._drift = 0.0
+
+    def __len__(self) -> int:
+        return len(self.lap_times)
+
+    @property
+    def median(self) -> float:
+        if len(self._lower) > len(self._upper):
+            return -self._lower[0]
+        return (-self._lower[0] + self._upper[0]) / 2
+
+    def add(self, lap_time: float):
+        """Fold in the next lap of the stint"""
+        lap = len(self.lap_times)
+        self.lap_times.append(lap_time)
+        self._clean.append(False)
+        self._fit_all.add(lap, lap_time)
+
+        if not self._lower or lap_time <= -self._lower[0]:
+            heapq.heappush(self._lower, -lap_time)
+        else:
+            heapq.heappush(self._upper, lap_time)
+        if len(self._lower) > len(self._upper) + 1:
+            heapq.heappush(self._upper, -heapq.heappop(self._lower))
+        elif len(self._upper) > len(self._lower):
+            heapq.heappush(self._lower, -heapq.heappop(self._upper))
+
+        heapq.heappush(self._rejected, (lap_time, lap))
+        self._rebalance(self.median * 1.1)
+        if self._clean[lap]:
+            self._track_drift(lap, lap_time)
+
+    def _rebalance(self, threshold: float):
+        """Move laps across the outlier threshold, keeping the fit in step"""
+        while self._accepted and -self._accepted[0][0] >= threshold:
+            neg_time, lap = heapq.heappop(self._accepted)
+            self._fit.remove(lap, -neg_time)
+            self._clean[lap] = False
+            heapq.heappush(self._rejected, (-neg_time, lap))
+        while self._rejected and self._rejected[0][0] < threshold:
+            lap_time, lap = heapq.heappop(self._rejected)
+            self._fit.add(lap, lap_time)
+            self._clean[lap] = True
+            heapq.heappush(self._accepted, (-lap_time, lap))
+
+    def _track_drift(self, lap: int, lap_time: float):
+        fit = self._fit
+        if fit.n < 5:
+            return
+        std = max(np.sqrt(fit.sse / (fit.n - 2)), MIN_RESIDUAL_STD)
+        residual = lap_time - (fit.intercept + fit.slope * lap)
+        self._drift = max(0.0, self._drift + residual / std - DRIFT_SLACK)
+        if self._drift > DRIFT_THRESHOLD:
+            self.refresh_cliff()
+
+    def refresh_cliff(self):
+        """Re-estimate the cliff from the whole stint now"""
+        self._drift = 0.0
+        self.cliff_refits += 1
+        if len(self.lap_times) >= 5:
+            self.cliff_lap = analyze_tire_degradation_batch(
+                [self.lap_times], self.compound)[0].cliff_lap
+
+    @property
+    def n_clean(self) -> int:
+        return self._fit.n
+
+    @property
+    def degradation_rate(self) -> float:
+        """Linear rate in seconds per lap, bounded to [0, 1] like the batch fits"""
+        fit = self._fit if self._fit.n >= 5 else self._fit_all
+        return min(max(fit.slope, 0.0), 1.0)
+
+    def snapshot(self) -> TireDegradation:
+        """TireDegradation for the laps so far"""
+        n_laps = len(self.lap_times)
+        if n_laps < 5:
+            return TireDegradation(
+                compound=self.compound,
+                degradation_rate=0.0,
+                optimal_stint_length=n_laps,
+                cliff_lap=None,
+                performance_loss_percent=0.0,
+                strategy_recommendation="Insufficient data"
+            )
+        # First/last clean lap: only leading/trailing outliers are visited
+        first, last = self.lap_times[0], self.lap_times[-1]
+        if self._fit.n >= 5:
+            first = next(t for t, clean in zip(self.lap_times, self._clean) if clean)
+            last = next(self.lap_times[i] for i in range(n_laps - 1, -1, -1) if self._clean[i])
+        performance_loss = (last - first) / first * 100
+        return _build_degradation(self.compound, n_laps, self.degradation_rate,
+                                  self.cliff_lap, performance_loss)
+
+
+def analyze_tire_degradation_batch(lap_times, compounds, offsets=None,
+                                   cliff_step: float = 0.5) -> List[TireDegradation]:
+    """
+    `analyze_tire_degradation` for many stints in one vectorized pass
+
+    Same outlier filtering and result fields as the per-stint path, but
+    without iterative SciPy fits:
+    - Linear model: closed-form least squares for every stint at once,
+      with the same bounds (rate clipped to [0, 1])
+    - Cliff model: for each candidate `cliff_start` on a `cliff_step` grid
+      the model is linear in (base, rate, cliff_factor), so every
+      (stint, candidate) pair is one small least-squares solve. Like
+      curve_fit, the search starts at 0.7 x clean laps and follows the
+      residual downhill to the nearest minimum (the lowest one where that
+      basin is flat), then refines it by golden-section search within one
+      grid step
+
+    Degradation rates and performance loss match the per-stint path.
+    `cliff_lap` (and with it the stint length and recommendation) is not
+    guaranteed to: on the synthetic stints of
+    benchmarks/bench_tire_degradation.py it is identical for 90-94% of
+    stints and within 2 laps for 94-96%. The rest are noisy stints where
+    curve_fit's path through all four parameters ends elsewhere.
+
+    Args:
+        lap_times: Stints as accepted by `pad_stints`
+        compounds: Compound per stint (or one compound for all)
+        offsets: Ragged layout offsets (see `pad_stints`)
+        cliff_step: Spacing of the cliff_start grid, in laps
+
+    Returns:
+        One TireDegradation per stint, in input order
+    """
+    times = pad_stints(lap_times, offsets)
+    n_stints, width = times.shape
+    if isinstance(compounds, str):
+        compounds = [compounds] * n_stints
+    present = ~np.isnan(times)
+    n_laps = present.sum(axis=1)
+    laps = np.broadcast_to(np.arange(width, dtype=np.float64), times.shape)
+    filled = np.where(present, times, 0.0)
+
+    # Remove outliers (pit laps, safety cars, etc.): within 10% of the stint median
+    with np.errstate(all='ignore'):
+        median = np.nanmedian(np.where(n_laps[:, None] > 0, times, 0.0), axis=1)
+    clean = present & (filled < median[:, None] * 1.1)
+    clean[clean.sum(axis=1) < 5] = present[clean.sum(axis=1) < 5]
+    weights = clean.astype(np.float64)
+    n_clean = clean.sum(axis=1)
+
+    # Linear model, closed form; a rate outside [0, 1] sits on the bound
+    linear = np.stack([np.ones_like(laps), laps], axis=-1)
+    linear_coef, linear_sse = _batch_lstsq(linear, filled, weights)
+    deg_rate = np.clip(linear_coef[:, 1], 0.0, 1.0)
+    fits = partial(_cliff_fits, laps, filled, weights, n_clean, linear_sse)
+
+    # Cliff model: grid over cliff_start in [5, clean laps], linear solve per candidate
+    starts = np.arange(5.0, max(width, 5) + cliff_step, cliff_step)
+    coef, sse = fits(np.broadcast_to(starts, (n_stints, len(starts))))
+    rows = np.arange(n_stints)
+
+    # curve_fit starts from cliff_start = 0.7 * clean laps and settles in the
+    # nearest basin of the residual, so walk downhill over the grid from there
+    # (not to the global minimum, which noisy stints can have elsewhere)
+    last = len(starts) - 1
+    best = np.clip(np.rint((0.7 * n_clean - 5.0) / cliff_step), 0, last).astype(np.int64)
+    for _ in range(last):
+        here = sse[rows, best]
+        left = sse[rows, np.maximum(best - 1, 0)]
+        right = sse[rows, np.minimum(best + 1, last)]
+        step = np.where((left < here) & (left <= right), -1, np.where(right < here, 1, 0))
+        if not step.any():
+            break
+        best += step
+    # Where that basin holds no cliff (flat residual), curve_fit drifts on
+    # towards the lowest point instead
+    flat = coef[rows, best, 2] <= 0.0005
+    best = np.where(flat, sse.argmin(axis=1), best)
+
+    # Golden-section refinement inside [best - step, best + step], so the
+    # continuous optimum (and int() of it) matches curve_fit rather than
+    # whichever grid point it rounds to
+    lo = np.maximum(starts[best] - cliff_step, 5.0)
+    hi = np.minimum(starts[best] + cliff_step, np.maximum(n_clean, 5).astype(np.float64))
+    for _ in range(CLIFF_REFINE_ITERATIONS):
+        inner = np.stack([hi - GOLDEN * (hi - lo), lo + GOLDEN * (hi - lo)], axis=1)
+        _, inner_sse = fits(inner)
+        left = inner_sse[:, 0] <= inner_sse[:, 1]
+        hi = np.where(left, inner[:, 1], hi)
+        lo = np.where(left, lo, inner[:, 0])
+    refined = np.stack([starts[best], (lo + hi) / 2], axis=1)
+    refined_coef, refined_sse = fits(refined)
+    pick = (refined_sse[:, 1] <= refined_sse[:, 0]).astype(np.int64)
+    cliff_sse = refined_sse[rows, pick]
+    # curve_fit rejects its own starting point below 5 laps, so no cliff there
+    has_cliff = (np.isfinite(cliff_sse) & (refined_coef[rows, pick, 2] > 0.0005) &
+                 (0.7 * n_clean >= 5))
+    cliff_start = refined[rows, pick]
+
+    # First/last clean lap for the performance loss
+    first = filled[rows, clean.argmax(axis=1)]
+    last = filled[rows, width - 1 - clean[:, ::-1].argmax(axis=1)]
+    with np.errstate(all='ignore'):
+        performance_loss = (last - first) / first * 100
+
+    results = []
+    for i in range(n_stints):
+        if n_laps[i] < 5:
+            results.append(TireDegradation(
+                compound=compounds[i],
+                degradation_rate=0.0,
+                optimal_stint_length=int(n_laps[i]),
+                cliff_lap=None,
+                performance_loss_percent=0.0,
+                strategy_recommendation="Insufficient data"
+            ))
+            continue
+        results.append(_build_degradation(
+            compounds[i], int(n_laps[i]), float(deg_rate[i]),
+            int(cliff_start[i]) if has_cliff[i] else None, float(performance_loss[i])
+        ))
+    return results
+
+
+# Session-wide analysis
+
+MIN_VALID_LAP_TIME = 60.0  # Shorter "laps" are timing artefacts
+
+
+@dataclass
+class Stints:
+    """All stints of a session in ragged layout (see `pad_stints`)"""
+    driver_codes: List[str]
+    compounds: List[str]
+    start_laps: List[int]
+    end_laps: List[int]
+    lap_times: np.ndarray  # Every stint's lap times, back to back
+    offsets: np.ndarray    # Stint i is lap_times[offsets[i]:offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.driver_codes)
+
+    def stint_lap_times(self, i: int) -> List[float]:
+        return self.lap_times[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def stint_numbers(self) -> List[int]:
+        """1-based stint number of each stint within its driver's race"""
+        numbers, seen = [], {}
+        for driver in self.driver_codes:
+            seen[driver] = seen.get(driver, 0) + 1
+            numbers.append(seen[driver])
+        return numbers
+
+    def subset(self, indices: Sequence[int]) -> 'Stints':
+        """The selected stints, in the given order"""
+        chunks = [self.lap_times[self.offsets[i]:self.offsets[i + 1]] for i in indices]
+        return Stints(
+            driver_codes=[self.driver_codes[i] for i in indices],
+            compounds=[self.compounds[i] for i in indices],
+            start_laps=[self.start_laps[i] for i in indices],
+            end_laps=[self.end_laps[i] for i in indices],
+            lap_times=np.concatenate(chunks) if chunks else np.array([]),
+            offsets=np.r_[0, np.cumsum([len(c) for c in chunks], dtype=np.int64)],
+        )
+
+
+def segment_stints(rows: Sequence[Sequence]) -> Stints:
+    """
+    Split a session's laps into stints with vectorized boundary detection
+
+    A new stint starts when the driver changes, the compound changes, or
+    tyre life drops (a fresh set of the same compound). Laps without a time
+    or under MIN_VALID_LAP_TIME are dropped first, as the per-driver
+    analysis always did.
+
+    Args:
+        rows: (driver_code, lap_number, lap_time_seconds, tire_compound,
+            tire_life) ordered by driver_code, lap_number
+
+    Returns:
+        Stints in driver, lap order
+    """
+    if not rows:
+        return Stints([], [], [], [], np.array([]), np.array([0]))
+    drivers, lap_numbers, lap_times, compounds, tire_life = (np.array(c, dtype=object)
+                                                             for c in zip(*rows))
+    lap_times = lap_times.astype(np.float64)  # None -> NaN
+    valid = lap_times >= MIN_VALID_LAP_TIME
+    drivers, lap_numbers, lap_times = drivers[valid], lap_numbers[valid], lap_times[valid]
+    compounds = np.where(compounds[valid] == None, 'UNKNOWN', compounds[valid])  # noqa: E711
+    tire_life = tire_life[valid].astype(np.float64)
+    if not len(lap_times):
+        return Stints([], [], [], [], np.array([]), np.array([0]))
+
+    boundary = np.ones(len(lap_times), dtype=bool)
+    boundary[1:] = ((drivers[1:] != drivers[:-1]) |
+                    (compounds[1:] != compounds[:-1]) |
+                    (tire_life[1:] < tire_life[:-1]))  # NaN compares False
+    starts = np.flatnonzero(boundary)
+    ends = np.r_[starts[1:], len(lap_times)]
+    return Stints(
+        driver_codes=drivers[starts].tolist(),
+        compounds=compounds[starts].tolist(),
+        start_laps=[int(n) for n in lap_numbers[starts]],
+        end_laps=[int(n) for n in lap_numbers[ends - 1]],
+        lap_times=lap_times,
+        offsets=np.r_[starts, len(lap_times)],
+    )
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared worker pool for SciPy fits (None when running single-process)
+
+    Sized by TIRE_ANALYSIS_WORKERS (default: CPU count). Workers are spawned
+    rather than forked so the pool is safe to create from threaded servers.
+    """
+    global _executor
+    workers = int(os.getenv('TIRE_ANALYSIS_WORKERS', os.cpu_count() or 1))
+    if workers <= 1:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _analyze_stint_group(stints: List[Tuple[List[float], str]]) -> List[TireDegradation]:
+    return [analyze_tire_degradation(lap_times, compound) for lap_times, compound in stints]
+
+
+def analyze_stints(stints: Stints, method: str = 'scipy') -> List[TireDegradation]:
+    """
+    Degradation analysis for every stint of a session
+
+    Args:
+        stints: Output of `segment_stints`
+        method: 'scipy' fits each stint with `analyze_tire_degradation`,
+            one task per driver on the shared worker pool; 'batch' uses the
+            vectorized `analyze_tire_degradation_batch` in-process
+
+    Returns:
+        One TireDegradation per stint, in `stints` order
+    """
+    if not len(stints):
+        return []
+    if method == 'batch':
+        return analyze_tire_degradation_batch(stints.lap_times, stints.compounds,
+                                              offsets=stints.offsets)
+    if method != 'scipy':
+        raise ValueError(f"Unknown method: {method}")
+
+    groups: Dict[str, List[int]] = {}
+    for i, driver in enumerate(stints.driver_codes):
+        groups.setdefault(driver, []).append(i)
+    tasks = [[(stints.stint_lap_times(i), stints.compounds[i]) for i in indices]
+             for indices in groups.values()]
+
+    executor = _get_executor()
+    try:
+        grouped = list(executor.map(_analyze_stint_group, tasks) if executor
+                       else map(_analyze_stint_group, tasks))
+    except BrokenProcessPool:
+        # A worker died; drop the pool (the next call starts a new one) and finish here
+        _reset_executor()
+        grouped = [_analyze_stint_group(task) for task in tasks]
+
+    results: List[Optional[TireDegradation]] = [None] * len(stints)
+    for indices, analyses in zip(groups.values(), grouped):
+        for i, analysis in zip(indices, analyses):
+            results[i] = analysis
+    return results
+
+
 def compare_tire_compounds(stints: Dict[str, List[float]]) -> Dict[str, any]:
     """
     Compare degradation across different tire compounds